@@ -5,6 +5,9 @@ from routes.auth import auth_bp
 from routes.admin import admin_bp
 from routes.customer import customer_bp
 from routes.shared import shared_bp
+from cli import register_commands
+from database import trace, replicas, records
+from utils.pagination import first_page_url
 
 def create_app(config_class=Config):
     # Point to frontend directory
@@ -12,6 +15,7 @@ def create_app(config_class=Config):
                 template_folder='../frontend/templates',
                 static_folder='../frontend/static')
     app.config.from_object(config_class)
+    app.json = records.JSONProvider(app)  # compact result rows (database/records.py) as JSON objects
     
     # Enable CORS if frontend is separate (likely)
     CORS(app, supports_credentials=True)
@@ -44,6 +48,13 @@ def create_app(config_class=Config):
     # I will register it at root level for now.
     app.register_blueprint(customer_bp)
 
+    register_commands(app)
+    if config_class.SQL_TRACE:
+        trace.init_app(app)
+    if replicas.replicas.enabled():
+        replicas.init_app(app)
+    app.jinja_env.globals['first_page_url'] = first_page_url
+
     from flask import render_template
     
     @app.route('/')
@@ -0,0 +1,106 @@
+"""
+Benchmark: concurrent checkouts through Order.create_order.
+
+Each thread is its own throwaway customer that repeatedly fills its cart with
+--lines books (1 copy each, the same books for every thread, so checkouts
+contend on the same Books rows) and checks out. Reports orders/sec and
+checkout latency percentiles. Stock, replenishment orders and today's
+sales rollups are restored afterwards.
+
+Run from the backend directory against a running database:
+    python -m benchmarks.bench_checkout --threads 8 --orders 400 --lines 30
+"""
+import argparse
+import threading
+import time
+
+from benchmarks.common import create_customer, drop_customer, percentile
+from database.connection import db_connection
+from models.order import Order
+from models.sales_rollup import SalesRollup
+
+def fill_cart(user_id, isbns):
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            "INSERT INTO Shopping_Cart (user_id, isbn, quantity) VALUES (%s, %s, 1)",
+            [(user_id, isbn) for isbn in isbns]
+        )
+        conn.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--orders', type=int, default=400, help="total checkouts across all threads")
+    parser.add_argument('--lines', type=int, default=30, help="cart lines per order")
+    args = parser.parse_args()
+    per_thread = args.orders // args.threads
+
+    with db_connection() as conn:
+        if not conn:
+            raise SystemExit("❌ Could not connect to the database")
+        cursor = conn.cursor()
+        cursor.execute("SELECT isbn, stock FROM Books ORDER BY isbn LIMIT %s", (args.lines,))
+        original_stock = dict(cursor.fetchall())
+        isbns = list(original_stock)
+        cursor.execute("SELECT COALESCE(MAX(po_id), 0) FROM Publisher_Orders")
+        last_po_id = cursor.fetchone()[0]
+        cursor.execute("SELECT CURRENT_DATE")
+        today = cursor.fetchone()[0]
+
+        # Enough stock for every order, so nothing fails on Prevent_Negative_Stock
+        cursor.executemany("UPDATE Books SET stock = stock + %s WHERE isbn = %s",
+                           [(per_thread * args.threads, isbn) for isbn in isbns])
+        user_ids = [create_customer(cursor) for _ in range(args.threads)]
+        conn.commit()
+
+    latencies, failures = [], []
+    lock = threading.Lock()
+
+    def worker(user_id):
+        for _ in range(per_thread):
+            fill_cart(user_id, isbns)
+            start = time.perf_counter()
+            success, message = Order.create_order(user_id, '4111111111111111', '2030-01-01')
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if not success:
+                    failures.append(message)
+
+    try:
+        threads = [threading.Thread(target=worker, args=(user_id,)) for user_id in user_ids]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+        checkout_time = sum(latencies)
+
+        completed = len(latencies) - len(failures)
+        print(f"📊 {args.threads} threads x {per_thread} orders, {len(isbns)} lines per order")
+        print(f"Completed: {completed}  Failed: {len(failures)}")
+        print(f"Throughput: {completed / wall:,.1f} orders/s (wall, incl. cart filling)")
+        print(f"Checkout throughput: {completed / (checkout_time / args.threads):,.1f} orders/s")
+        print(f"Latency ms: p50={percentile(latencies, 50) * 1000:.1f} "
+              f"p95={percentile(latencies, 95) * 1000:.1f} p99={percentile(latencies, 99) * 1000:.1f}")
+        for message in failures[:5]:
+            print(f"❌ {message}")
+    finally:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            for user_id in user_ids:
+                drop_customer(cursor, user_id)
+            cursor.executemany("UPDATE Books SET stock = %s WHERE isbn = %s",
+                               [(stock, isbn) for isbn, stock in original_stock.items()])
+            # Replenishment orders the benchmark (or the stock restore) triggered
+            placeholders = ", ".join(["%s"] * len(isbns))
+            cursor.execute(f"DELETE FROM Publisher_Orders WHERE po_id > %s AND isbn IN ({placeholders})",
+                           [last_po_id] + isbns)
+            conn.commit()
+        # The benchmark orders are gone; recount today's report rollups without them
+        SalesRollup.rebuild(since=str(today))
+
+if __name__ == '__main__':
+    main()
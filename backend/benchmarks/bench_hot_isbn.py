@@ -0,0 +1,140 @@
+"""
+Stress test: many concurrent checkouts of one hot book.
+
+The book's stock is set to --stock. --threads throwaway customers then buy
+--quantity copies each, over and over (cart add + Order.create_order), until
+checkout reports the book is out of stock. Afterwards the script checks:
+    - stock never oversold: units sold <= --stock, final stock >= 0
+    - stock accounted for: final stock = --stock - units sold = --stock - Order_Items units
+    - nothing left reserved for the book (no Stock_Reservations rows, Books.reserved = 0)
+    - at most one replenishment order (Auto_Order_Trigger fires on sales only)
+    - the book sold out (less than --quantity copies left)
+and reports orders/sec and checkout latency. Exits with status 1 if a check fails.
+Stock, replenishment orders and today's sales rollups are restored afterwards.
+
+Run from the backend directory against a running database:
+    python -m benchmarks.bench_hot_isbn --threads 32 --stock 2000
+"""
+import argparse
+import sys
+import threading
+import time
+
+from benchmarks.common import create_customer, drop_customer, percentile
+from database.connection import db_connection
+from models.cart import Cart
+from models.order import Order
+from models.sales_rollup import SalesRollup
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--isbn', help="book to hammer (default: the first one)")
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--stock', type=int, default=1000, help="copies available at the start")
+    parser.add_argument('--quantity', type=int, default=1, help="copies per order")
+    args = parser.parse_args()
+
+    with db_connection() as conn:
+        if not conn:
+            raise SystemExit("❌ Could not connect to the database")
+        cursor = conn.cursor()
+        if args.isbn:
+            cursor.execute("SELECT isbn, stock FROM Books WHERE isbn = %s", (args.isbn,))
+        else:
+            cursor.execute("SELECT isbn, stock FROM Books ORDER BY isbn LIMIT 1")
+        row = cursor.fetchone()
+        if not row:
+            raise SystemExit("❌ Book not found")
+        isbn, original_stock = row
+        cursor.execute("SELECT COALESCE(MAX(po_id), 0) FROM Publisher_Orders")
+        last_po_id = cursor.fetchone()[0]
+        cursor.execute("SELECT CURRENT_DATE")
+        today = cursor.fetchone()[0]
+
+        cursor.execute("UPDATE Books SET stock = %s WHERE isbn = %s", (args.stock, isbn))
+        user_ids = [create_customer(cursor) for _ in range(args.threads)]
+        conn.commit()
+
+    latencies, sold, failures = [], [0], []
+    lock = threading.Lock()
+
+    def worker(user_id):
+        while True:
+            Cart.update_quantity(user_id, isbn, args.quantity)
+            start = time.perf_counter()
+            success, message = Order.create_order(user_id, '4111111111111111', '2030-01-01')
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if success:
+                    sold[0] += args.quantity
+                elif 'Not enough stock' in message:
+                    return
+                else:
+                    failures.append(message)
+                    if len(failures) > 100:
+                        return
+
+    ok = True
+    try:
+        threads = [threading.Thread(target=worker, args=(user_id,)) for user_id in user_ids]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT stock, reserved FROM Books WHERE isbn = %s", (isbn,))
+            final_stock, reserved_column = cursor.fetchone()
+            placeholders = ", ".join(["%s"] * len(user_ids))
+            cursor.execute(f"""
+                SELECT COALESCE(SUM(oi.quantity), 0)
+                FROM Order_Items oi
+                JOIN Customer_Orders co ON oi.order_id = co.order_id
+                WHERE oi.isbn = %s AND co.user_id IN ({placeholders})
+            """, [isbn] + user_ids)
+            ordered = int(cursor.fetchone()[0])
+            cursor.execute("SELECT COALESCE(SUM(quantity), 0) FROM Stock_Reservations WHERE isbn = %s", (isbn,))
+            reserved = int(cursor.fetchone()[0])
+            cursor.execute("SELECT COUNT(*) FROM Publisher_Orders WHERE po_id > %s AND isbn = %s", (last_po_id, isbn))
+            replenishments = cursor.fetchone()[0]
+
+        orders = sold[0] // args.quantity
+        print(f"📊 {args.threads} threads on {isbn}: {orders} orders, {sold[0]} of {args.stock} copies sold")
+        print(f"Throughput: {orders / wall:,.1f} orders/s")
+        print(f"Latency ms: p50={percentile(latencies, 50) * 1000:.1f} "
+              f"p95={percentile(latencies, 95) * 1000:.1f} p99={percentile(latencies, 99) * 1000:.1f}")
+        for message in failures[:5]:
+            print(f"❌ {message}")
+
+        checks = [
+            ("no oversell", sold[0] <= args.stock and final_stock >= 0),
+            ("stock matches sales", final_stock == args.stock - sold[0] == args.stock - ordered),
+            ("no reservations left", reserved == 0 and reserved_column == 0),
+            ("one replenishment order at most", replenishments <= 1),
+            ("sold out", final_stock < args.quantity),
+        ]
+        for name, passed in checks:
+            print(f"{'✅' if passed else '❌'} {name}")
+            ok = ok and passed
+        print(f"   final stock {final_stock}, units in orders {ordered}, still reserved {reserved}")
+    finally:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            for user_id in user_ids:
+                drop_customer(cursor, user_id)
+            cursor.execute("UPDATE Books SET stock = %s WHERE isbn = %s", (original_stock, isbn))
+            # Replenishment orders the benchmark (or the stock restore) triggered
+            cursor.execute("DELETE FROM Publisher_Orders WHERE po_id > %s AND isbn = %s", (last_po_id, isbn))
+            conn.commit()
+        # The benchmark orders are gone; recount today's report rollups without them
+        SalesRollup.rebuild(since=str(today))
+
+    if not ok:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
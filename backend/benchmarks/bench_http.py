@@ -0,0 +1,289 @@
+"""
+End-to-end HTTP load test of the Flask app's real endpoints.
+
+--clients customer threads each log in as a synthetic customer (see
+benchmarks/datagen.py) and loop over a weighted mix of search, book detail,
+cart add, cart count, order history and checkout requests. --admins threads
+log in as load_admin and cycle through the admin reports. After --duration
+seconds, the script prints throughput and p50/p95/p99 latency for every
+endpoint and saves them as JSON (with the git commit). Pass --compare to diff
+against an earlier run.
+
+Without --base-url the app is served in-process on a threaded dev server.
+Point --base-url at a real deployment to measure that instead; the database
+settings must still match, because ISBNs and customers are read from it.
+
+Run from the backend directory after loading data:
+    python -m benchmarks.datagen --books 100000
+    python -m benchmarks.bench_http --clients 16 --duration 60
+    python -m benchmarks.bench_http --compare benchmarks/results/<earlier>.json
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date, datetime
+from http.cookiejar import CookieJar
+
+from benchmarks.common import percentile
+from benchmarks.datagen import ADMIN_USERNAME, ISBN_PREFIX, PASSWORD, USER_PREFIX, WORDS, isbn_for
+from database.connection import db_connection
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+# (endpoint, weight) for customer clients
+CUSTOMER_MIX = [
+    ('search', 30),
+    ('book_detail', 30),
+    ('cart_add', 12),
+    ('cart_count', 12),
+    ('order_history', 10),
+    ('checkout', 6),
+]
+
+ADMIN_REPORTS = ['report_sales_month', 'report_sales_day', 'report_top_customers',
+                 'report_top_books', 'admin_stats']
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Time each request on its own: a 302 after a POST is the answer, not a second request
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+class Client:
+    """
+    One browser-like session (own cookie jar) against the app.
+    """
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(CookieJar()), NoRedirect())
+
+    def request(self, method, path, form=None, json_body=None):
+        """
+        Returns the HTTP status; 3xx counts as an answer (form posts redirect).
+        """
+        data, headers = None, {}
+        if form is not None:
+            data = urllib.parse.urlencode(form).encode('utf-8')
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        elif json_body is not None:
+            data = json.dumps(json_body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+    def login(self, username):
+        status = self.request('POST', '/login', form={'username': username, 'password': PASSWORD})
+        if status != 302:
+            raise RuntimeError(f"Login failed for {username} (HTTP {status})")
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.latencies = {}
+            self.errors = {}
+
+    def record(self, endpoint, ms, ok):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(ms)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+def timed(recorder, endpoint, fn):
+    start = time.perf_counter()
+    try:
+        status = fn()
+        ok = status < 400
+    except Exception:
+        ok = False
+    recorder.record(endpoint, (time.perf_counter() - start) * 1000, ok)
+
+def customer_loop(client, rng, n_books, recorder, stop):
+    endpoints, weights = zip(*CUSTOMER_MIX)
+    while not stop.is_set():
+        endpoint = rng.choices(endpoints, weights)[0]
+        if endpoint == 'search':
+            query = urllib.parse.quote(' '.join(rng.sample(WORDS, rng.randint(1, 2))))
+            timed(recorder, endpoint, lambda: client.request('GET', f'/api/books/search?q={query}'))
+        elif endpoint == 'book_detail':
+            isbn = isbn_for(rng.randint(1, n_books))
+            timed(recorder, endpoint, lambda: client.request('GET', f'/api/books/{isbn}'))
+        elif endpoint == 'cart_add':
+            body = {'isbn': isbn_for(rng.randint(1, n_books)), 'quantity': 1}
+            timed(recorder, endpoint, lambda: client.request('POST', '/customer/cart/add', json_body=body))
+        elif endpoint == 'cart_count':
+            timed(recorder, endpoint, lambda: client.request('GET', '/customer/cart/count'))
+        elif endpoint == 'order_history':
+            timed(recorder, endpoint, lambda: client.request('GET', '/customer/orders'))
+        elif endpoint == 'checkout':
+            form = {'credit_card_no': '4111111111111111', 'expiry_month': '12', 'expiry_year': '2030'}
+            timed(recorder, endpoint, lambda: client.request('POST', '/customer/checkout', form=form))
+
+def admin_loop(client, rng, recorder, stop):
+    today = date.today().isoformat()
+    requests = {
+        'report_sales_month': lambda: client.request('POST', '/admin/reports/sales-month', form={}),
+        'report_sales_day': lambda: client.request('POST', '/admin/reports/sales-day', form={'date': today}),
+        'report_top_customers': lambda: client.request('POST', '/admin/reports/top-customers', form={}),
+        'report_top_books': lambda: client.request('POST', '/admin/reports/top-books', form={}),
+        'admin_stats': lambda: client.request('GET', '/admin/stats'),
+    }
+    while not stop.is_set():
+        endpoint = rng.choice(ADMIN_REPORTS)
+        timed(recorder, endpoint, requests[endpoint])
+
+def dataset():
+    with db_connection() as conn:
+        if not conn:
+            raise SystemExit("❌ Could not connect to the database")
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM Books WHERE isbn LIKE %s", (ISBN_PREFIX + '%',))
+        books = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM Users WHERE username LIKE %s",
+                       (USER_PREFIX.replace('_', r'\_') + '%',))
+        customers = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM Customer_Orders")
+        orders = cursor.fetchone()[0]
+    if not books or not customers:
+        raise SystemExit("❌ No synthetic data; run python -m benchmarks.datagen first")
+    return {'books': books, 'customers': customers, 'orders': orders}
+
+def serve_in_process():
+    from werkzeug.serving import make_server
+    from app import create_app
+    # Per-request access log lines would cost more than some of the requests
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, create_app(), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def summarize(recorder, elapsed):
+    summary = {}
+    for endpoint in sorted(recorder.latencies):
+        values = recorder.latencies[endpoint]
+        summary[endpoint] = {
+            'requests': len(values),
+            'errors': recorder.errors.get(endpoint, 0),
+            'throughput_rps': round(len(values) / elapsed, 2),
+            'mean_ms': round(sum(values) / len(values), 2),
+            'p50_ms': round(percentile(values, 50), 2),
+            'p95_ms': round(percentile(values, 95), 2),
+            'p99_ms': round(percentile(values, 99), 2),
+        }
+    return summary
+
+def print_summary(summary, baseline=None):
+    print(f"{'endpoint':<22} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+          + (f" {'p95 vs base':>12}" if baseline else ""))
+    for endpoint, s in summary.items():
+        line = (f"{endpoint:<22} {s['requests']:>9} {s['errors']:>7} {s['throughput_rps']:>9.1f} "
+                f"{s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f}")
+        base = (baseline or {}).get(endpoint)
+        if base and base['p95_ms']:
+            line += f" {(s['p95_ms'] / base['p95_ms'] - 1) * 100:>+11.1f}%"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', help='app to test (default: serve it in-process)')
+    parser.add_argument('--clients', type=int, default=16, help='concurrent customer sessions')
+    parser.add_argument('--admins', type=int, default=1, help='concurrent admin sessions')
+    parser.add_argument('--duration', type=float, default=30, help='seconds of load after warm-up')
+    parser.add_argument('--warmup', type=float, default=5, help='seconds of load before measuring')
+    parser.add_argument('--timeout', type=float, default=30, help='per-request timeout (seconds)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--out', help='result file (default: benchmarks/results/http-<time>-<commit>.json)')
+    parser.add_argument('--compare', help='earlier result file to compare p95 against')
+    args = parser.parse_args()
+
+    data = dataset()
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server, base_url = serve_in_process()
+    print(f"📊 {base_url}: {args.clients} customers + {args.admins} admins, "
+          f"{data['books']:,} synthetic books, {data['customers']:,} customers")
+
+    rng = random.Random(args.seed)
+    threads, stop = [], threading.Event()
+    recorder = Recorder()
+
+    customers = rng.sample(range(1, data['customers'] + 1), min(args.clients, data['customers']))
+    for i in customers:
+        client = Client(base_url, args.timeout)
+        client.login(f"{USER_PREFIX}{i}")
+        threads.append(threading.Thread(
+            target=customer_loop, args=(client, random.Random(rng.random()), data['books'], recorder, stop)))
+    for _ in range(args.admins):
+        client = Client(base_url, args.timeout)
+        client.login(ADMIN_USERNAME)
+        threads.append(threading.Thread(target=admin_loop, args=(client, random.Random(rng.random()), recorder, stop)))
+
+    for thread in threads:
+        thread.start()
+    time.sleep(args.warmup)
+    recorder.reset()
+    start = time.perf_counter()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if server:
+        server.shutdown()
+
+    summary = summarize(recorder, elapsed)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['endpoints']
+    print_summary(summary, baseline)
+
+    commit = git_commit()
+    result = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': commit,
+        'base_url': args.base_url or 'in-process',
+        'clients': args.clients,
+        'admins': args.admins,
+        'duration_s': round(elapsed, 2),
+        'dataset': data,
+        'endpoints': summary,
+    }
+    out = args.out
+    if not out:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = os.path.join(RESULTS_DIR, f"http-{datetime.now():%Y%m%d-%H%M%S}-{commit or 'nogit'}.json")
+    with open(out, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"💾 Saved {out}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Regression benchmark: queries per order-history page as order count grows.
+
+Creates a throwaway customer with N orders (2 items each) for every N in --sizes,
+then loads their history with the old per-order loop and with
+Order.get_order_history, counting the statements each one sends.
+The new path must stay at 2 queries per page whatever N is.
+
+Run from the backend directory against a running database:
+    python -m benchmarks.bench_order_history --sizes 10 100 500
+"""
+import argparse
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+import models.order
+from benchmarks.common import create_customer, drop_customer
+from database.connection import db_connection
+from models.order import Order
+
+class CountingCursor:
+    def __init__(self, cursor, counter):
+        self._cursor = cursor
+        self._counter = counter
+
+    def execute(self, *args, **kwargs):
+        self._counter[0] += 1
+        return self._cursor.execute(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        return getattr(self._cursor, attr)
+
+class CountingConnection:
+    def __init__(self, conn, counter):
+        self._conn = conn
+        self._counter = counter
+
+    def cursor(self, *args, **kwargs):
+        return CountingCursor(self._conn.cursor(*args, **kwargs), self._counter)
+
+    def __getattr__(self, attr):
+        return getattr(self._conn, attr)
+
+@contextmanager
+def count_queries():
+    """
+    Count statements executed by models.order while the block runs.
+    """
+    counter = [0]
+
+    @contextmanager
+    def counting_connection():
+        with db_connection() as conn:
+            yield CountingConnection(conn, counter) if conn else conn
+
+    with mock.patch.object(models.order, 'db_connection', counting_connection):
+        yield counter
+
+def legacy_history(user_id):
+    # The old /customer/orders loop: one items query per order
+    with db_connection() as conn:
+        cursor = CountingConnection(conn, legacy_history.counter).cursor(dictionary=True)
+        cursor.execute("SELECT * FROM Customer_Orders WHERE user_id = %s ORDER BY order_date DESC", (user_id,))
+        orders = cursor.fetchall()
+        for order in orders:
+            cursor.execute("""
+                SELECT B.title, B.selling_price as unit_price, OI.quantity
+                FROM Order_Items OI
+                JOIN Books B ON OI.isbn = B.isbn
+                WHERE OI.order_id = %s
+            """, (order['order_id'],))
+            order['book_list'] = cursor.fetchall()
+        return orders
+
+def create_orders(cursor, user_id, n_orders, isbns):
+    # Rows are inserted directly (no Order.create_order), so stock is left untouched
+    for _ in range(n_orders):
+        cursor.execute("""
+            INSERT INTO Customer_Orders (user_id, total_price, credit_card_no, expiry_date)
+            VALUES (%s, 20.00, '4111111111111111', '2030-01-01')
+        """, (user_id,))
+        order_id = cursor.lastrowid
+        cursor.executemany(
+            "INSERT INTO Order_Items (order_id, isbn, quantity, unit_price) VALUES (%s, %s, 1, 10.00)",
+            [(order_id, isbn) for isbn in isbns]
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--page-size', type=int, default=20)
+    args = parser.parse_args()
+
+    with db_connection() as conn:
+        if not conn:
+            raise SystemExit("❌ Could not connect to the database")
+        cursor = conn.cursor()
+        cursor.execute("SELECT isbn FROM Books ORDER BY isbn LIMIT 2")
+        isbns = [row[0] for row in cursor.fetchall()]
+
+    print(f"{'orders':>7} | {'legacy queries':>14} {'legacy ms':>10} | {'page queries':>12} {'page ms':>8} | {'full walk queries':>17}")
+    for n in args.sizes:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            user_id = create_customer(cursor)
+            create_orders(cursor, user_id, n, isbns)
+            conn.commit()
+        try:
+            legacy_history.counter = [0]
+            start = time.perf_counter()
+            legacy_history(user_id)
+            legacy_ms = (time.perf_counter() - start) * 1000
+
+            with count_queries() as page_queries:
+                start = time.perf_counter()
+                Order.get_order_history(user_id, limit=args.page_size)
+                page_ms = (time.perf_counter() - start) * 1000
+
+            # Walk every page with keyset cursors: 2 queries per page
+            with count_queries() as walk_queries:
+                after = None
+                while True:
+                    orders = Order.get_order_history(user_id, after=after, limit=args.page_size)
+                    if len(orders) < args.page_size:
+                        break
+                    after = [str(v) for v in Order.history_cursor_key(orders[-1])]
+
+            print(f"{n:>7} | {legacy_history.counter[0]:>14} {legacy_ms:>10.1f} | "
+                  f"{page_queries[0]:>12} {page_ms:>8.1f} | {walk_queries[0]:>17}")
+            if page_queries[0] != 2:
+                print(f"❌ Expected 2 queries per page, got {page_queries[0]}")
+        finally:
+            with db_connection() as conn:
+                cursor = conn.cursor()
+                drop_customer(cursor, user_id)
+                conn.commit()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark: password checks per second for each bcrypt cost factor.
+
+A burst of simulated logins (one bcrypt check each) is fired from --clients
+threads through the bounded hashing pool (utils/passwords.py). Logins that
+find the queue full are counted as rejected, like /auth/login would answer
+"server busy". No database is needed: this measures the CPU side of a login.
+
+Run from the backend directory:
+    python -m benchmarks.bench_passwords --costs 10 11 12 13 --logins 200 --clients 16
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from benchmarks.common import percentile
+from config import Config
+from utils.passwords import PasswordHasher, PasswordHasherBusy
+
+PASSWORD = 'correct horse battery staple'
+
+def run(cost, logins, clients, workers, queue_size):
+    hashed = bcrypt.hashpw(PASSWORD.encode('utf-8'), bcrypt.gensalt(rounds=cost)).decode('utf-8')
+    hasher = PasswordHasher(workers, queue_size, timeout=600)
+    check = lambda: bcrypt.checkpw(PASSWORD.encode('utf-8'), hashed.encode('utf-8'))
+
+    def login(_):
+        start = time.perf_counter()
+        try:
+            assert hasher.run(check)
+        except PasswordHasherBusy:
+            return None
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        results = list(executor.map(login, range(logins)))
+    elapsed = time.perf_counter() - start
+    hasher.shutdown()
+
+    latencies = [ms for ms in results if ms is not None]
+    rejected = logins - len(latencies)
+    print(f"{cost:>4} | {len(latencies) / elapsed:>10.1f} | {percentile(latencies, 50):>8.1f} "
+          f"{percentile(latencies, 95):>8.1f} {percentile(latencies, 99):>8.1f} | {rejected:>8}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--costs', type=int, nargs='+', default=[10, 11, 12, 13])
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--clients', type=int, default=16, help='concurrent login requests')
+    parser.add_argument('--workers', type=int, default=Config.BCRYPT_WORKERS)
+    parser.add_argument('--queue-size', type=int, default=Config.BCRYPT_QUEUE_SIZE)
+    args = parser.parse_args()
+
+    print(f"📊 {args.clients} clients, {args.workers} bcrypt workers, queue {args.queue_size} "
+          f"(configured cost: {Config.BCRYPT_ROUNDS})")
+    print(f"{'cost':>4} | {'logins/s':>10} | {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} | {'rejected':>8}")
+    for cost in args.costs:
+        run(cost, args.logins, args.clients, args.workers, args.queue_size)
+
+if __name__ == '__main__':
+    main()
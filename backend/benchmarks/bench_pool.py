@@ -0,0 +1,83 @@
+"""
+Benchmark: pooled connections vs. a fresh connection per call.
+
+Each simulated request checks out a connection, runs the book-detail query
+used by /api/books/<isbn> and gives the connection back.
+
+Run from the backend directory against a running database:
+    python -m benchmarks.bench_pool --threads 8 --requests 2000
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector
+from config import Config
+from database.connection import db_connection
+
+QUERY = """
+    SELECT b.*, p.name as publisher_name
+    FROM Books b
+    JOIN Publishers p ON b.publisher_id = p.publisher_id
+    WHERE b.isbn = %s
+"""
+
+def connect_per_call(isbn):
+    # The old get_db_connection() path: full TCP + auth handshake every time
+    conn = mysql.connector.connect(
+        host=Config.DB_HOST,
+        port=Config.DB_PORT,
+        user=Config.DB_USER,
+        password=Config.DB_PASSWORD,
+        database=Config.DB_NAME
+    )
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(QUERY, (isbn,))
+        cursor.fetchall()
+    finally:
+        conn.close()
+
+def pooled(isbn):
+    with db_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(QUERY, (isbn,))
+        cursor.fetchall()
+
+def pick_isbn():
+    with db_connection() as conn:
+        if not conn:
+            raise SystemExit("❌ Could not connect to the database")
+        cursor = conn.cursor()
+        cursor.execute("SELECT isbn FROM Books LIMIT 1")
+        row = cursor.fetchone()
+        return row[0] if row else '0000000000'
+
+def run(label, fn, isbn, threads, requests):
+    # Warm up (fills the pool, primes the server caches)
+    for _ in range(threads):
+        fn(isbn)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda _: fn(isbn), range(requests)))
+    elapsed = time.perf_counter() - start
+
+    rps = requests / elapsed
+    print(f"{label:<18} {requests} requests in {elapsed:.2f}s -> {rps:,.0f} req/s")
+    return rps
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=Config.DB_POOL_SIZE)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    isbn = pick_isbn()
+    print(f"📊 {args.threads} threads, pool size {Config.DB_POOL_SIZE}")
+    baseline = run("connect-per-call", connect_per_call, isbn, args.threads, args.requests)
+    pool = run("pooled", pooled, isbn, args.threads, args.requests)
+    print(f"Speedup: {pool / baseline:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark: text protocol vs. server-side prepared statements (database/statements.py).
+
+Runs the book-details lookup (Book.get_book_details) and the add-to-cart upsert
+(Cart.add_to_cart, on a throwaway customer) --calls times each on one pooled
+connection, first as plain cursor.execute() calls, then through the statement cache.
+Then the same lookup once per checkout of a connection, the way a request runs it: the
+prepared statement stays cached on the pooled connection from one checkout to the next.
+The statement cache counters are printed at the end (prepares should stay at a handful,
+one per statement and connection, with everything else a hit).
+
+The baseline is the text protocol of the connection in use, which should be the C
+extension's (CMySQLConnection): statements only prepares on it, without it everything
+runs as text and both columns measure the same thing.
+
+Run from the backend directory against a running database:
+    python -m benchmarks.bench_prepared --calls 5000
+"""
+import argparse
+import time
+
+from benchmarks.common import create_customer, drop_customer
+from database import statements
+from database.connection import Database, db_connection
+
+DETAILS = """
+    SELECT b.*, p.name as publisher_name, GROUP_CONCAT(a.author_name SEPARATOR ', ') as authors
+    FROM Books b
+    JOIN Publishers p ON b.publisher_id = p.publisher_id
+    JOIN Book_Authors ba ON b.isbn = ba.isbn
+    JOIN Authors a ON ba.author_id = a.author_id
+    WHERE b.isbn = %s
+    GROUP BY b.isbn
+"""
+
+ADD_TO_CART = """
+    INSERT INTO Shopping_Cart (user_id, isbn, quantity) VALUES (%s, %s, %s) AS new
+    ON DUPLICATE KEY UPDATE quantity = Shopping_Cart.quantity + new.quantity
+"""
+
+def text_details(conn, isbn):
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(DETAILS, (isbn,))
+    cursor.fetchall()
+
+def prepared_details(conn, isbn):
+    statements.fetch_all(conn, DETAILS, (isbn,), dictionary=True)
+
+def text_add(conn, user_id, isbn):
+    conn.cursor().execute(ADD_TO_CART, (user_id, isbn, 1))
+
+def prepared_add(conn, user_id, isbn):
+    statements.execute(conn, ADD_TO_CART, (user_id, isbn, 1))
+
+def checkout_details(isbn, prepared):
+    conn = Database.get_connection()
+    try:
+        if prepared:
+            prepared_details(conn, isbn)
+        else:
+            text_details(conn, isbn)
+    finally:
+        Database.release(conn)
+
+def run(label, fn, calls):
+    fn()  # prepares the statement (and warms the server caches)
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {calls} calls in {elapsed:.2f}s -> {calls / elapsed:,.0f} calls/s "
+          f"({elapsed / calls * 1e6:,.0f} µs each)")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=5000)
+    args = parser.parse_args()
+
+    with db_connection() as conn:
+        if not conn:
+            raise SystemExit("❌ Could not connect to the database")
+        cursor = conn.cursor()
+        cursor.execute("SELECT isbn FROM Book_Authors LIMIT 1")
+        row = cursor.fetchone()
+        if not row:
+            raise SystemExit("❌ No books loaded")
+        isbn = row[0]
+        user_id = create_customer(cursor)
+        conn.commit()
+
+        raw = statements.session(conn)
+        print(f"🔌 {type(raw).__name__}, prepared statements "
+              f"{'on' if statements.enabled(conn) else 'off (text protocol only)'}")
+        if not statements.enabled(conn):
+            print("⚠️  No C extension or DB_STATEMENT_CACHE_SIZE=0: both paths below run as text")
+
+        try:
+            print(f"📊 {args.calls} calls per statement on one connection")
+            text = run("details (text)", lambda: text_details(conn, isbn), args.calls)
+            prepared = run("details (prepared)", lambda: prepared_details(conn, isbn), args.calls)
+            print(f"Speedup: {text / prepared:.2f}x")
+            text = run("add to cart (text)", lambda: text_add(conn, user_id, isbn), args.calls)
+            prepared = run("add to cart (prepared)", lambda: prepared_add(conn, user_id, isbn), args.calls)
+            print(f"Speedup: {text / prepared:.2f}x")
+            conn.rollback()
+        finally:
+            drop_customer(cursor, user_id)
+            conn.commit()
+
+    print(f"📊 {args.calls} requests, one lookup per connection checkout")
+    text = run("checkout (text)", lambda: checkout_details(isbn, False), args.calls)
+    prepared = run("checkout (statements)", lambda: checkout_details(isbn, True), args.calls)
+    print(f"Speedup: {text / prepared:.2f}x")
+    print(f"🧮 Statement cache: {statements.stats()}")
+
+if __name__ == '__main__':
+    main()
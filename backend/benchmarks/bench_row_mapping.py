@@ -0,0 +1,117 @@
+"""
+Benchmark: dict rows (cursor(dictionary=True)) vs. compact Results (database/records.py).
+
+Fetches the search listing query (the shape Book.search_books returns) for --rows
+books both ways and reports, per mode:
+    fetch     time to run the query and build the rows (median of --repeat runs)
+    read      time to read three columns from every row, as a template would
+    memory    bytes still held by the result once fetched (tracemalloc)
+    gc        time spent in garbage collection during the fetch, and one full
+              collection with the result still alive
+
+Load a catalog big enough first (python -m benchmarks.datagen --books 100000).
+
+Run from the backend directory against a running database:
+    python -m benchmarks.bench_row_mapping --rows 100000
+"""
+import argparse
+import gc
+import statistics
+import time
+import tracemalloc
+
+from database import records
+from database.connection import db_connection
+
+QUERY = """
+    SELECT b.*, s.publisher_name, s.authors, CAST(0 AS DECIMAL(20, 6)) AS relevance
+    FROM Book_Search s
+    JOIN Books b ON b.isbn = s.isbn
+    ORDER BY s.isbn
+    LIMIT %s
+"""
+
+def fetch_dicts(conn, rows):
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(QUERY, (rows,))
+    return cursor.fetchall()
+
+def fetch_records(conn, rows):
+    cursor = conn.cursor()
+    cursor.execute(QUERY, (rows,))
+    return records.fetch_all(cursor)
+
+def read_all(result):
+    total = 0
+    for row in result:
+        total += len(row['isbn']) + len(row['title']) + row['stock']
+    return total
+
+class GCTimer:
+    def __init__(self):
+        self.seconds = 0.0
+        self._start = 0.0
+
+    def __call__(self, phase, info):
+        if phase == 'start':
+            self._start = time.perf_counter()
+        else:
+            self.seconds += time.perf_counter() - self._start
+
+def run(label, fetch, rows, repeat):
+    with db_connection() as conn:
+        if not conn:
+            raise SystemExit("❌ Could not connect to the database")
+        fetch(conn, rows)  # warm up: server caches, record types
+
+        fetch_times, read_times, gc_times = [], [], []
+        for _ in range(repeat):
+            gc.collect()
+            timer = GCTimer()
+            gc.callbacks.append(timer)
+            try:
+                start = time.perf_counter()
+                result = fetch(conn, rows)
+                fetch_times.append(time.perf_counter() - start)
+            finally:
+                gc.callbacks.remove(timer)
+            gc_times.append(timer.seconds)
+
+            start = time.perf_counter()
+            read_all(result)
+            read_times.append(time.perf_counter() - start)
+            del result
+
+        gc.collect()
+        tracemalloc.start()
+        result = fetch(conn, rows)
+        held = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        start = time.perf_counter()
+        gc.collect()
+        full_gc = time.perf_counter() - start
+        count = len(result)
+        del result
+
+    fetch_ms = statistics.median(fetch_times) * 1000
+    read_ms = statistics.median(read_times) * 1000
+    gc_ms = statistics.median(gc_times) * 1000
+    print(f"{label:<8} {count:,} rows  fetch {fetch_ms:8.1f}ms  read {read_ms:7.1f}ms  "
+          f"memory {held / 1024 / 1024:7.1f}MB ({held / max(count, 1):,.0f} B/row)  "
+          f"gc {gc_ms:6.1f}ms + full collection {full_gc * 1000:6.1f}ms")
+    return fetch_ms, held
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"📊 Search listing, up to {args.rows:,} rows, median of {args.repeat} runs")
+    dict_ms, dict_bytes = run("dicts", fetch_dicts, args.rows, args.repeat)
+    record_ms, record_bytes = run("records", fetch_records, args.rows, args.repeat)
+    print(f"Records: {dict_ms / record_ms:.1f}x faster to fetch, "
+          f"{dict_bytes / max(record_bytes, 1):.1f}x less memory")
+
+if __name__ == '__main__':
+    main()
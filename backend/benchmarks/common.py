@@ -0,0 +1,39 @@
+"""
+Helpers shared by the benchmark scripts.
+"""
+import math
+import uuid
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of a list of numbers (pct in 0-100).
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+def create_customer(cursor):
+    """
+    Insert a throwaway customer and return its user_id.
+    """
+    tag = uuid.uuid4().hex[:10]
+    cursor.execute("""
+        INSERT INTO Users (username, password, first_name, last_name, email, role)
+        VALUES (%s, 'x', 'Bench', 'Customer', %s, 'customer')
+    """, (f"bench_{tag}", f"bench_{tag}@example.com"))
+    return cursor.lastrowid
+
+def drop_customer(cursor, user_id):
+    """
+    Delete a throwaway customer with its cart and orders.
+    """
+    cursor.execute("""
+        DELETE oi FROM Order_Items oi
+        JOIN Customer_Orders co ON oi.order_id = co.order_id
+        WHERE co.user_id = %s
+    """, (user_id,))
+    cursor.execute("DELETE FROM Customer_Orders WHERE user_id = %s", (user_id,))
+    cursor.execute("DELETE FROM Shopping_Cart WHERE user_id = %s", (user_id,))
+    cursor.execute("DELETE FROM Users WHERE user_id = %s", (user_id,))
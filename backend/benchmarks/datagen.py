@@ -0,0 +1,255 @@
+"""
+Synthetic data for load tests: catalog, customers and order history at any scale.
+
+--books sets the scale; everything else is derived from it unless given:
+publishers = books/1000, authors = books/5, customers = books/10, orders = books.
+Rows are bulk-loaded with multi-row INSERTs in batches of --batch-size, with
+explicit ids so nothing has to be read back. Afterwards the search index and
+the sales rollups are rebuilt.
+
+Synthetic rows are easy to find (and --drop removes them again):
+    ISBNs        9799000000001, 9799000000002, ...
+    customers    load_user_1 ... (password: LoadTest#2024), admin load_admin
+    publishers   'Synthetic Press N', authors 'Synthetic Author N'
+
+Run from the backend directory against a running database:
+    python -m benchmarks.datagen --books 100000
+    python -m benchmarks.datagen --drop
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from config import Config
+from database.connection import Database, db_connection
+from models.search import BookSearch
+from models.sales_rollup import SalesRollup
+from utils.passwords import hash_password
+
+ISBN_PREFIX = '9799'
+USER_PREFIX = 'load_user_'
+ADMIN_USERNAME = 'load_admin'
+PASSWORD = 'LoadTest#2024'
+CATEGORIES = ['Science', 'Art', 'Religion', 'History', 'Geography']
+
+# Title vocabulary; load tests search for these words
+WORDS = [
+    'ancient', 'atlas', 'beyond', 'blue', 'border', 'bridge', 'city', 'coast', 'code', 'cosmos',
+    'crown', 'dark', 'dawn', 'desert', 'dream', 'earth', 'echo', 'empire', 'field', 'fire',
+    'forest', 'garden', 'glass', 'gold', 'harbor', 'history', 'house', 'island', 'journey', 'king',
+    'light', 'line', 'lost', 'machine', 'map', 'memory', 'mind', 'moon', 'mountain', 'night',
+    'north', 'ocean', 'order', 'paper', 'path', 'queen', 'quiet', 'river', 'road', 'saint',
+    'science', 'sea', 'secret', 'shadow', 'silver', 'sky', 'song', 'star', 'stone', 'storm',
+    'story', 'sun', 'temple', 'theory', 'time', 'tower', 'valley', 'voice', 'war', 'water',
+    'wave', 'west', 'wild', 'wind', 'winter', 'wonder', 'world', 'year', 'youth', 'zero',
+]
+
+def isbn_for(i):
+    return f"{ISBN_PREFIX}{i:09d}"
+
+def price_for(i):
+    # Deterministic, so order lines can be priced without reading books back
+    return round(5 + (i * 7919 % 9500) / 100, 2)
+
+def scale(args):
+    books = args.books
+    return {
+        'books': books,
+        'publishers': args.publishers or max(10, books // 1000),
+        'authors': args.authors or max(50, books // 5),
+        'customers': args.customers or max(100, books // 10),
+        'orders': args.orders if args.orders is not None else books,
+    }
+
+def chunks(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def bulk_insert(conn, sql, rows, batch_size, label):
+    """
+    executemany() one batch at a time (the connector turns each batch into one
+    multi-row INSERT) and commit per batch. Returns the number of rows.
+    """
+    cursor = conn.cursor()
+    total = 0
+    start = time.perf_counter()
+    for batch in chunks(rows, batch_size):
+        cursor.executemany(sql, batch)
+        conn.commit()
+        total += len(batch)
+    elapsed = time.perf_counter() - start
+    print(f"   {label:<14} {total:>12,} rows in {elapsed:7.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+    return total
+
+def next_id(cursor, table, column):
+    cursor.execute(f"SELECT COALESCE(MAX({column}), 0) + 1 FROM {table}")
+    return cursor.fetchone()[0]
+
+def generate(counts, batch_size, seed):
+    rng = random.Random(seed)
+    password_hash = hash_password(PASSWORD)
+    now = datetime.now()
+
+    with db_connection() as conn:
+        if not conn:
+            raise SystemExit("❌ Could not connect to the database")
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM Books WHERE isbn LIKE %s", (ISBN_PREFIX + '%',))
+        if cursor.fetchone()[0]:
+            raise SystemExit("❌ Synthetic data already loaded; run with --drop first")
+
+        # Generated data is consistent by construction; skip per-row checks while loading
+        Database.set_session(conn, foreign_key_checks=0, unique_checks=0)
+
+        first_publisher = next_id(cursor, 'Publishers', 'publisher_id')
+        first_author = next_id(cursor, 'Authors', 'author_id')
+        first_user = next_id(cursor, 'Users', 'user_id')
+        first_order = next_id(cursor, 'Customer_Orders', 'order_id')
+        n_pub, n_auth, n_books = counts['publishers'], counts['authors'], counts['books']
+        n_users, n_orders = counts['customers'], counts['orders']
+
+        print(f"📦 Loading {n_books:,} books, {n_users:,} customers, {n_orders:,} orders")
+
+        bulk_insert(conn, """
+            INSERT INTO Publishers (publisher_id, name, address, phone_number) VALUES (%s, %s, %s, %s)
+        """, ((first_publisher + i, f"Synthetic Press {i + 1}", f"{i + 1} Load Test Street", '+1-555-0100')
+              for i in range(n_pub)), batch_size, 'Publishers')
+
+        bulk_insert(conn, "INSERT INTO Authors (author_id, author_name) VALUES (%s, %s)",
+                    ((first_author + i, f"Synthetic Author {i + 1}") for i in range(n_auth)),
+                    batch_size, 'Authors')
+
+        def books():
+            for i in range(1, n_books + 1):
+                title = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 5))).title()
+                # Plenty of stock, so load-test checkouts never hit Prevent_Negative_Stock
+                yield (isbn_for(i), title, first_publisher + rng.randrange(n_pub), rng.randint(1950, 2024),
+                       price_for(i), rng.choice(CATEGORIES), 1000000, 10)
+
+        bulk_insert(conn, """
+            INSERT INTO Books (isbn, title, publisher_id, pub_year, selling_price, category, stock, threshold)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """, books(), batch_size, 'Books')
+
+        def book_authors():
+            for i in range(1, n_books + 1):
+                for author in set(rng.randrange(n_auth) for _ in range(rng.randint(1, 2))):
+                    yield (isbn_for(i), first_author + author)
+
+        bulk_insert(conn, "INSERT INTO Book_Authors (isbn, author_id) VALUES (%s, %s)",
+                    book_authors(), batch_size, 'Book_Authors')
+
+        def users():
+            yield (first_user, ADMIN_USERNAME, password_hash, 'Load', 'Admin',
+                   f"{ADMIN_USERNAME}@example.com", None, None, 'admin')
+            for i in range(1, n_users + 1):
+                yield (first_user + i, f"{USER_PREFIX}{i}", password_hash, 'Load', f"User{i}",
+                       f"{USER_PREFIX}{i}@example.com", '+15550100000', f"{i} Load Test Street", 'customer')
+
+        bulk_insert(conn, """
+            INSERT INTO Users (user_id, username, password, first_name, last_name, email,
+                               phone_number, shipping_address, role)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, users(), batch_size, 'Users')
+
+        # Headers and lines come from the same random draws, so build both per batch
+        order_sql = """
+            INSERT INTO Customer_Orders (order_id, user_id, order_date, total_price, credit_card_no, expiry_date, status)
+            VALUES (%s, %s, %s, %s, '4111111111111111', '2030-12-01', 'Pending')
+        """
+        item_sql = "INSERT INTO Order_Items (order_id, isbn, quantity, unit_price) VALUES (%s, %s, %s, %s)"
+        start = time.perf_counter()
+        n_items = 0
+        for batch in chunks(range(n_orders), batch_size):
+            headers, items = [], []
+            for i in batch:
+                order_id = first_order + i
+                total = 0
+                for book in set(rng.randint(1, n_books) for _ in range(rng.randint(1, 4))):
+                    quantity = rng.randint(1, 3)
+                    items.append((order_id, isbn_for(book), quantity, price_for(book)))
+                    total += quantity * price_for(book)
+                order_date = now - timedelta(seconds=rng.randrange(365 * 24 * 3600))
+                headers.append((order_id, first_user + rng.randint(1, n_users), order_date, round(total, 2)))
+            cursor.executemany(order_sql, headers)
+            for item_batch in chunks(items, batch_size):
+                cursor.executemany(item_sql, item_batch)
+            conn.commit()
+            n_items += len(items)
+        elapsed = time.perf_counter() - start
+        print(f"   {'Orders':<14} {n_orders:>12,} rows in {elapsed:7.1f}s ({n_items:,} order items)")
+
+    start = time.perf_counter()
+    documents = BookSearch.rebuild()
+    print(f"   {'Book_Search':<14} {documents:>12,} docs in {time.perf_counter() - start:7.1f}s")
+    start = time.perf_counter()
+    SalesRollup.rebuild()
+    print(f"   {'Sales rollups':<14} {'rebuilt':>12} in {time.perf_counter() - start:7.1f}s")
+
+def delete_in_batches(conn, sql, params, batch_size, label):
+    # Bounded transactions: no huge undo log or long lock waits on big datasets
+    cursor = conn.cursor()
+    total = 0
+    while True:
+        cursor.execute(sql + " LIMIT %s", params + (batch_size,))
+        conn.commit()
+        total += cursor.rowcount
+        if cursor.rowcount < batch_size:
+            break
+    print(f"   {label:<16} {total:>12,} rows deleted")
+
+def drop(batch_size):
+    isbn_like = (ISBN_PREFIX + '%',)
+    users_like = (USER_PREFIX.replace('_', r'\_') + '%', ADMIN_USERNAME)
+    synthetic_users = "SELECT user_id FROM Users WHERE username LIKE %s OR username = %s"
+
+    with db_connection() as conn:
+        if not conn:
+            raise SystemExit("❌ Could not connect to the database")
+        print("🧹 Removing synthetic data")
+        steps = [
+            ('Shopping_Cart', f"DELETE FROM Shopping_Cart WHERE user_id IN ({synthetic_users})", users_like),
+            ('Shopping_Cart', "DELETE FROM Shopping_Cart WHERE isbn LIKE %s", isbn_like),
+            ('Order_Items', "DELETE FROM Order_Items WHERE isbn LIKE %s", isbn_like),
+            ('Customer_Orders', f"DELETE FROM Customer_Orders WHERE user_id IN ({synthetic_users})", users_like),
+            ('Publisher_Orders', "DELETE FROM Publisher_Orders WHERE isbn LIKE %s", isbn_like),
+            ('Book_Authors', "DELETE FROM Book_Authors WHERE isbn LIKE %s", isbn_like),
+            ('Books', "DELETE FROM Books WHERE isbn LIKE %s", isbn_like),
+            ('Authors', "DELETE FROM Authors WHERE author_name LIKE %s", ('Synthetic Author %',)),
+            ('Publishers', "DELETE FROM Publishers WHERE name LIKE %s", ('Synthetic Press %',)),
+            ('Users', "DELETE FROM Users WHERE username LIKE %s OR username = %s", users_like),
+        ]
+        for label, sql, params in steps:
+            delete_in_batches(conn, sql, params, batch_size, label)
+
+    SalesRollup.rebuild()
+    print("   Sales rollups rebuilt")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--books', type=int, default=10000, help='scale factor (10k to 10M)')
+    parser.add_argument('--publishers', type=int)
+    parser.add_argument('--authors', type=int)
+    parser.add_argument('--customers', type=int)
+    parser.add_argument('--orders', type=int)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--drop', action='store_true', help='remove all synthetic rows instead')
+    args = parser.parse_args()
+
+    print(f"🗄️  {Config.DB_USER}@{Config.DB_HOST}:{Config.DB_PORT}/{Config.DB_NAME}")
+    if args.drop:
+        drop(args.batch_size)
+    else:
+        generate(scale(args), args.batch_size, args.seed)
+    print("✅ Done")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+import sys
+import click
+from flask.cli import AppGroup
+from database.migrate import Migrations
+from database.plan_check import PlanCheck
+from models.book_import import BookImport
+from models.cart import Cart
+from models.export import Export, DATASETS, FORMATS
+from models.search import BookSearch
+from models.sales_rollup import SalesRollup
+from models.stock_reservation import StockReservation
+
+def register_commands(app):
+    """
+    Maintenance commands, run from the backend directory:
+        flask --app app <command>
+    """
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index():
+        """Rebuild the Book_Search documents for the whole catalog."""
+        count = BookSearch.rebuild()
+        click.echo(f"✅ Search index rebuilt: {count} books")
+
+    @app.cli.command('rebuild-sales-rollups')
+    @click.option('--since', default=None, help="Only rebuild days from this date (YYYY-MM-DD) on.")
+    def rebuild_sales_rollups(since):
+        """Backfill/rebuild the daily sales rollups behind the admin reports."""
+        days = SalesRollup.rebuild(since)
+        click.echo(f"✅ Sales rollups rebuilt: {days} days")
+
+    @app.cli.command('rebuild-cart-summaries')
+    def rebuild_cart_summaries():
+        """Recompute the per-user cart counts/subtotals (Cart_Summary)."""
+        count = Cart.rebuild_summaries()
+        click.echo(f"✅ Cart summaries rebuilt: {count} carts")
+
+    @app.cli.command('release-expired-reservations')
+    def release_expired_reservations():
+        """Give back the stock of checkout reservations that were never completed."""
+        count = StockReservation.release_expired()
+        click.echo(f"✅ Released {count} expired reservation lines")
+
+    @app.cli.command('import-books')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), default=None,
+                  help="File format (default: from the file extension).")
+    @click.option('--batch-size', type=int, default=None, help="Rows per transaction.")
+    @click.option('--max-errors', type=int, default=50, help="How many skipped rows to print.")
+    def import_books(path, fmt, batch_size, max_errors):
+        """Bulk-import books and authors from a CSV or JSONL file."""
+        with open(path, encoding='utf-8-sig', newline='') as stream:
+            result = BookImport.run(stream, fmt or BookImport.detect_format(path), batch_size)
+
+        rate = result['imported'] / result['seconds'] if result['seconds'] else 0
+        click.echo(f"✅ Imported {result['imported']} of {result['rows']} rows "
+                   f"in {result['seconds']}s ({rate:,.0f} rows/s)")
+        if result['errors']:
+            click.echo(f"⚠️  {len(result['errors'])} rows skipped:")
+            for error in result['errors'][:max_errors]:
+                click.echo(f"   line {error['line']} ({error['isbn']}): {error['error']}")
+
+    @app.cli.command('export')
+    @click.argument('dataset', type=click.Choice(sorted(DATASETS)))
+    @click.option('--from', 'start', default=None, help="First day (YYYY-MM-DD).")
+    @click.option('--to', 'end', default=None, help="Last day, inclusive (YYYY-MM-DD).")
+    @click.option('--format', 'fmt', type=click.Choice(sorted(FORMATS)), default='csv')
+    @click.option('--gzip', 'compress', is_flag=True, help="gzip the output.")
+    @click.option('--output', '-o', type=click.Path(dir_okay=False), default=None,
+                  help="File to write (default: stdout).")
+    def export(dataset, start, end, fmt, compress, output):
+        """Stream a finance export (orders, order lines, sales rollups) to a file."""
+        try:
+            start, end = Export.parse_range(start, end)
+        except ValueError as e:
+            raise click.BadParameter(str(e))
+        try:
+            chunks = Export.stream(dataset, fmt, start, end, compress)
+        except Exception as e:
+            click.echo(f"❌ Export failed: {e}", err=True)
+            sys.exit(1)
+
+        out = open(output, 'wb') if output else click.get_binary_stream('stdout')
+        written = 0
+        try:
+            for chunk in chunks:
+                out.write(chunk)
+                written += len(chunk)
+        finally:
+            if output:
+                out.close()
+        if output:
+            click.echo(f"✅ Wrote {written:,} bytes to {output}")
+
+    migrate = AppGroup('migrate', help="Versioned schema migrations (database/migrations/).")
+
+    @migrate.command('status')
+    def migrate_status():
+        """List every migration and whether it has been applied."""
+        migrations = Migrations.status()
+        if migrations is None:
+            click.echo("❌ Database connection error")
+            sys.exit(1)
+        for migration in migrations:
+            applied = migration['applied_at']
+            state = f"✅ applied {applied:%Y-%m-%d %H:%M}" if applied else "⏳ pending"
+            click.echo(f"{migration['version']:04d} {migration['name']:<30} {state}  {migration['description']}")
+
+    @migrate.command('up')
+    @click.option('--to', 'target', type=int, default=None, help="Stop after this version.")
+    def migrate_up(target):
+        """Apply the pending migrations in order."""
+        applied = Migrations.up(target, echo=click.echo)
+        if applied is None:
+            click.echo("❌ Database connection error")
+            sys.exit(1)
+        click.echo(f"✅ Applied {len(applied)} migrations" if applied else "✅ Schema is up to date")
+
+    app.cli.add_command(migrate)
+
+    @app.cli.command('check-query-plans')
+    @click.option('--strict', is_flag=True, help="Also fail when the optimizer scans a table it has an index for.")
+    def check_query_plans(strict):
+        """EXPLAIN the model queries; exit 1 if one needs a full table scan."""
+        failures = PlanCheck.run(strict, echo=click.echo)
+        if failures is None:
+            click.echo("❌ Database connection error")
+            sys.exit(1)
+        if failures:
+            click.echo(f"❌ {failures} query plans failed the check")
+            sys.exit(1)
+        click.echo("✅ No full table scans")
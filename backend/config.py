@@ -6,6 +6,102 @@ load_dotenv()
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev_secret_key')
     DB_HOST = os.getenv('DB_HOST', 'localhost')
+    DB_PORT = int(os.getenv('DB_PORT', 3306))
     DB_USER = os.getenv('DB_USER', 'root')
     DB_PASSWORD = os.getenv('DB_PASSWORD', 'mysecretpassword')
     DB_NAME = os.getenv('DB_NAME', 'OnlineBookstore')
+
+    # Connection pool (mysql-connector caps pool_size at 32)
+    DB_POOL_NAME = os.getenv('DB_POOL_NAME', 'bookstore_pool')
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 5))       # seconds to wait for a free connection
+    DB_CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', 10))  # seconds for the TCP/auth handshake
+
+    # Server-side prepared statements (database/statements.py), cached per pooled connection
+    # (C extension only). The server holds at most max_prepared_stmt_count (default 16382)
+    # across all sessions: keep SERVE_WORKERS * pool sizes * this below it. 0: plain queries only.
+    DB_STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE', 64))
+
+    # Read replicas (database/replicas.py): comma-separated host[:port], same user/password/database.
+    # Empty: everything runs on DB_HOST.
+    DB_REPLICAS = os.getenv('DB_REPLICAS', '')
+    DB_REPLICA_POOL_SIZE = int(os.getenv('DB_REPLICA_POOL_SIZE', DB_POOL_SIZE))          # per replica, per worker
+    DB_REPLICA_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_CHECK_INTERVAL', 5))         # seconds between lag checks
+    DB_REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', 5))                       # seconds behind before ejection (0: no limit)
+    DB_REPLICA_EJECT_SECONDS = float(os.getenv('DB_REPLICA_EJECT_SECONDS', 30))          # an ejected replica is retried after this
+    DB_STICKY_SECONDS = float(os.getenv('DB_STICKY_SECONDS', 5))                         # reads stay on the primary after a user's write
+
+    # Production server (serve.py): worker processes x request threads each.
+    # Every worker has its own pool, so the database sees up to SERVE_WORKERS * DB_POOL_SIZE connections.
+    SERVE_BIND = os.getenv('SERVE_BIND', '0.0.0.0:5000')
+    SERVE_WORKERS = int(os.getenv('SERVE_WORKERS', os.cpu_count() or 1))
+    SERVE_THREADS = int(os.getenv('SERVE_THREADS', 8))                  # keep <= DB_POOL_SIZE
+    SERVE_TIMEOUT = int(os.getenv('SERVE_TIMEOUT', 30))                 # seconds before a stuck worker is restarted
+    SERVE_GRACEFUL_TIMEOUT = int(os.getenv('SERVE_GRACEFUL_TIMEOUT', 30))  # seconds to finish requests on shutdown
+    SERVE_MAX_REQUESTS = int(os.getenv('SERVE_MAX_REQUESTS', 0))        # recycle a worker after this many (0: never)
+
+    # Catalog listing / search pagination
+    PAGE_SIZE = int(os.getenv('PAGE_SIZE', 20))
+    MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 100))
+
+    # In-process book detail cache (see utils/cache.py)
+    BOOK_CACHE_SIZE = int(os.getenv('BOOK_CACHE_SIZE', 10000))  # max entries
+    BOOK_CACHE_TTL = float(os.getenv('BOOK_CACHE_TTL', 300))    # seconds
+
+    # Public catalog API responses (utils/http_cache.py): ETag/304, Cache-Control, gzip
+    API_CACHE_SIZE = int(os.getenv('API_CACHE_SIZE', 2000))                  # responses kept per endpoint
+    API_CACHE_TTL = float(os.getenv('API_CACHE_TTL', 60))                    # seconds
+    API_MAX_AGE = int(os.getenv('API_MAX_AGE', 30))                          # Cache-Control max-age for clients/proxies
+    API_COMPRESS_MIN_BYTES = int(os.getenv('API_COMPRESS_MIN_BYTES', 1024))  # gzip bodies at least this big
+
+    # Admin dashboard counters are recomputed at most this often (seconds), or sooner after
+    # a write that changes them (orders don't: the monthly sales total can be this old)
+    STATS_TTL = float(os.getenv('STATS_TTL', 30))
+
+    # Background admin report jobs (models/report_jobs.py), kept in the Report_Jobs table
+    REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', 2))                   # threads per worker process
+    REPORT_QUEUE_SIZE = int(os.getenv('REPORT_QUEUE_SIZE', 20))            # distinct reports queued/running at once (all workers)
+    REPORT_CACHE_TTL = float(os.getenv('REPORT_CACHE_TTL', 60))            # seconds a finished result is reused
+    REPORT_JOB_RETENTION = float(os.getenv('REPORT_JOB_RETENTION', 600))   # seconds a finished job can be polled (an unfinished one is given up)
+    REPORT_WAIT_TIMEOUT = float(os.getenv('REPORT_WAIT_TIMEOUT', 30))      # form (no-JS) submits wait this long
+    REPORT_PRUNE_INTERVAL = float(os.getenv('REPORT_PRUNE_INTERVAL', 60))  # seconds between clean-ups of old/abandoned jobs (per worker)
+
+    # Bestseller / top-customer / trending leaderboards (models/leaderboards.py)
+    LEADERBOARD_WINDOW_DAYS = int(os.getenv('LEADERBOARD_WINDOW_DAYS', 90))    # admin reports ("last 3 months")
+    TRENDING_WINDOW_DAYS = int(os.getenv('TRENDING_WINDOW_DAYS', 7))           # storefront "trending now"
+    TOP_BOOKS_LIMIT = int(os.getenv('TOP_BOOKS_LIMIT', 10))
+    TOP_CUSTOMERS_LIMIT = int(os.getenv('TOP_CUSTOMERS_LIMIT', 5))
+    TRENDING_LIMIT = int(os.getenv('TRENDING_LIMIT', 6))
+    LEADERBOARD_CAPACITY = int(os.getenv('LEADERBOARD_CAPACITY', 100))         # ranked keys kept per board (max N)
+    LEADERBOARD_RESYNC_INTERVAL = float(os.getenv('LEADERBOARD_RESYNC_INTERVAL', 300))  # seconds between reloads from the rollups
+
+    # Password hashing (see utils/passwords.py)
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))          # cost factor for new hashes
+    BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', os.cpu_count() or 2))
+    BCRYPT_QUEUE_SIZE = int(os.getenv('BCRYPT_QUEUE_SIZE', 32))  # waiting jobs before rejecting
+    BCRYPT_TIMEOUT = float(os.getenv('BCRYPT_TIMEOUT', 10))      # seconds
+
+    # Bulk catalog import (models/book_import.py): rows per transaction
+    IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 5000))
+
+    # Streaming CSV/JSONL exports (models/export.py)
+    EXPORT_FETCH_SIZE = int(os.getenv('EXPORT_FETCH_SIZE', 1000))                    # rows read from the server at a time
+    EXPORT_CHUNK_BYTES = int(os.getenv('EXPORT_CHUNK_BYTES', 64 * 1024))             # response chunk size
+    EXPORT_MAX_CONCURRENT = int(os.getenv('EXPORT_MAX_CONCURRENT', 2))               # per worker
+    EXPORT_NET_WRITE_TIMEOUT = int(os.getenv('EXPORT_NET_WRITE_TIMEOUT', 600))       # seconds MySQL waits for a slow download
+
+    # Checkout stock reservations (models/stock_reservation.py)
+    RESERVATION_TTL = int(os.getenv('RESERVATION_TTL', 60))                           # seconds before unsold stock goes back
+    RESERVATION_SWEEP_INTERVAL = float(os.getenv('RESERVATION_SWEEP_INTERVAL', 30))  # seconds between expiry sweeps
+
+    # Author name -> id cache (models/author.py)
+    AUTHOR_CACHE_SIZE = int(os.getenv('AUTHOR_CACHE_SIZE', 50000))
+    AUTHOR_CACHE_TTL = float(os.getenv('AUTHOR_CACHE_TTL', 3600))
+
+    # SQL tracing (database/trace.py); off by default, near-zero cost when off
+    SQL_TRACE = os.getenv('SQL_TRACE', 'false').lower() in ('1', 'true', 'yes')
+    SQL_TRACE_MAX_STATEMENTS = int(os.getenv('SQL_TRACE_MAX_STATEMENTS', 500))  # distinct statements kept
+    SQL_TRACE_RECENT = int(os.getenv('SQL_TRACE_RECENT', 50))                   # requests kept for /admin/sql-stats
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+    SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG', 'slow_queries.log')           # empty: log to stderr
+    SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv('SLOW_QUERY_EXPLAIN_INTERVAL', 60))  # seconds between EXPLAINs of one statement
@@ -0,0 +1,5 @@
+# Unit tests, no database needed:
+#     cd backend
+#     python -m pytest
+# test_api.py is the manual check of the Docker database connection, not part of the suite.
+collect_ignore = ['test_api.py']
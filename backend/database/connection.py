@@ -1,47 +1,167 @@
+import time
+import threading
+from contextlib import contextmanager
+
 import mysql.connector
 from mysql.connector import pooling
 from config import Config
+from database import trace, statements
+from database.replicas import replicas, primary_required
+from utils.forking import after_fork
 
 class Database:
     _connection_pool = None
+    _pool_lock = threading.Lock()
 
     @staticmethod
     def get_pool():
         if Database._connection_pool is None:
+            with Database._pool_lock:
+                if Database._connection_pool is None:
+                    try:
+                        Database._connection_pool = pooling.MySQLConnectionPool(
+                            pool_name=Config.DB_POOL_NAME,
+                            pool_size=Config.DB_POOL_SIZE,
+                            # No COM_RESET_CONNECTION: it would drop the prepared statements
+                            # (database/statements.py). release() clears the session instead.
+                            pool_reset_session=False,
+                            host=Config.DB_HOST,
+                            port=Config.DB_PORT,
+                            user=Config.DB_USER,
+                            password=Config.DB_PASSWORD,
+                            database=Config.DB_NAME,
+                            connection_timeout=Config.DB_CONNECT_TIMEOUT
+                        )
+                    except mysql.connector.Error as err:
+                        print(f"❌ Error initializing connection pool: {err}")
+                        return None
+        return Database._connection_pool
+
+    @staticmethod
+    def close_pool():
+        """
+        Close the idle pooled connections (worker shutdown). Connections still checked
+        out are closed when they are released.
+        """
+        replicas.close()
+        with Database._pool_lock:
+            pool, Database._connection_pool = Database._connection_pool, None
+        if pool is not None:
             try:
-                Database._connection_pool = mysql.connector.pooling.MySQLConnectionPool(
-                    pool_name="mypool",
-                    pool_size=5,
-                    host=Config.DB_HOST,
-                    user=Config.DB_USER,
-                    password=Config.DB_PASSWORD,
-                    database=Config.DB_NAME
-                )
+                pool._remove_connections()
             except mysql.connector.Error as err:
-                print(f"Error initializing connection pool: {err}")
-                return None
-        return Database._connection_pool
+                print(f"❌ Error closing connection pool: {err}")
 
     @staticmethod
     def get_connection():
+        """
+        Check out a pooled connection.
+        The pool pings the connection on checkout and reconnects it if it went stale.
+        If every connection is busy, wait up to Config.DB_POOL_TIMEOUT seconds for one
+        to be released before giving up.
+        """
         pool = Database.get_pool()
-        if pool:
+        if pool is None:
+            return None
+
+        deadline = time.monotonic() + Config.DB_POOL_TIMEOUT
+        while True:
             try:
                 return pool.get_connection()
+            except mysql.connector.errors.PoolError as err:
+                # Pool exhausted, retry until the deadline
+                if time.monotonic() >= deadline:
+                    print(f"❌ Error getting connection from pool: {err}")
+                    return None
+                time.sleep(0.005)
             except mysql.connector.Error as err:
-                print(f"Error getting connection from pool: {err}")
+                print(f"❌ Error getting connection from pool: {err}")
                 return None
-        return None
 
-def get_db_connection():
+    @staticmethod
+    def set_session(conn, **settings):
+        """
+        SET SESSION name = value for the rest of this checkout; release() sets them back
+        to DEFAULT. The pools don't reset sessions, so change session state only this way
+        (no user variables or temporary tables).
+            Database.set_session(conn, net_write_timeout=600)
+        """
+        raw = statements.session(conn)
+        raw.session_settings = getattr(raw, 'session_settings', None) or set()
+        raw.session_settings.update(settings)
+        assignments = ", ".join(f"{name} = %s" for name in settings)
+        conn.cursor().execute(f"SET SESSION {assignments}", tuple(settings.values()))
+
+    @staticmethod
+    def release(conn):
+        """
+        Hand a connection back to the pool.
+        Pending results are drained and open transactions rolled back first, and settings
+        changed with set_session() put back to their defaults, so the next user of the
+        connection gets a clean session (with this one's prepared statements still there).
+        """
+        try:
+            if conn.unread_result:
+                conn.consume_results()
+            if conn.in_transaction:
+                conn.rollback()
+        except mysql.connector.Error:
+            pass
+        raw = statements.session(conn)
+        settings = getattr(raw, 'session_settings', None)
+        if settings:
+            raw.session_settings = None
+            try:
+                conn.cursor().execute("SET SESSION " + ", ".join(f"{name} = DEFAULT" for name in sorted(settings)))
+            except mysql.connector.Error:
+                # Not restored: end the session, the pool reconnects it on the next checkout
+                try:
+                    raw.disconnect()
+                except mysql.connector.Error:
+                    pass
+        try:
+            conn.close()
+        except mysql.connector.Error as err:
+            # close() always returns the connection to the pool, even if the reset failed
+            print(f"❌ Error resetting pooled connection: {err}")
+
+@after_fork
+def _new_pool_after_fork():
+    # The parent's connections are its own sockets: drop them (without closing them,
+    # which would end the parent's sessions) and let this process open its own pool
+    Database._connection_pool = None
+    Database._pool_lock = threading.Lock()
+
+
+@contextmanager
+def db_connection(readonly=False):
+    """
+    Usage:
+        with db_connection() as conn:
+            if not conn:
+                return ...
+            cursor = conn.cursor()
+    The connection is always returned to the pool when the block exits.
+    With Config.SQL_TRACE on, its cursors are timed (see database/trace.py).
+    readonly=True: the block only reads and may see data a moment old, so it can run
+    on a read replica (see database/replicas.py). Writes must use the default.
+    """
+    replica, conn = None, None
+    if readonly and replicas.enabled() and not primary_required():
+        replica, conn = replicas.acquire()
+    if conn is None:
+        conn = Database.get_connection()
     try:
-        connection = mysql.connector.connect(
-            host='localhost',        # Or '127.0.0.1'
-            user='user',             # Make sure this matches docker-compose
-            password='userpassword', # Make sure this matches docker-compose
-            database='OnlineBookstore'
-        )
-        return connection
-    except mysql.connector.Error as err:
-        print(f"❌ DATABASE CONNECTION ERROR: {err}") # <--- Look for this in terminal
-        return None
\ No newline at end of file
+        yield trace.wrap(conn) if conn is not None and Config.SQL_TRACE else conn
+    finally:
+        if conn is not None:
+            Database.release(conn)
+        if replica is not None:
+            replicas.release(replica)
+
+def get_db_connection():
+    """
+    Legacy entry point: returns a pooled connection (or None).
+    Callers must close() it, which returns it to the pool. Prefer db_connection().
+    """
+    return Database.get_connection()
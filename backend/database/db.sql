@@ -4,6 +4,10 @@
 -- DROP DATABASE IF EXISTS OnlineBookstore;
 -- CREATE DATABASE OnlineBookstore;
 -- USE OnlineBookstore;
+--
+-- This file builds a new database at the latest schema. Every change made here also
+-- needs a migration in database/migrations/, which upgrades existing databases:
+--   flask --app app migrate up      (see database/migrate.py)
 
 -- =============================================
 -- 1. TABLE CREATION
@@ -19,9 +23,14 @@ CREATE TABLE Publishers (
 
 -- Authors Table 
 -- Separate table to handle "one or more authors" requirement
+-- name_key is the normalized name: one row per author, found through its unique index
+-- (Existing databases: migration 0000 merges duplicate author names, then adds it)
 CREATE TABLE Authors (
     author_id INT AUTO_INCREMENT PRIMARY KEY,
-    author_name VARCHAR(100) NOT NULL
+    author_name VARCHAR(100) NOT NULL,
+    name_key VARCHAR(100) AS (LOWER(TRIM(author_name))) STORED NOT NULL,
+    UNIQUE KEY uq_authors_name_key (name_key),
+    INDEX idx_authors_name (author_name)
 );
 
 -- Books Table 
@@ -33,7 +42,10 @@ CREATE TABLE Books (
     selling_price DECIMAL(10, 2) NOT NULL,
     category ENUM('Science', 'Art', 'Religion', 'History', 'Geography') NOT NULL,
     stock INT DEFAULT 0,
+    reserved INT NOT NULL DEFAULT 0, -- Held by checkouts in progress (Stock_Reservations); stock - reserved is for sale
     threshold INT DEFAULT 10, -- Minimum quantity before auto-order 
+    INDEX idx_books_category (category),                -- Search/browse by category
+    INDEX idx_books_stock_threshold (stock, threshold), -- Low-stock list (index scan, not a table scan)
     FOREIGN KEY (publisher_id) REFERENCES Publishers(publisher_id)
         ON UPDATE CASCADE ON DELETE RESTRICT
 );
@@ -70,6 +82,30 @@ CREATE TABLE Shopping_Cart (
     FOREIGN KEY (isbn) REFERENCES Books(isbn) ON DELETE CASCADE
 );
 
+-- Cart Summary: item count and subtotal of each user's cart, kept up to date by the
+-- Shopping_Cart triggers below so the cart badge is a primary-key read (no join).
+-- (Cascaded deletes don't fire triggers; rebuild with: flask --app app rebuild-cart-summaries)
+CREATE TABLE Cart_Summary (
+    user_id INT PRIMARY KEY,
+    item_count INT NOT NULL DEFAULT 0,
+    subtotal DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE
+);
+
+-- Stock Reservations: stock a checkout holds (counted in Books.reserved) but has not sold yet.
+-- Written by StockReservation.reserve, deleted when the order commits (consume: the units
+-- leave Books.stock then) or fails (release); rows past expires_at are given back by
+-- release_expired (on checkout, or flask --app app release-expired-reservations).
+CREATE TABLE Stock_Reservations (
+    reservation_id CHAR(32),
+    isbn VARCHAR(20),
+    quantity INT NOT NULL CHECK (quantity > 0),
+    expires_at DATETIME NOT NULL,
+    PRIMARY KEY (reservation_id, isbn),
+    INDEX idx_stock_reservations_expiry (expires_at),
+    FOREIGN KEY (isbn) REFERENCES Books(isbn) ON DELETE CASCADE
+);
+
 -- Customer Orders Header 
 CREATE TABLE Customer_Orders (
     order_id INT AUTO_INCREMENT PRIMARY KEY,
@@ -79,6 +115,8 @@ CREATE TABLE Customer_Orders (
     credit_card_no VARCHAR(16) NOT NULL, -- Added per requirement 
     expiry_date DATE NOT NULL,           -- Added per requirement 
     status ENUM('Pending', 'Confirmed') DEFAULT 'Pending',
+    INDEX idx_customer_orders_user_date (user_id, order_date), -- Order history (newest first, per user)
+    INDEX idx_customer_orders_date (order_date),                -- Sales rollup rebuilds by date
     FOREIGN KEY (user_id) REFERENCES Users(user_id)
 );
 
@@ -101,10 +139,75 @@ CREATE TABLE Publisher_Orders (
     quantity INT NOT NULL DEFAULT 50, -- Constant quantity 
     order_date DATE DEFAULT (CURRENT_DATE),
     status ENUM('Pending', 'Confirmed') DEFAULT 'Pending',
+    INDEX idx_publisher_orders_status (status, publisher_id), -- Pending orders, bulk confirm
     FOREIGN KEY (isbn) REFERENCES Books(isbn),
     FOREIGN KEY (publisher_id) REFERENCES Publishers(publisher_id)
 );
 
+-- Daily Sales Rollups (admin reports read these instead of scanning orders)
+-- Updated by Order.create_order in the checkout transaction;
+-- rebuild with: flask --app app rebuild-sales-rollups [--since YYYY-MM-DD]
+CREATE TABLE Sales_Daily (
+    sale_date DATE PRIMARY KEY,
+    order_count INT NOT NULL DEFAULT 0,
+    total_sales DECIMAL(14, 2) NOT NULL DEFAULT 0
+);
+
+CREATE TABLE Book_Sales_Daily (
+    sale_date DATE,
+    isbn VARCHAR(20),
+    units INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (sale_date, isbn),
+    FOREIGN KEY (isbn) REFERENCES Books(isbn) ON DELETE CASCADE
+);
+
+CREATE TABLE Customer_Spend_Daily (
+    sale_date DATE,
+    user_id INT,
+    order_count INT NOT NULL DEFAULT 0,
+    total_spent DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (sale_date, user_id),
+    FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE
+);
+
+-- Catalog Search Documents
+-- One row per book (title + authors + publisher), kept in sync by Book.add_book/update_book.
+-- Stopwords are disabled so titles like "The Shining" stay searchable word for word;
+-- the server also runs with innodb_ft_min_token_size=1 (see docker-compose.yml).
+SET SESSION innodb_ft_enable_stopword = OFF;
+CREATE TABLE Book_Search (
+    isbn VARCHAR(20) PRIMARY KEY,
+    title VARCHAR(255) NOT NULL,
+    authors TEXT,
+    publisher_name VARCHAR(100),
+    FULLTEXT INDEX ft_book_search (title, authors, publisher_name),
+    FULLTEXT INDEX ft_book_search_title (title),
+    FULLTEXT INDEX ft_book_search_authors (authors),
+    FULLTEXT INDEX ft_book_search_publisher (publisher_name),
+    FOREIGN KEY (isbn) REFERENCES Books(isbn) ON DELETE CASCADE
+);
+
+-- Admin report jobs (models/report_jobs.py), shared by every worker process.
+-- active_key (a hash of the report and its parameters) is set while the job is queued
+-- or running: unique, so identical requests join one job. params_key keeps it afterwards,
+-- to reuse a finished result. Finished jobs are deleted after REPORT_JOB_RETENTION seconds.
+CREATE TABLE Report_Jobs (
+    job_id CHAR(32) PRIMARY KEY,
+    report VARCHAR(50) NOT NULL,
+    params JSON NOT NULL,
+    params_key CHAR(64) NOT NULL,
+    active_key CHAR(64) NULL,
+    status ENUM('queued', 'running', 'done', 'failed') NOT NULL DEFAULT 'queued',
+    result JSON,
+    error TEXT,
+    submitted_at TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    finished_at TIMESTAMP(3) NULL,
+    UNIQUE KEY uq_report_jobs_active (active_key),
+    INDEX idx_report_jobs_params (params_key, finished_at),
+    INDEX idx_report_jobs_finished (finished_at),
+    INDEX idx_report_jobs_submitted (submitted_at)
+);
+
 -- =============================================
 -- 2. TRIGGERS (BUSINESS LOGIC)
 -- =============================================
@@ -133,22 +236,54 @@ BEGIN
     END IF;
 END; //
 
--- 3. Update Stock on Publisher Confirmation 
-CREATE TRIGGER Update_Stock_On_Confirmation
-AFTER UPDATE ON Publisher_Orders
+-- 3. Update Stock on Publisher Confirmation
+-- No trigger: Publisher.confirm_orders adds the confirmed quantities to Books itself,
+-- summed per book, so confirming hundreds of orders is one increment per book
+-- instead of one per order.
+-- (Existing databases: migration 0000 drops the Update_Stock_On_Confirmation trigger)
+
+-- 4. Deduct Stock on Customer Purchase
+-- No trigger: StockReservation.reserve holds the stock before the order is written,
+-- with a conditional increment of reserved per line (UPDATE ... WHERE stock - reserved >= qty)
+-- in a short transaction of its own, so a popular book's row is never locked for a whole
+-- checkout; StockReservation.consume takes it off stock in the order transaction.
+-- (Existing databases: migration 0000 drops the Deduct_Stock_On_Purchase trigger)
+
+-- 5. Cart Summary maintenance
+-- Every Shopping_Cart change moves the user's Cart_Summary row by the same delta.
+-- Subtotal uses the current price; it resets to 0 whenever the cart empties,
+-- and Book.update_book recomputes it for carts holding a repriced book.
+CREATE TRIGGER Cart_Summary_On_Insert
+AFTER INSERT ON Shopping_Cart
 FOR EACH ROW
 BEGIN
-    IF OLD.status = 'Pending' AND NEW.status = 'Confirmed' THEN
-        UPDATE Books SET stock = stock + NEW.quantity WHERE isbn = NEW.isbn;
-    END IF;
+    INSERT INTO Cart_Summary (user_id, item_count, subtotal)
+    VALUES (NEW.user_id, NEW.quantity, NEW.quantity * (SELECT selling_price FROM Books WHERE isbn = NEW.isbn)) AS delta
+    ON DUPLICATE KEY UPDATE
+        item_count = Cart_Summary.item_count + delta.item_count,
+        subtotal = Cart_Summary.subtotal + delta.subtotal;
+END; //
+
+CREATE TRIGGER Cart_Summary_On_Update
+AFTER UPDATE ON Shopping_Cart
+FOR EACH ROW
+BEGIN
+    UPDATE Cart_Summary
+    SET item_count = item_count + NEW.quantity - OLD.quantity,
+        subtotal = subtotal + (NEW.quantity - OLD.quantity) * (SELECT selling_price FROM Books WHERE isbn = NEW.isbn)
+    WHERE user_id = NEW.user_id;
 END; //
 
--- 4. Deduct Stock on Customer Purchase 
-CREATE TRIGGER Deduct_Stock_On_Purchase
-AFTER INSERT ON Order_Items
+CREATE TRIGGER Cart_Summary_On_Delete
+AFTER DELETE ON Shopping_Cart
 FOR EACH ROW
 BEGIN
-    UPDATE Books SET stock = stock - NEW.quantity WHERE isbn = NEW.isbn;
+    -- item_count is already the new value when subtotal is assigned
+    UPDATE Cart_Summary
+    SET item_count = item_count - OLD.quantity,
+        subtotal = IF(item_count = 0, 0,
+                      GREATEST(0, subtotal - OLD.quantity * (SELECT selling_price FROM Books WHERE isbn = OLD.isbn)))
+    WHERE user_id = OLD.user_id;
 END; //
 
 DELIMITER ;
@@ -0,0 +1,158 @@
+import re
+import importlib
+import pkgutil
+from database import migrations
+from database.connection import db_connection
+
+# Versioned schema changes for databases that already exist.
+#
+# db.sql builds a new database at the latest schema; every later change to it also gets
+# a migration in database/migrations/NNNN_short_name.py with a docstring (its description)
+# and an up(cursor) function. Schema_Migrations records which versions ran:
+#     flask --app app migrate status
+#     flask --app app migrate up [--to N]
+# MySQL commits DDL immediately, so a migration cannot be rolled back halfway. Write
+# every step so that it can run again (use the helpers below), which also makes a new
+# database from db.sql safe to migrate: each step finds its change already there.
+
+MIGRATION_NAME = re.compile(r'^(\d{4})_(\w+)$')
+LOCK_NAME = 'bookstore_schema_migrations'
+LOCK_TIMEOUT = 60  # seconds to wait for another runner
+
+class Migrations:
+    @staticmethod
+    def discover():
+        """
+        [(version, name, module)] of every migration file, oldest first.
+        """
+        found = []
+        for info in pkgutil.iter_modules(migrations.__path__):
+            match = MIGRATION_NAME.match(info.name)
+            if not match:
+                continue
+            module = importlib.import_module(f"{migrations.__name__}.{info.name}")
+            found.append((int(match.group(1)), match.group(2), module))
+        found.sort(key=lambda migration: migration[0])
+
+        versions = [version for version, _, _ in found]
+        if len(versions) != len(set(versions)):
+            raise RuntimeError("Two migration files have the same version number")
+        return found
+
+    @staticmethod
+    def status():
+        """
+        [{'version', 'name', 'description', 'applied_at'}] for every migration
+        (applied_at is None if it has not run). None if the database is down.
+        """
+        with db_connection() as conn:
+            if not conn:
+                return None
+            cursor = conn.cursor()
+            Migrations._ensure_table(cursor)
+            applied = Migrations._applied(cursor)
+        return [{
+            'version': version,
+            'name': name,
+            'description': Migrations._description(module),
+            'applied_at': applied.get(version),
+        } for version, name, module in Migrations.discover()]
+
+    @staticmethod
+    def up(target=None, echo=print):
+        """
+        Run every pending migration (up to version `target`), in order.
+        Returns the list of versions applied, or None if the database is down.
+        A failing migration raises; the ones before it stay recorded.
+        """
+        all_migrations = Migrations.discover()
+        with db_connection() as conn:
+            if not conn:
+                return None
+            cursor = conn.cursor()
+            # One runner at a time (e.g. several app servers starting together)
+            cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, LOCK_TIMEOUT))
+            if cursor.fetchone()[0] != 1:
+                raise RuntimeError("Another migration run holds the lock")
+            try:
+                Migrations._ensure_table(cursor)
+                applied = Migrations._applied(cursor)
+                done = []
+                for version, name, module in all_migrations:
+                    if version in applied or (target is not None and version > target):
+                        continue
+                    echo(f"⏳ {version:04d} {name}: {Migrations._description(module)}")
+                    module.up(cursor)
+                    cursor.execute(
+                        "INSERT INTO Schema_Migrations (version, name) VALUES (%s, %s)",
+                        (version, name))
+                    conn.commit()
+                    done.append(version)
+                return done
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+                cursor.fetchall()
+
+    @staticmethod
+    def _ensure_table(cursor):
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS Schema_Migrations (
+                version INT PRIMARY KEY,
+                name VARCHAR(100) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+    @staticmethod
+    def _applied(cursor):
+        cursor.execute("SELECT version, applied_at FROM Schema_Migrations")
+        return dict(cursor.fetchall())
+
+    @staticmethod
+    def _description(module):
+        return (module.__doc__ or "").strip().split("\n")[0]
+
+
+# Helpers for migrations
+
+def index_exists(cursor, table, index):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        LIMIT 1
+    """, (table, index))
+    return cursor.fetchone() is not None
+
+def table_exists(cursor, table):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_name = %s
+        LIMIT 1
+    """, (table,))
+    return cursor.fetchone() is not None
+
+def trigger_exists(cursor, trigger):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.triggers
+        WHERE trigger_schema = DATABASE() AND trigger_name = %s
+        LIMIT 1
+    """, (trigger,))
+    return cursor.fetchone() is not None
+
+def column_exists(cursor, table, column):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        LIMIT 1
+    """, (table, column))
+    return cursor.fetchone() is not None
+
+def add_index(cursor, table, index, columns):
+    """
+    Add a secondary index unless it exists. Built online: the table stays
+    readable and writable while InnoDB builds it.
+    """
+    if index_exists(cursor, table, index):
+        return False
+    cursor.execute(f"ALTER TABLE {table} ADD INDEX {index} ({columns}), ALGORITHM=INPLACE, LOCK=NONE")
+    return True
@@ -0,0 +1,230 @@
+"""
+Baseline: tables, columns and triggers added to db.sql before the migration series started.
+
+A database built from the original db.sql lacks the search documents, cart summaries,
+stock reservations and daily sales rollups, and still has the stock triggers that
+checkout and Publisher.confirm_orders now replace (left in place, stock would change
+twice). This brings it to the schema 0001 onwards expect and fills the new tables from
+the existing rows. On a database built from the current db.sql every step is a no-op,
+apart from recomputing the cart summaries.
+
+The SQL is spelled out here rather than taken from the models, so this migration keeps
+doing what it did when it was released whatever the models' queries become.
+"""
+from database.migrate import column_exists, table_exists, trigger_exists
+
+TABLES = {
+    'Cart_Summary': """
+        CREATE TABLE Cart_Summary (
+            user_id INT PRIMARY KEY,
+            item_count INT NOT NULL DEFAULT 0,
+            subtotal DECIMAL(12, 2) NOT NULL DEFAULT 0,
+            FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE
+        )
+    """,
+    'Stock_Reservations': """
+        CREATE TABLE Stock_Reservations (
+            reservation_id CHAR(32),
+            isbn VARCHAR(20),
+            quantity INT NOT NULL CHECK (quantity > 0),
+            expires_at DATETIME NOT NULL,
+            PRIMARY KEY (reservation_id, isbn),
+            INDEX idx_stock_reservations_expiry (expires_at),
+            FOREIGN KEY (isbn) REFERENCES Books(isbn) ON DELETE CASCADE
+        )
+    """,
+    'Sales_Daily': """
+        CREATE TABLE Sales_Daily (
+            sale_date DATE PRIMARY KEY,
+            order_count INT NOT NULL DEFAULT 0,
+            total_sales DECIMAL(14, 2) NOT NULL DEFAULT 0
+        )
+    """,
+    'Book_Sales_Daily': """
+        CREATE TABLE Book_Sales_Daily (
+            sale_date DATE,
+            isbn VARCHAR(20),
+            units INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (sale_date, isbn),
+            FOREIGN KEY (isbn) REFERENCES Books(isbn) ON DELETE CASCADE
+        )
+    """,
+    'Customer_Spend_Daily': """
+        CREATE TABLE Customer_Spend_Daily (
+            sale_date DATE,
+            user_id INT,
+            order_count INT NOT NULL DEFAULT 0,
+            total_spent DECIMAL(14, 2) NOT NULL DEFAULT 0,
+            PRIMARY KEY (sale_date, user_id),
+            FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE
+        )
+    """,
+    'Book_Search': """
+        CREATE TABLE Book_Search (
+            isbn VARCHAR(20) PRIMARY KEY,
+            title VARCHAR(255) NOT NULL,
+            authors TEXT,
+            publisher_name VARCHAR(100),
+            FULLTEXT INDEX ft_book_search (title, authors, publisher_name),
+            FULLTEXT INDEX ft_book_search_title (title),
+            FULLTEXT INDEX ft_book_search_authors (authors),
+            FULLTEXT INDEX ft_book_search_publisher (publisher_name),
+            FOREIGN KEY (isbn) REFERENCES Books(isbn) ON DELETE CASCADE
+        )
+    """,
+}
+
+# Replaced by application code: Publisher.confirm_orders and StockReservation.consume
+OLD_TRIGGERS = ('Update_Stock_On_Confirmation', 'Deduct_Stock_On_Purchase')
+
+CART_SUMMARY_TRIGGERS = {
+    'Cart_Summary_On_Insert': """
+        CREATE TRIGGER Cart_Summary_On_Insert
+        AFTER INSERT ON Shopping_Cart
+        FOR EACH ROW
+        BEGIN
+            INSERT INTO Cart_Summary (user_id, item_count, subtotal)
+            VALUES (NEW.user_id, NEW.quantity, NEW.quantity * (SELECT selling_price FROM Books WHERE isbn = NEW.isbn)) AS delta
+            ON DUPLICATE KEY UPDATE
+                item_count = Cart_Summary.item_count + delta.item_count,
+                subtotal = Cart_Summary.subtotal + delta.subtotal;
+        END
+    """,
+    'Cart_Summary_On_Update': """
+        CREATE TRIGGER Cart_Summary_On_Update
+        AFTER UPDATE ON Shopping_Cart
+        FOR EACH ROW
+        BEGIN
+            UPDATE Cart_Summary
+            SET item_count = item_count + NEW.quantity - OLD.quantity,
+                subtotal = subtotal + (NEW.quantity - OLD.quantity) * (SELECT selling_price FROM Books WHERE isbn = NEW.isbn)
+            WHERE user_id = NEW.user_id;
+        END
+    """,
+    'Cart_Summary_On_Delete': """
+        CREATE TRIGGER Cart_Summary_On_Delete
+        AFTER DELETE ON Shopping_Cart
+        FOR EACH ROW
+        BEGIN
+            -- item_count is already the new value when subtotal is assigned
+            UPDATE Cart_Summary
+            SET item_count = item_count - OLD.quantity,
+                subtotal = IF(item_count = 0, 0,
+                              GREATEST(0, subtotal - OLD.quantity * (SELECT selling_price FROM Books WHERE isbn = OLD.isbn)))
+            WHERE user_id = OLD.user_id;
+        END
+    """,
+}
+
+# Rollup table -> statement filling it from every past order
+ROLLUP_BACKFILLS = {
+    'Sales_Daily': """
+        INSERT INTO Sales_Daily (sale_date, order_count, total_sales)
+        SELECT DATE(co.order_date), COUNT(*), COALESCE(SUM(co.total_price), 0)
+        FROM Customer_Orders co
+        GROUP BY DATE(co.order_date)
+    """,
+    'Book_Sales_Daily': """
+        INSERT INTO Book_Sales_Daily (sale_date, isbn, units)
+        SELECT DATE(co.order_date), oi.isbn, SUM(oi.quantity)
+        FROM Customer_Orders co
+        JOIN Order_Items oi ON oi.order_id = co.order_id
+        GROUP BY DATE(co.order_date), oi.isbn
+    """,
+    'Customer_Spend_Daily': """
+        INSERT INTO Customer_Spend_Daily (sale_date, user_id, order_count, total_spent)
+        SELECT DATE(co.order_date), co.user_id, COUNT(*), COALESCE(SUM(co.total_price), 0)
+        FROM Customer_Orders co
+        WHERE co.user_id IS NOT NULL
+        GROUP BY DATE(co.order_date), co.user_id
+    """,
+}
+
+SEARCH_BACKFILL = """
+    INSERT INTO Book_Search (isbn, title, authors, publisher_name)
+    SELECT b.isbn, b.title, GROUP_CONCAT(a.author_name SEPARATOR ', '), p.name
+    FROM Books b
+    JOIN Publishers p ON b.publisher_id = p.publisher_id
+    LEFT JOIN Book_Authors ba ON b.isbn = ba.isbn
+    LEFT JOIN Authors a ON ba.author_id = a.author_id
+    GROUP BY b.isbn
+"""
+
+CART_SUMMARY_FILL = """
+    INSERT INTO Cart_Summary (user_id, item_count, subtotal)
+    SELECT sc.user_id, SUM(sc.quantity), SUM(sc.quantity * b.selling_price)
+    FROM Shopping_Cart sc
+    JOIN Books b ON sc.isbn = b.isbn
+    GROUP BY sc.user_id
+"""
+
+def up(cursor):
+    # 1. Authors: one row per normalized name, then the unique name_key
+    if not column_exists(cursor, 'Authors', 'name_key'):
+        merge_duplicate_authors(cursor)
+        cursor.execute("""
+            ALTER TABLE Authors
+            ADD COLUMN name_key VARCHAR(100) AS (LOWER(TRIM(author_name))) STORED NOT NULL,
+            ADD UNIQUE KEY uq_authors_name_key (name_key)
+        """)
+
+    # 2. New tables (Book_Search's FULLTEXT indexes must be built without stopwords)
+    try:
+        for table, ddl in TABLES.items():
+            if table_exists(cursor, table):
+                continue
+            if table == 'Book_Search':
+                cursor.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+            cursor.execute(ddl)
+    finally:
+        cursor.execute("SET SESSION innodb_ft_enable_stopword = DEFAULT")
+
+    # 3. Stock is now changed by the application only
+    for trigger in OLD_TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    for trigger, ddl in CART_SUMMARY_TRIGGERS.items():
+        if not trigger_exists(cursor, trigger):
+            cursor.execute(ddl)
+
+    # 4. Fill the new tables (DML: committed together with the migration record)
+    for table, backfill in ROLLUP_BACKFILLS.items():
+        if is_empty(cursor, table):
+            cursor.execute(backfill)
+    if is_empty(cursor, 'Book_Search'):
+        cursor.execute(SEARCH_BACKFILL)
+    # The triggers keep it from here on; rebuilt whole so a cart changed while they
+    # were being created can't leave it off
+    cursor.execute("DELETE FROM Cart_Summary")
+    cursor.execute(CART_SUMMARY_FILL)
+
+def merge_duplicate_authors(cursor):
+    """
+    Point the books of every duplicate author ("J.K. Rowling" / "j.k. rowling ") at the
+    oldest row with that name, then delete the others (their Book_Authors links cascade).
+    """
+    cursor.execute("""
+        SELECT a.author_id, d.keep_id
+        FROM Authors a
+        JOIN (
+            SELECT LOWER(TRIM(author_name)) AS name_key, MIN(author_id) AS keep_id
+            FROM Authors
+            GROUP BY name_key
+            HAVING COUNT(*) > 1
+        ) d ON LOWER(TRIM(a.author_name)) = d.name_key
+        WHERE a.author_id <> d.keep_id
+    """)
+    duplicates = cursor.fetchall()
+    if not duplicates:
+        return
+    # INSERT IGNORE: a book already linked to both rows keeps a single link
+    cursor.executemany("""
+        INSERT IGNORE INTO Book_Authors (isbn, author_id)
+        SELECT isbn, %s FROM Book_Authors WHERE author_id = %s
+    """, [(keep_id, author_id) for author_id, keep_id in duplicates])
+    placeholders = ", ".join(["%s"] * len(duplicates))
+    cursor.execute(f"DELETE FROM Authors WHERE author_id IN ({placeholders})",
+                   [author_id for author_id, _ in duplicates])
+
+def is_empty(cursor, table):
+    cursor.execute(f"SELECT 1 FROM {table} LIMIT 1")
+    return cursor.fetchone() is None
@@ -0,0 +1,23 @@
+"""
+Secondary indexes for the columns the app filters and sorts on.
+"""
+from database.migrate import add_index
+
+INDEXES = [
+    # Sales rollup rebuilds (order_date >= since)
+    ('Customer_Orders', 'idx_customer_orders_date', 'order_date'),
+    # Order history, newest first per user
+    ('Customer_Orders', 'idx_customer_orders_user_date', 'user_id, order_date'),
+    # Pending orders page, bulk confirm per publisher, order counts by status
+    ('Publisher_Orders', 'idx_publisher_orders_status', 'status, publisher_id'),
+    # Catalog search / browse filtered by category
+    ('Books', 'idx_books_category', 'category'),
+    # Low-stock list on the admin dashboard (scanned instead of the whole table)
+    ('Books', 'idx_books_stock_threshold', 'stock, threshold'),
+    # Author lookups by display name
+    ('Authors', 'idx_authors_name', 'author_name'),
+]
+
+def up(cursor):
+    for table, index, columns in INDEXES:
+        add_index(cursor, table, index, columns)
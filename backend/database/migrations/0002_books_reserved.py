@@ -0,0 +1,11 @@
+"""
+Books.reserved: units held by checkout reservations (models/stock_reservation.py);
+stock - reserved is what can still be sold.
+"""
+from database.migrate import column_exists
+
+def up(cursor):
+    if column_exists(cursor, 'Books', 'reserved'):
+        return
+    # Metadata only on MySQL 8.0.29+ (ALGORITHM=INSTANT is picked automatically)
+    cursor.execute("ALTER TABLE Books ADD COLUMN reserved INT NOT NULL DEFAULT 0 AFTER stock")
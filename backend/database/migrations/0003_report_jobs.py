@@ -0,0 +1,22 @@
+"""
+Report_Jobs: admin report jobs shared by every worker process.
+"""
+
+def up(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Report_Jobs (
+            job_id CHAR(32) PRIMARY KEY,
+            report VARCHAR(50) NOT NULL,
+            params JSON NOT NULL,
+            params_key CHAR(64) NOT NULL,
+            active_key CHAR(64) NULL,
+            status ENUM('queued', 'running', 'done', 'failed') NOT NULL DEFAULT 'queued',
+            result JSON,
+            error TEXT,
+            submitted_at TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+            finished_at TIMESTAMP(3) NULL,
+            UNIQUE KEY uq_report_jobs_active (active_key),
+            INDEX idx_report_jobs_params (params_key, finished_at),
+            INDEX idx_report_jobs_finished (finished_at)
+        )
+    """)
@@ -0,0 +1,7 @@
+"""
+Report_Jobs.submitted_at index: the periodic clean-up gives up on jobs submitted too long ago.
+"""
+from database.migrate import add_index
+
+def up(cursor):
+    add_index(cursor, 'Report_Jobs', 'idx_report_jobs_submitted', 'submitted_at')
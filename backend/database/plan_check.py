@@ -0,0 +1,178 @@
+import sys
+from database.connection import db_connection
+from models import admin_stats, author, book, book_import, cart, leaderboards, order, publisher, report_jobs
+from models import stock_reservation, user
+from models.order import Order
+from models.sales_rollup import SALES_UPSERT, BOOK_SALES_UPSERT, CUSTOMER_SPEND_UPSERT
+from models.search import BookSearch, DOCUMENT_QUERY, UPSERT_QUERY
+from models.export import DATASETS as EXPORTS
+
+# Query plan regression check: EXPLAIN each query the models run and fail if one of them
+# reads a whole table because no index can serve it (plan type ALL with no possible key).
+#     flask --app app check-query-plans [--strict]
+#     python -m database.plan_check [--strict]
+# tests/test_plan_check.py runs it (--strict) as part of python -m pytest whenever the
+# configured database is reachable, so a regression fails the test run.
+# Run it against a migrated database after changing a query or the schema. Add new model
+# queries to QUERIES, with sample parameters of the right type (the values don't matter).
+# The SQL comes from the models' own query constants (or the function that builds it),
+# so what is checked is what runs.
+#
+# On a small database the optimizer may still pick a table scan over an index it could
+# use (type ALL, but with possible keys): that is only a warning, or a failure with --strict
+# (useful on a database with production-sized tables).
+#
+# `scans` lists the tables a query is allowed to read in full, each with the reason.
+
+SAMPLE_ISBN = '978-0-00-000000-0'
+SAMPLE_DATE = '2025-01-01'
+
+def query(name, sql, params=(), scans=None):
+    return {'name': name, 'sql': sql, 'params': params, 'scans': scans or {}}
+
+def placeholders(count, one="%s"):
+    return ", ".join([one] * count)
+
+QUERIES = [
+    # Catalog
+    query('Book.list_books (first page)', book.LIST_QUERY, (20,)),
+    query('Book.list_books (next page)', book.LIST_AFTER_QUERY, (SAMPLE_ISBN, 20)),
+    query('Book.get_book_details', book.DETAILS_QUERY, (SAMPLE_ISBN,)),
+    query('Book.update_book (current authors)', book.AUTHOR_IDS_QUERY, (SAMPLE_ISBN,)),
+    query('Author._lookup', author.LOOKUP_QUERY.format(placeholders=placeholders(2)),
+          ('jane austen', 'leo tolstoy')),
+    query('BookImport (existing isbns)', book_import.EXISTING_QUERY.format(placeholders=placeholders(2)),
+          (SAMPLE_ISBN, '978-0-00-000001-7')),
+    query('BookImport (publishers)', book_import.PUBLISHERS_QUERY,
+          scans={'Publishers': "loaded once per import to map names to ids"}),
+    query('Publisher.get_all_publishers', publisher.PUBLISHERS_QUERY,
+          scans={'Publishers': "the whole (short) list is the result"}),
+
+    # Search
+    query('BookSearch.search (words)', *BookSearch.build_query(query_str='harry', limit=21)),
+    query('BookSearch.search (isbn prefix)', *BookSearch.build_query(query_str='978-0', limit=21)),
+    query('BookSearch.search (category)', *BookSearch.build_query(category='Science', limit=21)),
+    query('BookSearch.index_book', UPSERT_QUERY.format(documents=DOCUMENT_QUERY.format(where="WHERE b.isbn = %s")),
+          (SAMPLE_ISBN,)),
+
+    # Cart and checkout
+    query('Cart.get_cart_items', cart.ITEMS_QUERY, (1,)),
+    query('Cart.get_cart_summary', cart.SUMMARY_QUERY, (1,)),
+    query('Cart.refresh_subtotals', cart.REFRESH_SUBTOTALS, (SAMPLE_ISBN,)),
+    query('Order.create_order (cart lines)', order.CART_LINES_QUERY, (1,)),
+    query('Order.create_order (cart)', order.CART_ITEMS_QUERY, (1,)),
+    query('StockReservation.reserve', stock_reservation.RESERVE_QUERY, (1, SAMPLE_ISBN, 1)),
+    query('StockReservation.consume (lines)', stock_reservation.CONSUME_LINES_QUERY, ('0' * 32,)),
+    query('StockReservation.consume', stock_reservation.CONSUME_QUERY, ('0' * 32,)),
+    query('StockReservation.release', stock_reservation.LINES_QUERY, ('0' * 32,)),
+    query('StockReservation._unreserve',
+          stock_reservation.UNRESERVE_QUERY.format(placeholders=placeholders(2, "(%s, %s)")),
+          ('0' * 32, SAMPLE_ISBN, '1' * 32, SAMPLE_ISBN)),
+    query('StockReservation.release_expired', stock_reservation.EXPIRED_QUERY, (500,)),
+    query('SalesRollup.record_order (days)', SALES_UPSERT.format(where="WHERE co.order_id = %s"), (1,)),
+    query('SalesRollup.record_order (books)', BOOK_SALES_UPSERT.format(where="WHERE co.order_id = %s"), (1,)),
+    query('SalesRollup.record_order (customers)',
+          CUSTOMER_SPEND_UPSERT.format(where="WHERE co.order_id = %s AND co.user_id IS NOT NULL"), (1,)),
+    query('SalesRollup.rebuild (since)', SALES_UPSERT.format(where="WHERE co.order_date >= %s"), (SAMPLE_DATE,)),
+
+    # Order history
+    query('Order.get_order_history (headers)', *Order.history_query(1, [SAMPLE_DATE, 100], 10)),
+    query('Order.get_order_history (items)', order.HISTORY_ITEMS_QUERY.format(placeholders=placeholders(2)), (1, 2)),
+    query('Order.get_user_orders', order.USER_ORDERS_QUERY, (1,)),
+    query('Order.get_order_details', order.ORDER_ITEMS_QUERY, (1,)),
+
+    # Users
+    query('User.register_user (taken?)', user.TAKEN_QUERY, ('reader', 'reader@example.com')),
+    query('User.login', user.LOGIN_QUERY, ('reader',)),
+    query('User.get_user_by_id', user.PROFILE_QUERY, (1,)),
+
+    # Publisher orders
+    query('Publisher.get_pending_orders', publisher.PENDING_QUERY),
+    query('Publisher.confirm_orders (publisher)',
+          publisher.CONFIRM_LOCK_QUERY.format(conditions="status = 'Pending' AND publisher_id = %s"), (1,)),
+    query('Publisher.confirm_orders (selected)',
+          publisher.CONFIRM_LOCK_QUERY.format(conditions=f"status = 'Pending' AND po_id IN ({placeholders(2)})"),
+          (1, 2)),
+    query('Publisher.get_replenishment_history', publisher.REPLENISHMENT_QUERY, (SAMPLE_ISBN,)),
+
+    # Reports and dashboard
+    query('Publisher.report_sales_last_month', publisher.LAST_MONTH_SALES_QUERY),
+    query('Publisher.report_sales_day', publisher.DAY_SALES_QUERY, (SAMPLE_DATE,)),
+    query('Leaderboards.rebuild (books)', leaderboards.BOOK_SALES_QUERY, (SAMPLE_DATE,)),
+    query('Leaderboards.rebuild (customers)', leaderboards.CUSTOMER_SPEND_QUERY, (SAMPLE_DATE,)),
+    query('Leaderboards.report_top_books', leaderboards.TOP_BOOKS_QUERY, (SAMPLE_DATE, 10)),
+    query('Leaderboards.report_top_customers', leaderboards.TOP_CUSTOMERS_QUERY, (SAMPLE_DATE, 10)),
+    query('Leaderboards._labels (books)', leaderboards.LABEL_QUERIES['book'].format(placeholders=placeholders(2)),
+          (SAMPLE_ISBN, '978-0-00-000001-7')),
+    query('Leaderboards._labels (users)', leaderboards.LABEL_QUERIES['user'].format(placeholders=placeholders(2)),
+          (1, 2)),
+    query('AdminStats (books)', admin_stats.BOOKS_QUERY),
+    query('AdminStats (customers)', admin_stats.CUSTOMERS_QUERY,
+          scans={'Users': "nearly every user is a customer; counted once per STATS_TTL"}),
+    query('AdminStats (publisher orders)', admin_stats.PUBLISHER_ORDERS_QUERY),
+    query('AdminStats (monthly sales)', admin_stats.MONTHLY_SALES_QUERY),
+    query('AdminStats (low stock)', admin_stats.LOW_STOCK_QUERY),
+
+    # Report jobs
+    query('ReportJobRunner.submit (active)', report_jobs.ACTIVE_QUERY, ('0' * 64,)),
+    query('ReportJobRunner.submit (cached)', report_jobs.CACHED_QUERY, ('0' * 64, 60)),
+    query('ReportJobRunner._prune (abandoned)', report_jobs.ABANDON_QUERY, (600,)),
+    query('ReportJobRunner._prune', report_jobs.PRUNE_QUERY, (600, 100)),
+] + [
+    # Exports, over a date range
+    query(f'Export.rows ({name})', sql.format(where=f"WHERE {column} >= %s AND {column} < %s"),
+          (SAMPLE_DATE, '2025-02-01'))
+    for name, (sql, column, _) in EXPORTS.items()
+]
+
+class PlanCheck:
+    @staticmethod
+    def explain(cursor, entry):
+        """
+        EXPLAIN one query: (status, [problem descriptions]) with status 'ok', 'warn' or 'fail'.
+        """
+        cursor.execute("EXPLAIN " + entry['sql'], entry['params'] or None)
+        status, problems = 'ok', []
+        for row in cursor.fetchall():
+            if row['type'] != 'ALL' or row['table'] in entry['scans']:
+                continue
+            if row['table'].startswith('<'):
+                continue  # derived/union temp table: its own query is checked row by row
+            if row['possible_keys']:
+                problems.append(f"{row['table']}: scanned although {row['possible_keys']} could be used")
+                status = 'fail' if status == 'fail' else 'warn'
+            else:
+                problems.append(f"{row['table']}: full table scan, no usable index")
+                status = 'fail'
+        return status, problems
+
+    @staticmethod
+    def run(strict=False, echo=print):
+        """
+        Check every query in QUERIES. Returns the number of failures, or None if the database is down.
+        """
+        failures = 0
+        with db_connection() as conn:
+            if not conn:
+                return None
+            cursor = conn.cursor(dictionary=True)
+            for entry in QUERIES:
+                try:
+                    status, problems = PlanCheck.explain(cursor, entry)
+                except Exception as e:
+                    status, problems = 'fail', [f"EXPLAIN failed: {e}"]
+                if status == 'warn' and strict:
+                    status = 'fail'
+                failures += status == 'fail'
+                icon = {'ok': '✅', 'warn': '⚠️ ', 'fail': '❌'}[status]
+                echo(f"{icon} {entry['name']}")
+                for problem in problems:
+                    echo(f"      {problem}")
+        return failures
+
+
+if __name__ == '__main__':
+    failures = PlanCheck.run(strict='--strict' in sys.argv[1:])
+    if failures is None:
+        print("❌ Database connection error")
+    sys.exit(0 if failures == 0 else 1)
@@ -0,0 +1,127 @@
+from collections.abc import Sequence
+from flask.json.provider import DefaultJSONProvider
+
+# Compact results for the big listings (search, catalog pages, cart, orders).
+#
+# cursor(dictionary=True) builds a dict per row on top of the tuple the connector
+# already read: a hash table with a reference to every column name, about 460 bytes
+# for a search row before the values. fetch_all() keeps the plain tuples instead, with
+# one name -> position map for the whole result: about a third less memory for a
+# search listing, and less time to fetch it. Plain tuples of scalars are also dropped
+# from the GC's tracking after their first collection, which instances of a
+# __slots__ class never are, so a big result isn't walked by every full collection.
+#
+# A Row is a small view of one tuple, made when the row is read (iterating, indexing),
+# and reads like the dict it replaces: row['title'], row.get('title'), 'title' in row,
+# keys()/items(), and row.title in templates (Jinja tries the attribute first). jsonify
+# and the API cache serialize Rows and Results as objects / lists of objects through
+# JSONProvider (set on the app in app.py). Rows are read-only: use as_dict() for a copy
+# to change. A column read through a Row is a Python call, slower than a dict lookup:
+# nothing for a page of results, but a loop over every row of a large result should
+# use results.rows (the tuples) and results.fields (name -> position) directly.
+
+class Results(Sequence):
+    """
+    The rows of one query: a read-only list of Rows (len, indexing, slicing, iteration).
+    """
+    __slots__ = ('fields', 'rows')
+
+    def __init__(self, columns, rows):
+        self.fields = columns if isinstance(columns, dict) else {name: i for i, name in enumerate(columns)}
+        self.rows = rows  # plain tuples
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Results(self.fields, self.rows[index])
+        return Row(self.rows[index], self.fields)
+
+    def __iter__(self):
+        fields = self.fields
+        for values in self.rows:
+            yield Row(values, fields)
+
+    def __eq__(self, other):
+        if isinstance(other, (Results, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Results({len(self.rows)} rows: {', '.join(self.fields)})"
+
+    def as_dicts(self):
+        names = list(self.fields)
+        return [dict(zip(names, values)) for values in self.rows]
+
+class Row:
+    __slots__ = ('_values', '_fields')
+
+    def __init__(self, values, fields):
+        self._values = values
+        self._fields = fields
+
+    def __getattr__(self, name):
+        # Only called for names that aren't methods: the columns
+        if name.startswith('_'):
+            raise AttributeError(name)  # copy/pickle probing a Row without its slots set
+        try:
+            return self._values[self._fields[name]]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __getitem__(self, key):
+        return self._values[self._fields[key]]
+
+    def __contains__(self, key):
+        return key in self._fields
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __eq__(self, other):
+        if isinstance(other, (Row, dict)):
+            return self.as_dict() == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Row({self.as_dict()!r})"
+
+    def get(self, key, default=None):
+        index = self._fields.get(key)
+        return default if index is None else self._values[index]
+
+    def keys(self):
+        return self._fields.keys()
+
+    def values(self):
+        return list(self._values)
+
+    def items(self):
+        return list(zip(self._fields, self._values))
+
+    def as_dict(self):
+        return dict(zip(self._fields, self._values))
+
+def fetch_all(cursor):
+    """
+    Rows of the last query on a plain (tuple) cursor, as Results.
+    """
+    rows = cursor.fetchall()
+    return Results(cursor.column_names, rows)
+
+class JSONProvider(DefaultJSONProvider):
+    """
+    Flask's JSON provider, plus Results and Rows serialized as lists of objects / objects.
+    """
+    @staticmethod
+    def default(o):
+        if isinstance(o, Results):
+            return o.as_dicts()
+        if isinstance(o, Row):
+            return o.as_dict()
+        return DefaultJSONProvider.default(o)
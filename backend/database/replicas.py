@@ -0,0 +1,248 @@
+import time
+import threading
+
+import mysql.connector
+from mysql.connector import pooling
+from flask import has_request_context, request, session
+from config import Config
+from utils.forking import after_fork
+
+# Read replicas (Config.DB_REPLICAS). Queries opened with db_connection(readonly=True)
+# run on a replica; everything else, and every write, runs on the primary (DB_HOST).
+#
+# - Selection: the healthy replica with the fewest connections checked out by this
+#   process, ties taken in round-robin order. If none can hand out a connection
+#   right away, the read goes to the primary instead of waiting.
+# - Health: a replica that fails to connect, or whose replication is stopped or more
+#   than Config.DB_REPLICA_MAX_LAG seconds behind (checked every
+#   DB_REPLICA_CHECK_INTERVAL seconds), is ejected for DB_REPLICA_EJECT_SECONDS and
+#   then tried again.
+# - Read-your-writes: a request that can write (anything but GET/HEAD/OPTIONS) reads
+#   from the primary only, and so does the same user for Config.DB_STICKY_SECONDS
+#   afterwards, so the page after "add to cart" or checkout sees the new rows.
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+SESSION_KEY = 'db_primary_until'
+
+class Replica:
+    def __init__(self, index, host, port):
+        self.index = index
+        self.host = host
+        self.port = port
+        self.pool = None
+        self.pool_lock = threading.Lock()  # held while the pool is being built
+        self.in_use = 0            # connections checked out by this process
+        self.ejected_until = 0.0
+        self.checked_at = 0.0
+        self.lag = None            # seconds behind the primary at the last check
+        self.error = None          # why it was last ejected
+
+    @property
+    def name(self):
+        return f"{self.host}:{self.port}"
+
+    def stats(self):
+        return {
+            'replica': self.name,
+            'healthy': self.ejected_until <= time.monotonic(),
+            'in_use': self.in_use,
+            'lag': self.lag,
+            'last_error': self.error,
+        }
+
+class ReplicaSet:
+    def __init__(self, endpoints):
+        self.replicas = [Replica(index, host, port) for index, (host, port) in enumerate(endpoints)]
+        self._lock = threading.Lock()
+        self._next = 0
+        self.reads = 0        # readonly blocks served by a replica
+        self.fallbacks = 0    # readonly blocks sent to the primary (no replica available)
+
+    @staticmethod
+    def parse(value):
+        """
+        "host1:3307, host2" -> [('host1', 3307), ('host2', Config.DB_PORT)]
+        """
+        endpoints = []
+        for item in (value or '').split(','):
+            item = item.strip()
+            if not item:
+                continue
+            host, _, port = item.partition(':')
+            endpoints.append((host, int(port) if port else Config.DB_PORT))
+        return endpoints
+
+    def enabled(self):
+        return bool(self.replicas)
+
+    def acquire(self):
+        """
+        (replica, connection) from a healthy replica, or (None, None): use the primary.
+        The caller hands the replica back with release() once the connection is released.
+        """
+        for _ in range(len(self.replicas)):
+            replica = self._pick()
+            if replica is None:
+                break
+            conn = self._connect(replica)
+            if conn is not None:
+                with self._lock:
+                    self.reads += 1
+                return replica, conn
+            self.release(replica)
+        with self._lock:
+            self.fallbacks += 1
+        return None, None
+
+    def release(self, replica):
+        with self._lock:
+            replica.in_use -= 1
+
+    def eject(self, replica, reason):
+        with self._lock:
+            if replica.ejected_until <= time.monotonic():
+                print(f"⚠️ Read replica {replica.name} ejected for {Config.DB_REPLICA_EJECT_SECONDS:g}s: {reason}")
+            replica.ejected_until = time.monotonic() + Config.DB_REPLICA_EJECT_SECONDS
+            replica.error = reason
+
+    def stats(self):
+        with self._lock:
+            return {
+                'reads': self.reads,
+                'fallbacks': self.fallbacks,
+                'replicas': [replica.stats() for replica in self.replicas],
+            }
+
+    def close(self):
+        """
+        Close the idle connections of every replica pool (worker shutdown).
+        """
+        for replica in self.replicas:
+            with self._lock:
+                pool, replica.pool = replica.pool, None
+            if pool is not None:
+                try:
+                    pool._remove_connections()
+                except mysql.connector.Error as err:
+                    print(f"❌ Error closing replica pool {replica.name}: {err}")
+
+    def reset(self):
+        # Forked worker: drop the parent's pools and counters, keep the endpoints
+        self.__init__([(replica.host, replica.port) for replica in self.replicas])
+
+    def _pick(self):
+        now = time.monotonic()
+        with self._lock:
+            healthy = [replica for replica in self.replicas if replica.ejected_until <= now]
+            if not healthy:
+                return None
+            start = self._next % len(healthy)
+            self._next += 1
+            replica = min(healthy[start:] + healthy[:start], key=lambda replica: replica.in_use)
+            replica.in_use += 1
+            return replica
+
+    def _connect(self, replica):
+        try:
+            pool = replica.pool or self._build_pool(replica)
+            if pool is None:
+                return None  # another thread is still opening it: try another replica or the primary
+            conn = pool.get_connection()
+        except mysql.connector.errors.PoolError:
+            return None  # busy, not broken: try another replica or the primary
+        except mysql.connector.Error as err:
+            self.eject(replica, str(err))
+            return None
+
+        if time.monotonic() - replica.checked_at >= Config.DB_REPLICA_CHECK_INTERVAL and self._check_due(replica):
+            problem = self._replication_problem(replica, conn)
+            if problem:
+                conn.close()
+                self.eject(replica, problem)
+                return None
+        return conn
+
+    def _build_pool(self, replica):
+        """
+        Open the replica's pool. Opening its connections can take up to DB_CONNECT_TIMEOUT
+        each (a dead host), so this runs outside self._lock: reads from the other replicas
+        go on meanwhile, and only the finished pool is swapped in under it. None if another
+        thread is already building it.
+        """
+        if not replica.pool_lock.acquire(blocking=False):
+            return None
+        try:
+            if replica.pool is None:
+                pool = pooling.MySQLConnectionPool(
+                    pool_name=f"{Config.DB_POOL_NAME}_replica{replica.index}",
+                    pool_size=Config.DB_REPLICA_POOL_SIZE,
+                    pool_reset_session=False,  # see Database.get_pool
+                    host=replica.host,
+                    port=replica.port,
+                    user=Config.DB_USER,
+                    password=Config.DB_PASSWORD,
+                    database=Config.DB_NAME,
+                    connection_timeout=Config.DB_CONNECT_TIMEOUT
+                )
+                with self._lock:
+                    replica.pool = pool
+            return replica.pool
+        finally:
+            replica.pool_lock.release()
+
+    def _check_due(self, replica):
+        # Only one caller checks; the others keep using the replica meanwhile
+        with self._lock:
+            now = time.monotonic()
+            if now - replica.checked_at < Config.DB_REPLICA_CHECK_INTERVAL:
+                return False
+            replica.checked_at = now
+            return True
+
+    def _replication_problem(self, replica, conn):
+        """
+        Why this replica should not serve reads right now, or None.
+        """
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("SHOW REPLICA STATUS")
+            rows = cursor.fetchall()
+        except mysql.connector.errors.ProgrammingError:
+            # e.g. no REPLICATION CLIENT privilege: reachable is all we can tell
+            replica.lag = None
+            return None
+        except mysql.connector.Error as err:
+            return str(err)
+        if not rows:
+            replica.lag = None  # not replicating from anything (a plain second server)
+            return None
+        lag = rows[0].get('Seconds_Behind_Source')
+        replica.lag = lag
+        if lag is None:
+            return "replication is not running"
+        if Config.DB_REPLICA_MAX_LAG and lag > Config.DB_REPLICA_MAX_LAG:
+            return f"{lag}s behind the primary"
+        return None
+
+replicas = ReplicaSet(ReplicaSet.parse(Config.DB_REPLICAS))
+after_fork(replicas.reset)
+
+def primary_required():
+    """
+    True if reads in the current request must see its own (or the user's recent) writes.
+    """
+    if not has_request_context():
+        return False
+    if request.method not in READ_METHODS:
+        return True
+    return session.get(SESSION_KEY, 0) > time.time()
+
+def init_app(app):
+    """
+    Remember each write request in the user's session (only when replicas are configured).
+    """
+    @app.after_request
+    def stick_to_primary(response):
+        if request.method not in READ_METHODS:
+            session[SESSION_KEY] = time.time() + Config.DB_STICKY_SECONDS
+        return response
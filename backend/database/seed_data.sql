@@ -9,7 +9,13 @@ TRUNCATE TABLE Publishers;
 TRUNCATE TABLE Book_Authors;
 TRUNCATE TABLE Users;
 TRUNCATE TABLE Shopping_Cart;
+TRUNCATE TABLE Cart_Summary;
+TRUNCATE TABLE Stock_Reservations;
 TRUNCATE TABLE Customer_Orders;
+TRUNCATE TABLE Book_Search;
+TRUNCATE TABLE Sales_Daily;
+TRUNCATE TABLE Book_Sales_Daily;
+TRUNCATE TABLE Customer_Spend_Daily;
 
 SET FOREIGN_KEY_CHECKS = 1;
 -- =============================================
@@ -203,6 +209,37 @@ INSERT INTO Books (isbn, title, publisher_id, pub_year, selling_price, category,
 ('978-0-CHEAPBOOK1', 'Budget Read', 1, 2023, 1.99, 'Geography', 100, 20);
 INSERT INTO Book_Authors (isbn, author_id) VALUES ('978-0-CHEAPBOOK1', 10);
 
+-- =============================================
+-- 11. SEARCH INDEX (Build documents for all seeded books)
+-- =============================================
+INSERT INTO Book_Search (isbn, title, authors, publisher_name)
+SELECT b.isbn, b.title, GROUP_CONCAT(a.author_name SEPARATOR ', '), p.name
+FROM Books b
+JOIN Publishers p ON b.publisher_id = p.publisher_id
+LEFT JOIN Book_Authors ba ON b.isbn = ba.isbn
+LEFT JOIN Authors a ON ba.author_id = a.author_id
+GROUP BY b.isbn;
+
+-- =============================================
+-- 12. SALES ROLLUPS (Backfill from the seeded orders)
+-- =============================================
+INSERT INTO Sales_Daily (sale_date, order_count, total_sales)
+SELECT DATE(order_date), COUNT(*), COALESCE(SUM(total_price), 0)
+FROM Customer_Orders
+GROUP BY DATE(order_date);
+
+INSERT INTO Book_Sales_Daily (sale_date, isbn, units)
+SELECT DATE(co.order_date), oi.isbn, SUM(oi.quantity)
+FROM Customer_Orders co
+JOIN Order_Items oi ON oi.order_id = co.order_id
+GROUP BY DATE(co.order_date), oi.isbn;
+
+INSERT INTO Customer_Spend_Daily (sale_date, user_id, order_count, total_spent)
+SELECT DATE(order_date), user_id, COUNT(*), COALESCE(SUM(total_price), 0)
+FROM Customer_Orders
+WHERE user_id IS NOT NULL
+GROUP BY DATE(order_date), user_id;
+
 -- =============================================
 -- VERIFICATION QUERIES (Optional - for testing)
 -- =============================================
@@ -0,0 +1,188 @@
+import threading
+from collections import OrderedDict
+
+import mysql.connector
+from mysql.connector import pooling
+from config import Config
+from database import records, trace
+from utils.forking import after_fork
+
+try:
+    from mysql.connector.connection_cext import CMySQLConnection
+except ImportError:  # connector installed without its C extension
+    CMySQLConnection = None
+
+# Server-side prepared statements for the hot queries (book details, login, add to cart,
+# checkout, search).
+#
+# A plain execute() sends the SQL text with the values inlined, and the server parses
+# and resolves it every time. Here a statement is prepared once per MySQL session
+# (COM_STMT_PREPARE) and later calls only send its id and the values, in binary.
+# Each pooled connection keeps its prepared cursors in an LRU keyed by statement text,
+# at most Config.DB_STATEMENT_CACHE_SIZE of them, from one checkout to the next; the
+# least recently used one is closed on the server when a new one doesn't fit.
+#
+# Statements only live as long as their session, so:
+# - the pools don't reset sessions on release (COM_RESET_CONNECTION deallocates every
+#   prepared statement). Database.release clears the session state itself: open
+#   transactions are rolled back, and settings changed with Database.set_session are
+#   put back to their defaults;
+# - only on the C extension connection (CMySQLConnection). The pure-Python prepared
+#   cursor sends a COM_STMT_RESET before every execute, a round trip that costs more than
+#   the parse it saves: without the C extension everything uses the text protocol
+#   (python -m benchmarks.bench_prepared compares the paths);
+# - a connection the pool reconnected is a new session (new connection id): its cache
+#   is dropped. A statement the server no longer knows is prepared again once.
+#
+# The results are read in full before returning (a prepared cursor is reused by the next
+# call), so use these for lookups and writes, not for streaming big results.
+#     rows = statements.fetch_all(conn, QUERY, (isbn,), dictionary=True)
+#     cursor = statements.execute(conn, INSERT, (user_id, isbn, quantity))  # rowcount, lastrowid
+
+# Errors meaning the statement is gone on the server side: prepare it again
+STALE_STATEMENT_ERRORS = (
+    1243,  # ER_UNKNOWN_STMT_HANDLER
+    1615,  # ER_NEED_REPREPARE
+    2030,  # CR_NO_PREPARE_STMT (client handle from before a reconnect)
+)
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'prepares': 0, 'evictions': 0, 'reprepares': 0, 'sessions_dropped': 0}
+
+class StatementCache:
+    """
+    The prepared cursors of one MySQL session, least recently used first.
+    """
+    def __init__(self, connection_id, maxsize):
+        self.connection_id = connection_id
+        self.maxsize = maxsize
+        self._cursors = OrderedDict()  # (sql, dictionary) -> (sql, cursor)
+
+    def get(self, key):
+        entry = self._cursors.get(key)
+        if entry is not None:
+            self._cursors.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        self._cursors[key] = entry
+        while len(self._cursors) > self.maxsize:
+            _, (_, cursor) = self._cursors.popitem(last=False)
+            _close(cursor)
+            _count('evictions')
+
+    def drop(self, key):
+        entry = self._cursors.pop(key, None)
+        if entry is not None:
+            _close(entry[1])
+
+    def __len__(self):
+        return len(self._cursors)
+
+def session(conn):
+    """
+    The underlying MySQL connection of a pooled (and possibly traced) connection.
+    """
+    if isinstance(conn, trace.TracedConnection):
+        conn = conn._conn
+    if isinstance(conn, pooling.PooledMySQLConnection):
+        conn = conn._cnx
+    return conn
+
+def enabled(conn):
+    """
+    True if statements on this connection go through the cache (on, and the C extension).
+    """
+    return (Config.DB_STATEMENT_CACHE_SIZE > 0 and CMySQLConnection is not None
+            and isinstance(session(conn), CMySQLConnection))
+
+def execute(conn, sql, params=()):
+    """
+    Run a statement without a result set (INSERT/UPDATE/DELETE); returns the cursor
+    for rowcount and lastrowid.
+    """
+    cursor = _run(conn, sql, params, False)
+    if cursor.with_rows:
+        cursor.fetchall()
+    return cursor
+
+def fetch_all(conn, sql, params=(), dictionary=False):
+    """
+    All rows of a query, as tuples (or dicts).
+    """
+    return _run(conn, sql, params, dictionary).fetchall()
+
+def fetch_records(conn, sql, params=()):
+    """
+    All rows of a query, as records.Results.
+    """
+    cursor = _run(conn, sql, params, False)
+    return records.Results(cursor.column_names, cursor.fetchall())
+
+def canonical(sql):
+    """
+    sql with its whitespace collapsed, for statements assembled at run time: every
+    query of the same shape then has the same text, and one cache entry.
+    """
+    return ' '.join(sql.split())
+
+def stats():
+    with _stats_lock:
+        return dict(_stats, cache_size=Config.DB_STATEMENT_CACHE_SIZE)
+
+def _run(conn, sql, params, dictionary):
+    if not enabled(conn):
+        cursor = conn.cursor(dictionary=dictionary)
+        cursor.execute(sql, params)
+        return cursor
+
+    cache = _cache(conn)
+    key = (sql, dictionary)
+    entry = cache.get(key)
+    if entry is None:
+        entry = (sql, conn.cursor(prepared=True, dictionary=dictionary))
+        cache.put(key, entry)
+        _count('prepares')
+    else:
+        _count('hits')
+
+    # The cursor re-prepares unless it gets the very str object it prepared
+    cached_sql, cursor = entry
+    try:
+        cursor.execute(cached_sql, params)
+    except mysql.connector.Error as err:
+        if err.errno not in STALE_STATEMENT_ERRORS:
+            raise
+        cache.drop(key)
+        cursor = conn.cursor(prepared=True, dictionary=dictionary)
+        cache.put(key, (sql, cursor))
+        _count('reprepares')
+        cursor.execute(sql, params)
+    return cursor
+
+def _cache(conn):
+    raw = session(conn)
+    connection_id = raw.connection_id
+    cache = getattr(raw, 'statement_cache', None)
+    if cache is None or cache.connection_id != connection_id:
+        if cache is not None:
+            _count('sessions_dropped')  # reconnected: the old statements died with the session
+        cache = raw.statement_cache = StatementCache(connection_id, Config.DB_STATEMENT_CACHE_SIZE)
+    return cache
+
+def _close(cursor):
+    try:
+        cursor.close()  # deallocates the statement on the server
+    except (mysql.connector.Error, ReferenceError):
+        pass
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+@after_fork
+def _reset_stats_after_fork():
+    global _stats_lock
+    _stats_lock = threading.Lock()
+    for name in _stats:
+        _stats[name] = 0
@@ -0,0 +1,255 @@
+import re
+import time
+import logging
+import threading
+from collections import deque
+from functools import lru_cache
+
+from flask import g, has_request_context, request
+from config import Config
+from utils.forking import after_fork
+
+# SQL tracing (Config.SQL_TRACE). When it is off, db_connection() hands out the raw
+# connection and nothing here runs. When it is on, every cursor.execute() is timed
+# and recorded three ways:
+#   - per Flask request: query count, DB time and each statement (Server-Timing header,
+#     and the RECENT_REQUESTS buffer shown by /admin/sql-stats)
+#   - per normalized statement: count / total / max time since startup (or the last reset)
+#   - statements slower than Config.SLOW_QUERY_MS go to the slow query log with their
+#     EXPLAIN plan, captured after the request has released its own connection
+# Times cover execute() plus fetches; the slow check only sees the execute() part.
+
+slow_log = logging.getLogger('bookstore.slow_sql')
+
+_lock = threading.Lock()
+_statements = {}  # normalized SQL -> {'count', 'total_ms', 'max_ms', 'slow'}
+RECENT_REQUESTS = deque(maxlen=Config.SQL_TRACE_RECENT)
+_last_explained = {}  # normalized SQL -> time.monotonic() of its last EXPLAIN
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))+\s*\)")   # IN (%s, %s, ...)
+_ROWS = re.compile(r"(\([^()]*\))(?:\s*,\s*\1)+")                 # VALUES (..), (..), ...
+_SPACE = re.compile(r"\s+")
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+@lru_cache(maxsize=2048)
+def normalize(sql):
+    """
+    Statement text with literals replaced and variable-length lists folded, so the
+    same query always has the same key: IN (%s, %s, %s) -> IN (...)
+    """
+    if isinstance(sql, bytes):
+        sql = sql.decode('utf-8', 'replace')
+    sql = _SPACE.sub(' ', sql).strip()
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _LIST.sub('(...)', sql)
+    return _ROWS.sub(r'\1, ...', sql)
+
+def record(sql, params, elapsed, many=False):
+    ms = elapsed * 1000
+    key = normalize(sql)
+    with _lock:
+        stats = _statements.get(key)
+        if stats is None:
+            if len(_statements) >= Config.SQL_TRACE_MAX_STATEMENTS:
+                key = '(other statements)'
+                stats = _statements.get(key)
+            if stats is None:
+                stats = _statements[key] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'slow': 0}
+        stats['count'] += 1
+        stats['total_ms'] += ms
+        stats['max_ms'] = max(stats['max_ms'], ms)
+        slow = ms >= Config.SLOW_QUERY_MS
+        if slow:
+            stats['slow'] += 1
+
+    in_request = has_request_context()
+    if in_request:
+        trace = g.get('sql_trace')
+        if trace is None:
+            trace = g.sql_trace = {'count': 0, 'ms': 0.0, 'statements': [], 'slow': []}
+        trace['count'] += 1
+        trace['ms'] += ms
+        trace['statements'].append([key, round(ms, 3)])
+    if slow:
+        entry = (key, sql, None if many else params, ms)
+        if in_request:
+            trace['slow'].append(entry)  # explained once the request is done
+        else:
+            _log_slow([entry], None)
+    return key
+
+def add_fetch_time(key, elapsed):
+    """
+    Fetch time of a statement's rows, added to the statement and request totals.
+    """
+    ms = elapsed * 1000
+    with _lock:
+        stats = _statements.get(key)
+        if stats is not None:
+            stats['total_ms'] += ms
+            stats['max_ms'] = max(stats['max_ms'], ms)
+    if has_request_context():
+        trace = g.get('sql_trace')
+        if trace is not None:
+            trace['ms'] += ms
+            if trace['statements'] and trace['statements'][-1][0] == key:
+                trace['statements'][-1][1] = round(trace['statements'][-1][1] + ms, 3)
+
+class TracedCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._key = None
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            self._key = record(operation, params, time.perf_counter() - start)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            self._key = record(operation, None, time.perf_counter() - start, many=True)
+
+    def _timed_fetch(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return getattr(self._cursor, method)(*args)
+        finally:
+            if self._key:
+                add_fetch_time(self._key, time.perf_counter() - start)
+
+    def fetchone(self):
+        return self._timed_fetch('fetchone')
+
+    def fetchall(self):
+        return self._timed_fetch('fetchall')
+
+    def fetchmany(self, *args):
+        return self._timed_fetch('fetchmany', *args)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class TracedConnection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *args, **kwargs):
+        return TracedCursor(self._conn.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+def wrap(conn):
+    return TracedConnection(conn)
+
+def top_statements(limit=20):
+    with _lock:
+        rows = [dict(stats, statement=key, avg_ms=stats['total_ms'] / stats['count'])
+                for key, stats in _statements.items()]
+    rows.sort(key=lambda row: row['total_ms'], reverse=True)
+    for row in rows:
+        for field in ('total_ms', 'max_ms', 'avg_ms'):
+            row[field] = round(row[field], 3)
+    return rows[:limit]
+
+def reset():
+    with _lock:
+        _statements.clear()
+        _last_explained.clear()
+    RECENT_REQUESTS.clear()
+
+@after_fork
+def _reset_after_fork():
+    # Statistics are per process; the parent's lock may have been held by one of its threads
+    global _lock
+    _lock = threading.Lock()
+    reset()
+
+def _explain(conn, sql, params):
+    if params is None and '%s' in sql:
+        return None
+    if normalize(sql).split(' ', 1)[0].upper() not in _EXPLAINABLE:
+        return None
+    cursor = conn.cursor()
+    try:
+        cursor.execute('EXPLAIN ' + sql, params)
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+def _log_slow(entries, where):
+    # Separate, untraced connection: the slow statement's own connection may be mid-result
+    from database.connection import Database
+
+    conn = None
+    try:
+        for key, sql, params, ms in entries:
+            plan = None
+            now = time.monotonic()
+            with _lock:
+                due = now - _last_explained.get(key, float('-inf')) >= Config.SLOW_QUERY_EXPLAIN_INTERVAL
+                if due:
+                    _last_explained[key] = now
+            if due:
+                try:
+                    if conn is None:
+                        conn = Database.get_connection()
+                    if conn is not None:
+                        plan = _explain(conn, sql, params)
+                except Exception as e:
+                    plan = f"EXPLAIN failed: {e}"
+
+            lines = [f"SLOW {ms:.1f} ms{' ' + where if where else ''}", f"  {key}"]
+            if isinstance(plan, list):
+                for row in plan:
+                    lines.append("  plan: " + ", ".join(f"{k}={v}" for k, v in row.items() if v is not None))
+            elif plan:
+                lines.append(f"  {plan}")
+            slow_log.warning("\n".join(lines))
+    finally:
+        if conn is not None:
+            Database.release(conn)
+
+def init_app(app):
+    """
+    Hook the per-request trace into app (only called when Config.SQL_TRACE is on).
+    """
+    if Config.SLOW_QUERY_LOG and not slow_log.handlers:
+        handler = logging.FileHandler(Config.SLOW_QUERY_LOG)
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        slow_log.addHandler(handler)
+    slow_log.setLevel(logging.WARNING)
+
+    @app.after_request
+    def add_server_timing(response):
+        trace = g.get('sql_trace')
+        if trace:
+            response.headers.add('Server-Timing', f'db;dur={trace["ms"]:.1f};desc="{trace["count"]} queries"')
+        return response
+
+    @app.teardown_request
+    def finish_request_trace(exc):
+        trace = g.pop('sql_trace', None)
+        if not trace:
+            return
+        where = f"{request.method} {request.path}"
+        RECENT_REQUESTS.append({
+            'request': where,
+            'queries': trace['count'],
+            'db_ms': round(trace['ms'], 3),
+            'statements': trace['statements'],
+        })
+        if trace['slow']:
+            _log_slow(trace['slow'], where)
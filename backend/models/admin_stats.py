@@ -0,0 +1,113 @@
+import time
+import threading
+from config import Config
+from database.connection import db_connection
+from utils import change_stamps
+from utils.forking import after_fork
+
+BOOKS_QUERY = "SELECT COUNT(*) as count FROM Books"
+CUSTOMERS_QUERY = "SELECT COUNT(*) as count FROM Users WHERE role = 'customer'"
+# Publisher orders by status in one pass
+PUBLISHER_ORDERS_QUERY = "SELECT status, COUNT(*) as count FROM Publisher_Orders GROUP BY status"
+# Sales of the last 30 days, from the daily rollup
+MONTHLY_SALES_QUERY = """
+    SELECT COALESCE(SUM(total_sales), 0) as total
+    FROM Sales_Daily
+    WHERE sale_date >= DATE_SUB(CURRENT_DATE, INTERVAL 1 MONTH)
+"""
+# stock < threshold compares two columns, so no index range can find the rows; scan
+# the narrow (stock, threshold) index instead of the whole table, then fetch only
+# the low books by primary key
+LOW_STOCK_QUERY = """
+    SELECT b.* FROM (
+        SELECT isbn FROM Books FORCE INDEX (idx_books_stock_threshold)
+        WHERE stock < threshold
+    ) AS low
+    JOIN Books b ON b.isbn = low.isbn
+"""
+
+class AdminStats:
+    """
+    In-memory snapshot of the admin dashboard/orders counters.
+
+    The snapshot is recomputed when it is older than Config.STATS_TTL, or on the next
+    read after a write that changes its counts or lists (models call AdminStats.invalidate()
+    after commit: books, users, publisher orders, and an order that takes a book below its
+    threshold). Orders alone don't invalidate it, so under steady sales traffic the
+    monthly sales figure is up to STATS_TTL old instead of every view recomputing.
+    Only one request recomputes at a time; the others wait for its result instead of
+    all hitting the database. Each worker process keeps its own snapshot; invalidate()
+    bumps a shared change stamp, so a write through any worker makes all of them stale.
+    """
+    _snapshot = None
+    _loaded_at = float('-inf')  # change_stamps.now() when the snapshot's queries started
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get():
+        """
+        Dict with total_books, total_customers, pending_orders, confirmed_orders,
+        total_publisher_orders, monthly_sales and low_stock_books.
+        """
+        if not AdminStats._is_fresh():
+            with AdminStats._lock:
+                if not AdminStats._is_fresh():
+                    read_at = change_stamps.now()
+                    snapshot = AdminStats._load()
+                    if snapshot is None:
+                        # Database down: serve the last snapshot if there is one
+                        return AdminStats._snapshot
+                    AdminStats._snapshot = snapshot
+                    AdminStats._loaded_at = read_at
+        return AdminStats._snapshot
+
+    @staticmethod
+    def invalidate():
+        """
+        Mark the snapshot stale, in every worker, after a committed write (new book, user, restock...).
+        """
+        change_stamps.changed(change_stamps.ADMIN_STATS)
+
+    @staticmethod
+    def _is_fresh():
+        return (AdminStats._snapshot is not None
+                and time.monotonic() - AdminStats._loaded_at < Config.STATS_TTL
+                and change_stamps.fresh((change_stamps.ADMIN_STATS,), AdminStats._loaded_at))
+
+    @staticmethod
+    def _load():
+        with db_connection() as conn:
+            if not conn:
+                return None
+            cursor = conn.cursor(dictionary=True)
+
+            cursor.execute(BOOKS_QUERY)
+            book_count = cursor.fetchone()['count']
+
+            cursor.execute(CUSTOMERS_QUERY)
+            user_count = cursor.fetchone()['count']
+
+            cursor.execute(PUBLISHER_ORDERS_QUERY)
+            po_counts = {row['status']: row['count'] for row in cursor.fetchall()}
+
+            cursor.execute(MONTHLY_SALES_QUERY)
+            monthly_sales = cursor.fetchone()['total']
+
+            cursor.execute(LOW_STOCK_QUERY)
+            low_stock_books = cursor.fetchall()
+
+        return {
+            'total_books': book_count,
+            'total_customers': user_count,
+            'pending_orders': po_counts.get('Pending', 0),
+            'confirmed_orders': po_counts.get('Confirmed', 0),
+            'total_publisher_orders': sum(po_counts.values()),
+            'monthly_sales': monthly_sales,
+            'low_stock_books': low_stock_books
+        }
+
+@after_fork
+def _reset_snapshot_after_fork():
+    AdminStats._snapshot = None
+    AdminStats._loaded_at = float('-inf')
+    AdminStats._lock = threading.Lock()
@@ -0,0 +1,88 @@
+from config import Config
+from utils.cache import LRUCache
+
+# name_key -> author_id. Only filled with ids from committed transactions (see remember),
+# so a rolled-back insert can never leave a dangling id behind.
+author_id_cache = LRUCache('author_ids', Config.AUTHOR_CACHE_SIZE, Config.AUTHOR_CACHE_TTL)
+
+LOOKUP_QUERY = "SELECT name_key, author_id FROM Authors WHERE name_key IN ({placeholders})"
+
+class Author:
+    """
+    Author name -> author_id resolution over the unique Authors.name_key index.
+
+    name_key is LOWER(TRIM(author_name)), so "J.K. Rowling" and "j.k. rowling "
+    are the same author.
+    """
+
+    @staticmethod
+    def normalize(name):
+        """
+        Display form of an author name: trimmed, inner whitespace collapsed.
+        """
+        return ' '.join(str(name).split())
+
+    @staticmethod
+    def key(name):
+        return Author.normalize(name).lower()
+
+    @staticmethod
+    def resolve(cursor, names):
+        """
+        author_id for every name, creating the missing authors.
+        Returns {name_key: author_id}. cursor must be a plain (tuple) cursor. Call inside
+        the caller's transaction and pass the result to Author.remember() after it commits.
+
+        Costs at most three statements whatever the number of names or authors:
+        one indexed lookup, one multi-row INSERT of the new names, one lookup of those.
+        """
+        wanted = {}
+        for name in names:
+            name = Author.normalize(name)
+            if name:
+                wanted.setdefault(name.lower(), name)
+
+        ids = {}
+        for key in wanted:
+            author_id = author_id_cache.get(key)
+            if author_id is not None:
+                ids[key] = author_id
+        missing = [key for key in wanted if key not in ids]
+        if not missing:
+            return ids
+
+        Author._lookup(cursor, missing, ids)
+        new = [key for key in missing if key not in ids]
+        if new:
+            placeholders = ", ".join(["(%s)"] * len(new))
+            # A concurrent request may create the same author first: the unique key makes that a no-op
+            cursor.execute(f"""
+                INSERT INTO Authors (author_name) VALUES {placeholders}
+                ON DUPLICATE KEY UPDATE author_id = author_id
+            """, [wanted[key] for key in new])
+            Author._lookup(cursor, new, ids, exact=False)
+        return ids
+
+    @staticmethod
+    def remember(ids):
+        """
+        Cache the {name_key: author_id} result of resolve() once its transaction committed.
+        """
+        for key, author_id in ids.items():
+            author_id_cache.set(key, author_id)
+
+    @staticmethod
+    def _lookup(cursor, keys, ids, exact=True):
+        placeholders = ", ".join(["%s"] * len(keys))
+        cursor.execute(LOOKUP_QUERY.format(placeholders=placeholders), keys)
+        found = dict(cursor.fetchall())
+        for key in keys:
+            if key in found:
+                ids[key] = found[key]
+            elif not exact:
+                # The column collation also folds accents ("jose" = "josé"), so the stored
+                # key can be spelled differently from ours; ask for that one row directly
+                cursor.execute("SELECT author_id FROM Authors WHERE name_key = %s", (key,))
+                row = cursor.fetchone()
+                if row:
+                    ids[key] = row[0]
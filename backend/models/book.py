@@ -1,4 +1,33 @@
-from database.connection import get_db_connection
+from config import Config
+from database.connection import db_connection
+from database import records, statements
+from models.search import BookSearch
+from models.author import Author
+from models.cart import Cart
+from models.admin_stats import AdminStats
+from models.leaderboards import Leaderboards
+from utils.cache import LRUCache
+from utils import change_stamps, http_cache
+
+# Read-through cache for get_book_details, keyed by ISBN: (read_at, details).
+# Writers that change a book's row must call Book.invalidate_cache (details) or
+# Book.stock_changed (stock only). Both bump the book's change stamp, which every worker
+# checks on a hit, so a copy cached by another worker is not served after the change.
+book_cache = LRUCache('book_details', Config.BOOK_CACHE_SIZE, Config.BOOK_CACHE_TTL)
+
+# Queries shared with database/plan_check.py
+LIST_QUERY = "SELECT * FROM Books ORDER BY isbn LIMIT %s"
+LIST_AFTER_QUERY = "SELECT * FROM Books WHERE isbn > %s ORDER BY isbn LIMIT %s"
+DETAILS_QUERY = """
+    SELECT b.*, p.name as publisher_name, GROUP_CONCAT(a.author_name SEPARATOR ', ') as authors
+    FROM Books b
+    JOIN Publishers p ON b.publisher_id = p.publisher_id
+    JOIN Book_Authors ba ON b.isbn = ba.isbn
+    JOIN Authors a ON ba.author_id = a.author_id
+    WHERE b.isbn = %s
+    GROUP BY b.isbn
+"""
+AUTHOR_IDS_QUERY = "SELECT author_id FROM Book_Authors WHERE isbn = %s"
 
 class Book:
     @staticmethod
@@ -7,200 +36,172 @@ class Book:
         Add a new book and its authors.
         authors: list of author names (string)
         """
-        conn = get_db_connection()
-        if not conn:
-            return False, "Database connection error"
-        
-        try:
-            cursor = conn.cursor()
-            conn.start_transaction()
-
-            # Insert Book
-            query_book = """
-                INSERT INTO Books (isbn, title, publisher_id, pub_year, selling_price, category, stock, threshold)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            # Initially stock is 0? or perhaps user provides it? Schema says default 0. 
-            # The prompt says 'stock' is not in the 'add_book' fields in file-structure? 
-            # Wait, file-structure line 196: "Add Book: Form with all book fields + threshold". 
-            # Let's assume stock starts at 0 or we can add it. 
-            # I'll stick to 0 default for new books as per typical flow unless specified.
-            stock = 0
-            cursor.execute(query_book, (isbn, title, publisher_id, pub_year, selling_price, category, stock, threshold))
-
-            # Handle Authors
-            for author_name in authors:
-                # Check if author exists
-                cursor.execute("SELECT author_id FROM Authors WHERE author_name = %s", (author_name,))
-                author_row = cursor.fetchone()
-                if author_row:
-                     author_id = author_row[0]
-                else:
-                    cursor.execute("INSERT INTO Authors (author_name) VALUES (%s)", (author_name,))
-                    author_id = cursor.lastrowid
-                
-                # Link Book-Author
-                cursor.execute("INSERT INTO Book_Authors (isbn, author_id) VALUES (%s, %s)", (isbn, author_id))
-
-            conn.commit()
-            return True, "Book added successfully"
-        except Exception as e:
-            conn.rollback()
-            return False, str(e)
-        finally:
-             if conn.is_connected():
-                cursor.close()
-                conn.close()
+        with db_connection() as conn:
+            if not conn:
+                return False, "Database connection error"
+
+            try:
+                cursor = conn.cursor()
+                conn.start_transaction()
+
+                # Insert Book
+                query_book = """
+                    INSERT INTO Books (isbn, title, publisher_id, pub_year, selling_price, category, stock, threshold)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                """
+                # Initially stock is 0? or perhaps user provides it? Schema says default 0.
+                # The prompt says 'stock' is not in the 'add_book' fields in file-structure?
+                # Wait, file-structure line 196: "Add Book: Form with all book fields + threshold".
+                # Let's assume stock starts at 0 or we can add it.
+                # I'll stick to 0 default for new books as per typical flow unless specified.
+                stock = 0
+                cursor.execute(query_book, (isbn, title, publisher_id, pub_year, selling_price, category, stock, threshold))
+
+                # Handle Authors: look up / create all of them at once, then link
+                author_ids = Author.resolve(cursor, authors)
+                if author_ids:
+                    cursor.executemany("INSERT INTO Book_Authors (isbn, author_id) VALUES (%s, %s)",
+                                       [(isbn, author_id) for author_id in set(author_ids.values())])
+
+                # Search document (same transaction, so search never sees a half-added book)
+                BookSearch.index_book(cursor, isbn)
+
+                conn.commit()
+                Author.remember(author_ids)
+                # New book: cached search results may now be missing it
+                Book.invalidate_cache(isbn)
+                AdminStats.invalidate()
+                return True, "Book added successfully"
+            except Exception as e:
+                conn.rollback()
+                return False, str(e)
 
-    @staticmethod
     @staticmethod
     def update_book(isbn, title, publisher_id, pub_year, selling_price, category, threshold, authors):
-        conn = get_db_connection()
-        if not conn:
-            return False, "Database connection error"
-        try:
-            cursor = conn.cursor()
-            conn.start_transaction()
-
-            # Update Book Details
-            query = """
-                UPDATE Books 
-                SET title=%s, publisher_id=%s, pub_year=%s, selling_price=%s, category=%s, threshold=%s
-                WHERE isbn=%s
-            """
-            cursor.execute(query, (title, publisher_id, pub_year, selling_price, category, threshold, isbn))
-
-            # Update Authors: Simplest way is delete all for this ISBN and re-add
-            cursor.execute("DELETE FROM Book_Authors WHERE isbn = %s", (isbn,))
-            
-            for author_name in authors:
-                author_name = author_name.strip()
-                if not author_name: continue
-                
-                # Check/Add Author
-                cursor.execute("SELECT author_id FROM Authors WHERE author_name = %s", (author_name,))
-                author_row = cursor.fetchone()
-                if author_row:
-                     author_id = author_row[0]
-                else:
-                    cursor.execute("INSERT INTO Authors (author_name) VALUES (%s)", (author_name,))
-                    author_id = cursor.lastrowid
-                
-                # Link
-                cursor.execute("INSERT INTO Book_Authors (isbn, author_id) VALUES (%s, %s)", (isbn, author_id))
-
-            conn.commit()
-            return True, "Book updated"
-        except Exception as e:
-            return False, str(e)
-        finally:
-             if conn.is_connected():
-                cursor.close()
-                conn.close()
+        with db_connection() as conn:
+            if not conn:
+                return False, "Database connection error"
+            try:
+                cursor = conn.cursor()
+                conn.start_transaction()
+
+                # Update Book Details
+                query = """
+                    UPDATE Books
+                    SET title=%s, publisher_id=%s, pub_year=%s, selling_price=%s, category=%s, threshold=%s
+                    WHERE isbn=%s
+                """
+                cursor.execute(query, (title, publisher_id, pub_year, selling_price, category, threshold, isbn))
+
+                # Update Authors: only touch the links that changed
+                author_ids = Author.resolve(cursor, authors)
+                new_ids = set(author_ids.values())
+                cursor.execute(AUTHOR_IDS_QUERY, (isbn,))
+                old_ids = {row[0] for row in cursor.fetchall()}
+
+                removed = old_ids - new_ids
+                if removed:
+                    placeholders = ", ".join(["%s"] * len(removed))
+                    cursor.execute(f"DELETE FROM Book_Authors WHERE isbn = %s AND author_id IN ({placeholders})",
+                                   [isbn] + list(removed))
+                added = new_ids - old_ids
+                if added:
+                    cursor.executemany("INSERT INTO Book_Authors (isbn, author_id) VALUES (%s, %s)",
+                                       [(isbn, author_id) for author_id in added])
+
+                BookSearch.index_book(cursor, isbn)
+                # Cart subtotals of carts holding this book follow a price change
+                Cart.refresh_subtotals(cursor, isbn)
+
+                conn.commit()
+                Author.remember(author_ids)
+                Book.invalidate_cache(isbn)
+                # Threshold may have changed -> low stock list
+                AdminStats.invalidate()
+                return True, "Book updated"
+            except Exception as e:
+                conn.rollback()
+                return False, str(e)
+
+    @staticmethod
+    def search_books(query_str=None, isbn=None, title=None, author=None, publisher=None, category=None,
+                     after=None, limit=None):
+        # Ranked full-text search, see models/search.py
+        # after/limit: keyset pagination, see utils/pagination.py
+        return BookSearch.search(query_str=query_str, isbn=isbn, title=title, author=author,
+                                 publisher=publisher, category=category, after=after, limit=limit)
 
     @staticmethod
-    def search_books(query_str=None, isbn=None, title=None, author=None, publisher=None, category=None):
-        conn = get_db_connection()
-        if not conn:
-            return []
-        try:
-            cursor = conn.cursor(dictionary=True)
-            # Basic query joining authors and publishers
-            base_query = """
-                SELECT b.*, p.name as publisher_name, GROUP_CONCAT(a.author_name SEPARATOR ', ') as authors
-                FROM Books b
-                JOIN Publishers p ON b.publisher_id = p.publisher_id
-                JOIN Book_Authors ba ON b.isbn = ba.isbn
-                JOIN Authors a ON ba.author_id = a.author_id
-            """
-            
-            where_clauses = []
-            params = []
-
-            if category:
-                where_clauses.append("b.category = %s")
-                params.append(category)
-
-            # Generic query (legacy support or if we add a global search box)
-            if query_str:
-                search_term = f"%{query_str}%"
-                where_clauses.append("(b.title LIKE %s OR b.isbn LIKE %s OR a.author_name LIKE %s)")
-                params.extend([search_term, search_term, search_term])
-            
-            # Specific fields
-            if isbn:
-                where_clauses.append("b.isbn LIKE %s")
-                params.append(f"%{isbn}%")
-            
-            if title:
-                where_clauses.append("b.title LIKE %s")
-                params.append(f"%{title}%")
-                
-            if author:
-                # We need to filter where ANY of the authors match
-                where_clauses.append("a.author_name LIKE %s")
-                params.append(f"%{author}%")
-                
-            if publisher:
-                where_clauses.append("p.name LIKE %s")
-                params.append(f"%{publisher}%")
-
-            if where_clauses:
-                base_query += " WHERE " + " AND ".join(where_clauses)
-            
-            base_query += " GROUP BY b.isbn"
-            
-            cursor.execute(base_query, params)
-            return cursor.fetchall()
-        finally:
-             if conn.is_connected():
-                cursor.close()
-                conn.close()
+    def search_cursor_key(row):
+        return BookSearch.cursor_key(row)
+
+    @staticmethod
+    def list_books(after_isbn=None, limit=20):
+        """
+        One page of the catalog in ISBN order, starting after after_isbn.
+        """
+        with db_connection(readonly=True) as conn:
+            if not conn:
+                return []
+            cursor = conn.cursor()
+            if after_isbn:
+                cursor.execute(LIST_AFTER_QUERY, (after_isbn, limit))
+            else:
+                cursor.execute(LIST_QUERY, (limit,))
+            return records.fetch_all(cursor)
 
     @staticmethod
     def get_book_details(isbn):
-        conn = get_db_connection()
-        if not conn:
-            return None
-        try:
-            cursor = conn.cursor(dictionary=True)
-            query = """
-                SELECT b.*, p.name as publisher_name, GROUP_CONCAT(a.author_name SEPARATOR ', ') as authors
-                FROM Books b
-                JOIN Publishers p ON b.publisher_id = p.publisher_id
-                JOIN Book_Authors ba ON b.isbn = ba.isbn
-                JOIN Authors a ON ba.author_id = a.author_id
-                WHERE b.isbn = %s
-                GROUP BY b.isbn
-            """
-            cursor.execute(query, (isbn,))
-            return cursor.fetchone()
-        finally:
-             if conn.is_connected():
-                cursor.close()
-                conn.close()
+        book_slots = change_stamps.slots([isbn])
+        cached = book_cache.get(isbn)
+        if cached is not None:
+            read_at, book = cached
+            if change_stamps.fresh(book_slots, read_at):
+                return dict(book)  # copy, so callers can't modify the cached record
+            book_cache.invalidate(isbn)
+
+        # A replica may not have this book's last change yet: read it from the primary for a
+        # moment after it changed (a sale, a delivery, an edit), so no cache is refilled with
+        # the old row. Every other book keeps reading from the replicas.
+        read_at = change_stamps.now()
+        with db_connection(readonly=not change_stamps.changed_within(Config.DB_STICKY_SECONDS, isbn)) as conn:
+            if not conn:
+                return None
+            rows = statements.fetch_all(conn, DETAILS_QUERY, (isbn,), dictionary=True)
+            book = rows[0] if rows else None
+
+        if book:
+            # Not cached if the book changed while it was being read (this copy may be older)
+            if change_stamps.fresh(book_slots, read_at):
+                book_cache.set(isbn, (read_at, book))
+            return dict(book)
+        return book
+
+    @staticmethod
+    def invalidate_cache(*isbns):
+        """
+        Drop cached details (and cached API responses) after a committed change to these books
+        or a book added: cached search results may all be affected.
+        """
+        book_cache.invalidate(*isbns)
+        http_cache.invalidate_books(*isbns)
+
+    @staticmethod
+    def stock_changed(*isbns):
+        """
+        Like invalidate_cache, after a committed change to the stock of these books only
+        (a sale, a delivery): cached search pages without them stay valid.
+        """
+        book_cache.invalidate(*isbns)
+        http_cache.stock_changed(*isbns)
+
+    @staticmethod
+    def get_top_selling_books(limit=None):
+        # Copies sold per book over the last LEADERBOARD_WINDOW_DAYS (admin report: summed
+        # from the rollups, so orders taken by other workers count)
+        return Leaderboards.report_top_books(limit)
 
     @staticmethod
-    def get_top_selling_books(limit=10):
-        conn = get_db_connection()
-        if not conn: return []
-        try:
-            cursor = conn.cursor(dictionary=True)
-            # Sum quantity from Order_Items joined with Customer_Orders (for date filter if needed)
-            # db.sql line 185 shows simple check, but for top selling we need aggregate
-            query = """
-                SELECT b.isbn, b.title, SUM(oi.quantity) as copies_sold
-                FROM Books b
-                JOIN Order_Items oi ON b.isbn = oi.isbn
-                JOIN Customer_Orders co ON oi.order_id = co.order_id
-                WHERE co.order_date >= DATE_SUB(NOW(), INTERVAL 3 MONTH)
-                GROUP BY b.isbn
-                ORDER BY copies_sold DESC
-                LIMIT %s
-            """
-            cursor.execute(query, (limit,))
-            return cursor.fetchall()
-        finally:
-             if conn.is_connected():
-                cursor.close()
-                conn.close()
+    def get_trending_books(limit=None):
+        # Same, over the last TRENDING_WINDOW_DAYS (storefront "trending now")
+        return Leaderboards.trending_books(limit)
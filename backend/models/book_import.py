@@ -0,0 +1,243 @@
+import csv
+import json
+import time
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from config import Config
+from database.connection import db_connection
+from models.book import Book
+from models.search import BookSearch
+from models.author import Author
+from models.admin_stats import AdminStats
+from utils.validators import validate_isbn
+
+CATEGORIES = ('Science', 'Art', 'Religion', 'History', 'Geography')
+
+# Columns (CSV header / JSON keys). publisher may be a publisher name or id;
+# authors is a comma-separated string (like the add-book form) or a JSON list.
+REQUIRED_FIELDS = ('isbn', 'title', 'publisher', 'pub_year', 'selling_price', 'category', 'authors')
+
+MAX_PRICE = Decimal('99999999.99')  # DECIMAL(10, 2)
+MAX_INT = 2 ** 31 - 1
+
+BOOK_INSERT = """
+    INSERT INTO Books (isbn, title, publisher_id, pub_year, selling_price, category, stock, threshold)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+LINK_INSERT = "INSERT INTO Book_Authors (isbn, author_id) VALUES (%s, %s)"
+PUBLISHERS_QUERY = "SELECT publisher_id, name FROM Publishers"
+EXISTING_QUERY = "SELECT isbn FROM Books WHERE isbn IN ({placeholders})"
+
+class BookImport:
+    """
+    Streaming bulk import of books and their authors from CSV or JSONL.
+
+    Rows are validated one by one; valid rows are written in batches of
+    Config.IMPORT_BATCH_SIZE, one transaction per batch: all author names of the
+    batch are resolved at once (Author.resolve), then books, Book_Authors links
+    and search documents go in as multi-row statements.
+    A bad row is reported and the rest of the file still loads; if a batch fails anyway,
+    its rows are retried one transaction each so only the rows at fault are reported.
+    """
+
+    @staticmethod
+    def detect_format(filename):
+        return 'jsonl' if filename and filename.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+    @staticmethod
+    def read_rows(stream, fmt):
+        """
+        Yields (line_number, row_dict, parse_error) from a text stream.
+        """
+        if fmt == 'csv':
+            # Header is line 1
+            for line, row in enumerate(csv.DictReader(stream), start=2):
+                yield line, row, None
+            return
+
+        for line, text in enumerate(stream, start=1):
+            text = text.strip()
+            if not text:
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError as e:
+                yield line, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(row, dict):
+                yield line, None, "Expected a JSON object"
+                continue
+            yield line, row, None
+
+    @staticmethod
+    def validate(row, publishers):
+        """
+        Returns (book, None) or (None, error message).
+        publishers: {lower-cased name or str(id): publisher_id}
+        """
+        row = {k.strip().lower(): v for k, v in row.items() if k}
+        missing = [f for f in REQUIRED_FIELDS if row.get(f) in (None, '', [])]
+        if missing:
+            return None, f"Missing {', '.join(missing)}"
+
+        isbn = str(row['isbn']).strip()
+        if not validate_isbn(isbn) or len(isbn) > 20:
+            return None, "Invalid ISBN format"
+
+        title = str(row['title']).strip()
+        if len(title) > 255:
+            return None, "Title longer than 255 characters"
+
+        publisher_id = publishers.get(str(row['publisher']).strip().lower())
+        if publisher_id is None:
+            return None, f"Unknown publisher '{row['publisher']}'"
+
+        category = str(row['category']).strip().title()
+        if category not in CATEGORIES:
+            return None, f"Invalid category '{row['category']}'"
+
+        try:
+            pub_year = int(row['pub_year'])
+            selling_price = Decimal(str(row['selling_price']).strip())
+            stock = int(row.get('stock') or 0)
+            threshold = int(row.get('threshold') or 10)
+        except (ValueError, InvalidOperation, OverflowError):
+            return None, "pub_year, selling_price, stock and threshold must be numbers"
+        # Anything MySQL would refuse fails this row here, not the whole batch
+        if not 0 < pub_year <= date.today().year + 1:
+            return None, f"pub_year {pub_year} is out of range"
+        if not selling_price.is_finite() or not 0 <= selling_price <= MAX_PRICE:
+            return None, f"selling_price must be between 0 and {MAX_PRICE}"
+        if not 0 <= stock <= MAX_INT or not 0 <= threshold <= MAX_INT:
+            return None, "stock and threshold must be between 0 and 2147483647"
+
+        authors = row['authors']
+        if isinstance(authors, str):
+            authors = authors.split(',')
+        # Drop blanks and repeats (same name_key)
+        names = {}
+        for name in authors:
+            name = Author.normalize(name)
+            if name:
+                names.setdefault(name.lower(), name)
+        if not names:
+            return None, "Missing authors"
+        if any(len(name) > 100 for name in names.values()):
+            return None, "Author name longer than 100 characters"
+
+        return {
+            'isbn': isbn, 'title': title, 'publisher_id': publisher_id, 'pub_year': pub_year,
+            'selling_price': selling_price, 'category': category, 'stock': stock,
+            'threshold': threshold, 'authors': list(names.values())
+        }, None
+
+    @staticmethod
+    def run(stream, fmt='csv', batch_size=None):
+        """
+        Import every row of stream. Returns a dict:
+            rows      rows read
+            imported  books added
+            errors    [{'line', 'isbn', 'error'}] for rows that were skipped
+            seconds   wall time
+        """
+        batch_size = batch_size or Config.IMPORT_BATCH_SIZE
+        result = {'rows': 0, 'imported': 0, 'errors': [], 'seconds': 0}
+        start = time.perf_counter()
+
+        with db_connection() as conn:
+            if not conn:
+                result['errors'].append({'line': None, 'isbn': None, 'error': "Database connection error"})
+                return result
+            cursor = conn.cursor()
+
+            cursor.execute(PUBLISHERS_QUERY)
+            publishers = {}
+            for publisher_id, name in cursor.fetchall():
+                publishers[name.lower()] = publisher_id
+                publishers[str(publisher_id)] = publisher_id
+
+            seen = set()  # ISBNs already in this file
+            batch = []
+            for line, row, error in BookImport.read_rows(stream, fmt):
+                result['rows'] += 1
+                book = None
+                if not error:
+                    book, error = BookImport.validate(row, publishers)
+                if not error and book['isbn'] in seen:
+                    error = "Duplicate ISBN in file"
+                if error:
+                    isbn = row.get('isbn') if isinstance(row, dict) else None
+                    result['errors'].append({'line': line, 'isbn': isbn, 'error': error})
+                    continue
+
+                seen.add(book['isbn'])
+                batch.append((line, book))
+                if len(batch) >= batch_size:
+                    BookImport._write_batch(conn, cursor, batch, result)
+                    batch = []
+            if batch:
+                BookImport._write_batch(conn, cursor, batch, result)
+
+        if result['imported']:
+            # Cached search results may be missing the new books
+            Book.invalidate_cache()
+            AdminStats.invalidate()
+        result['seconds'] = round(time.perf_counter() - start, 2)
+        return result
+
+    @staticmethod
+    def _write_batch(conn, cursor, batch, result):
+        # Books that are already in the catalog are errors, not updates
+        placeholders = ", ".join(["%s"] * len(batch))
+        cursor.execute(EXISTING_QUERY.format(placeholders=placeholders), [b['isbn'] for _, b in batch])
+        existing = {row[0].lower() for row in cursor.fetchall()}
+        rows = []
+        for line, book in batch:
+            if book['isbn'].lower() in existing:
+                result['errors'].append({'line': line, 'isbn': book['isbn'], 'error': "ISBN already exists"})
+            else:
+                rows.append((line, book))
+        if not rows:
+            return
+
+        try:
+            BookImport._insert(conn, cursor, rows, result)
+            return
+        except Exception as e:
+            conn.rollback()
+            if len(rows) == 1:
+                line, book = rows[0]
+                result['errors'].append({'line': line, 'isbn': book['isbn'], 'error': str(e)})
+                return
+
+        # Find the rows at fault: one transaction per row (slower, but only for this batch)
+        for line, book in rows:
+            try:
+                BookImport._insert(conn, cursor, [(line, book)], result)
+            except Exception as e:
+                conn.rollback()
+                result['errors'].append({'line': line, 'isbn': book['isbn'], 'error': str(e)})
+
+    @staticmethod
+    def _insert(conn, cursor, rows, result):
+        # One transaction for rows; raises (uncommitted) if anything fails
+        conn.start_transaction()
+        author_ids = Author.resolve(cursor, [name for _, book in rows for name in book['authors']])
+        unresolved = {name for _, b in rows for name in b['authors'] if Author.key(name) not in author_ids}
+        if unresolved:
+            raise LookupError(f"Could not find or create author '{sorted(unresolved)[0]}'")
+
+        cursor.executemany(BOOK_INSERT, [
+            (b['isbn'], b['title'], b['publisher_id'], b['pub_year'], b['selling_price'],
+             b['category'], b['stock'], b['threshold'])
+            for _, b in rows
+        ])
+        # A set: two spellings can fold onto the same author
+        cursor.executemany(LINK_INSERT, list({
+            (b['isbn'], author_ids[Author.key(name)]) for _, b in rows for name in b['authors']
+        }))
+        BookSearch.index_books(cursor, [b['isbn'] for _, b in rows])
+
+        conn.commit()
+        Author.remember(author_ids)
+        result['imported'] += len(rows)
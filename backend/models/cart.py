@@ -1,82 +1,151 @@
-from database.connection import get_db_connection
+from database.connection import db_connection
+from database import records, statements
+
+# Each cart write is one statement on the Shopping_Cart primary key (user_id, isbn), so it is
+# atomic without a read first; the Cart_Summary triggers update the user's count/subtotal with it.
+
+ITEMS_QUERY = """
+    SELECT sc.isbn, sc.quantity, b.title, b.selling_price
+    FROM Shopping_Cart sc
+    JOIN Books b ON sc.isbn = b.isbn
+    WHERE sc.user_id = %s
+"""
+SUMMARY_QUERY = "SELECT item_count, subtotal FROM Cart_Summary WHERE user_id = %s"
+# Every cart's summary from Shopping_Cart (run after emptying Cart_Summary)
+SUMMARY_FILL = """
+    INSERT INTO Cart_Summary (user_id, item_count, subtotal)
+    SELECT sc.user_id, SUM(sc.quantity), SUM(sc.quantity * b.selling_price)
+    FROM Shopping_Cart sc
+    JOIN Books b ON sc.isbn = b.isbn
+    GROUP BY sc.user_id
+"""
+REFRESH_SUBTOTALS = """
+    UPDATE Cart_Summary cs
+    JOIN (
+        SELECT sc.user_id, SUM(sc.quantity * b.selling_price) AS subtotal
+        FROM Shopping_Cart sc
+        JOIN Books b ON sc.isbn = b.isbn
+        WHERE sc.user_id IN (SELECT user_id FROM Shopping_Cart WHERE isbn = %s)
+        GROUP BY sc.user_id
+    ) carts ON carts.user_id = cs.user_id
+    SET cs.subtotal = carts.subtotal
+"""
 
 class Cart:
     @staticmethod
     def add_to_cart(user_id, isbn, quantity=1):
-        conn = get_db_connection()
-        if not conn:
-            return False, "Database connection error"
-        try:
-            cursor = conn.cursor()
-            
-            # Check if item exists in cart
-            cursor.execute("SELECT quantity FROM Shopping_Cart WHERE user_id = %s AND isbn = %s", (user_id, isbn))
-            existing = cursor.fetchone()
-            
-            if existing:
-                new_qty = existing[0] + quantity
-                cursor.execute("UPDATE Shopping_Cart SET quantity = %s WHERE user_id = %s AND isbn = %s", (new_qty, user_id, isbn))
-            else:
-                cursor.execute("INSERT INTO Shopping_Cart (user_id, isbn, quantity) VALUES (%s, %s, %s)", (user_id, isbn, quantity))
-                
-            conn.commit()
-            return True, "Item added to cart"
-        except Exception as e:
-            return False, str(e)
-        finally:
-             if conn.is_connected():
-                cursor.close()
-                conn.close()
+        """
+        Add quantity copies (adds to the line if the book is already in the cart).
+        """
+        if quantity < 1:
+            return False, "Quantity must be at least 1"
+        with db_connection() as conn:
+            if not conn:
+                return False, "Database connection error"
+            try:
+                statements.execute(conn, """
+                    INSERT INTO Shopping_Cart (user_id, isbn, quantity) VALUES (%s, %s, %s) AS new
+                    ON DUPLICATE KEY UPDATE quantity = Shopping_Cart.quantity + new.quantity
+                """, (user_id, isbn, quantity))
+                conn.commit()
+                return True, "Item added to cart"
+            except Exception as e:
+                return False, str(e)
+
+    @staticmethod
+    def update_quantity(user_id, isbn, quantity):
+        """
+        Set the quantity of a cart line (creates it if missing, removes it at 0).
+        """
+        if quantity < 1:
+            return Cart.remove_from_cart(user_id, isbn)
+        with db_connection() as conn:
+            if not conn:
+                return False, "Database connection error"
+            try:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    INSERT INTO Shopping_Cart (user_id, isbn, quantity) VALUES (%s, %s, %s) AS new
+                    ON DUPLICATE KEY UPDATE quantity = new.quantity
+                """, (user_id, isbn, quantity))
+                conn.commit()
+                return True, "Cart updated"
+            except Exception as e:
+                return False, str(e)
 
     @staticmethod
     def get_cart_items(user_id):
-        conn = get_db_connection()
-        if not conn:
-            return []
-        try:
-            cursor = conn.cursor(dictionary=True)
+        with db_connection() as conn:
+            if not conn:
+                return []
+            cursor = conn.cursor()
             # Join with Books to get title and price
-            query = """
-                SELECT sc.isbn, sc.quantity, b.title, b.selling_price
-                FROM Shopping_Cart sc
-                JOIN Books b ON sc.isbn = b.isbn
-                WHERE sc.user_id = %s
-            """
-            cursor.execute(query, (user_id,))
-            return cursor.fetchall()
-        finally:
-             if conn.is_connected():
-                cursor.close()
-                conn.close()
+            cursor.execute(ITEMS_QUERY, (user_id,))
+            return records.fetch_all(cursor)
 
     @staticmethod
-    def remove_from_cart(user_id, isbn):
-        conn = get_db_connection()
-        if not conn:
-            return False, "Connection error"
-        try:
+    def get_cart_summary(user_id):
+        """
+        {'count': total quantity, 'subtotal': price of the cart} from Cart_Summary (one key lookup).
+        """
+        with db_connection() as conn:
+            if not conn:
+                return None
             cursor = conn.cursor()
-            cursor.execute("DELETE FROM Shopping_Cart WHERE user_id = %s AND isbn = %s", (user_id, isbn))
-            conn.commit()
-            return True, "Item removed"
-        except Exception as e:
-            return False, str(e)
-        finally:
-             if conn.is_connected():
-                cursor.close()
-                conn.close()
+            cursor.execute(SUMMARY_QUERY, (user_id,))
+            row = cursor.fetchone()
+        if not row:
+            return {'count': 0, 'subtotal': 0}
+        return {'count': row[0], 'subtotal': row[1]}
+
+    @staticmethod
+    def remove_from_cart(user_id, isbn):
+        with db_connection() as conn:
+            if not conn:
+                return False, "Connection error"
+            try:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM Shopping_Cart WHERE user_id = %s AND isbn = %s", (user_id, isbn))
+                conn.commit()
+                return True, "Item removed"
+            except Exception as e:
+                return False, str(e)
 
     @staticmethod
     def clear_cart(user_id):
-        conn = get_db_connection()
-        if not conn:
-            return False
-        try:
+        with db_connection() as conn:
+            if not conn:
+                return False
             cursor = conn.cursor()
             cursor.execute("DELETE FROM Shopping_Cart WHERE user_id = %s", (user_id,))
             conn.commit()
             return True
-        finally:
-             if conn.is_connected():
-                cursor.close()
-                conn.close()
+
+    @staticmethod
+    def rebuild_summaries():
+        """
+        Recompute every Cart_Summary row from Shopping_Cart (after a bulk load or cascaded deletes).
+        Returns the number of carts.
+        """
+        with db_connection() as conn:
+            if not conn:
+                return 0
+            try:
+                cursor = conn.cursor()
+                conn.start_transaction()
+                cursor.execute("DELETE FROM Cart_Summary")
+                cursor.execute(SUMMARY_FILL)
+                count = cursor.rowcount
+                conn.commit()
+                return count
+            except Exception:
+                conn.rollback()
+                raise
+
+    @staticmethod
+    def refresh_subtotals(cursor, isbn):
+        """
+        Recompute the subtotal of every cart holding isbn (after a price change).
+        Call inside the transaction that changed the price.
+        """
+        cursor.execute(REFRESH_SUBTOTALS, (isbn,))
@@ -0,0 +1,222 @@
+import csv
+import io
+import itertools
+import json
+import threading
+import zlib
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from config import Config
+from database.connection import Database, db_connection
+from utils.forking import after_fork
+
+# Raw data exports for finance: orders, order lines and the daily report rollups over a
+# date range, as CSV or JSONL (optionally gzipped).
+#
+# Rows are streamed: the query runs on an unbuffered cursor, so MySQL sends the result
+# as it is read, Config.EXPORT_FETCH_SIZE rows at a time, and each batch is encoded and
+# handed on (to the HTTP response or a file) before the next is fetched. Memory stays
+# the same whatever the size of the export. An export holds one pooled connection (a
+# replica's, when configured) for as long as the client takes to download it, so only
+# Config.EXPORT_MAX_CONCURRENT run at once per worker.
+#
+# Card numbers are masked to their last 4 digits.
+
+# dataset -> (query with {where} on the date column, date column, description)
+DATASETS = {
+    'orders': ("""
+        SELECT co.order_id, co.order_date, co.user_id, u.username, co.total_price, co.status,
+               CONCAT(REPEAT('*', 12), RIGHT(co.credit_card_no, 4)) AS card, co.expiry_date
+        FROM Customer_Orders co
+        LEFT JOIN Users u ON u.user_id = co.user_id
+        {where}
+        ORDER BY co.order_date, co.order_id
+    """, 'co.order_date', "Customer order headers"),
+    'order-items': ("""
+        SELECT oi.order_id, co.order_date, co.user_id, oi.isbn, b.title, oi.quantity, oi.unit_price,
+               oi.quantity * oi.unit_price AS line_total
+        FROM Customer_Orders co
+        JOIN Order_Items oi ON oi.order_id = co.order_id
+        JOIN Books b ON b.isbn = oi.isbn
+        {where}
+        ORDER BY co.order_date, co.order_id, oi.isbn
+    """, 'co.order_date', "One row per book in each order"),
+    'sales-daily': ("""
+        SELECT sale_date, order_count, total_sales
+        FROM Sales_Daily
+        {where}
+        ORDER BY sale_date
+    """, 'sale_date', "Orders and revenue per day"),
+    'book-sales': ("""
+        SELECT s.sale_date, s.isbn, b.title, s.units
+        FROM Book_Sales_Daily s
+        JOIN Books b ON b.isbn = s.isbn
+        {where}
+        ORDER BY s.sale_date, s.isbn
+    """, 's.sale_date', "Copies sold per book per day"),
+    'customer-spend': ("""
+        SELECT s.sale_date, s.user_id, u.username, s.order_count, s.total_spent
+        FROM Customer_Spend_Daily s
+        JOIN Users u ON u.user_id = s.user_id
+        {where}
+        ORDER BY s.sale_date, s.user_id
+    """, 's.sale_date', "Orders and spend per customer per day"),
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+_slots = threading.BoundedSemaphore(Config.EXPORT_MAX_CONCURRENT)
+
+class ExportBusy(Exception):
+    """
+    Raised when this worker is already running Config.EXPORT_MAX_CONCURRENT exports.
+    """
+
+class Export:
+    @staticmethod
+    def parse_range(start, end):
+        """
+        (start_date, end_date) from 'YYYY-MM-DD' strings (either may be empty: open range).
+        Raises ValueError for a bad date or an end before the start.
+        """
+        start = datetime.strptime(start, '%Y-%m-%d').date() if start else None
+        end = datetime.strptime(end, '%Y-%m-%d').date() if end else None
+        if start and end and end < start:
+            raise ValueError("The end date is before the start date")
+        return start, end
+
+    @staticmethod
+    def filename(dataset, fmt, start=None, end=None, compress=False):
+        period = f"{start or 'start'}_{end or date.today()}"
+        return f"{dataset}_{period}.{fmt}" + ('.gz' if compress else '')
+
+    @staticmethod
+    def acquire():
+        """
+        Take an export slot (give it back with release()). Raises ExportBusy if none is free.
+        """
+        if not _slots.acquire(blocking=False):
+            raise ExportBusy("Too many exports are running, try again shortly")
+
+    @staticmethod
+    def release():
+        _slots.release()
+
+    @staticmethod
+    def rows(dataset, start=None, end=None):
+        """
+        Yields the column names, then each batch of rows (lists of tuples) of the dataset,
+        read from an unbuffered cursor. end is inclusive.
+        """
+        query, column, _ = DATASETS[dataset]
+        conditions, params = [], []
+        if start:
+            conditions.append(f"{column} >= %s")
+            params.append(start)
+        if end:
+            # Half-open on the day after, so a TIMESTAMP column keeps its index range
+            conditions.append(f"{column} < %s")
+            params.append(end + timedelta(days=1))
+        where = "WHERE " + " AND ".join(conditions) if conditions else ""
+
+        with db_connection(readonly=True) as conn:
+            if not conn:
+                raise RuntimeError("Database connection error")
+            # The server waits this long for us to read the next rows (a slow download)
+            Database.set_session(conn, net_write_timeout=Config.EXPORT_NET_WRITE_TIMEOUT)
+            cursor = conn.cursor(buffered=False)
+            cursor.execute(query.format(where=where), params)
+            try:
+                yield [description[0] for description in cursor.description]
+                while True:
+                    batch = cursor.fetchmany(Config.EXPORT_FETCH_SIZE)
+                    if not batch:
+                        break
+                    yield batch
+            except GeneratorExit:
+                # Download cancelled: returning the connection would first read (and drop)
+                # the rest of the result; closing it makes the server stop the query instead.
+                # The pool reconnects it on its next checkout.
+                conn.disconnect()
+                raise
+
+    @staticmethod
+    def stream(dataset, fmt, start=None, end=None, compress=False):
+        """
+        Start the export: runs the query right away (so a database error is raised here,
+        while the caller can still answer with an error), then returns a generator of
+        bytes chunks of about Config.EXPORT_CHUNK_BYTES (gzipped if compress).
+        """
+        rows = Export.rows(dataset, start, end)
+        columns = next(rows)
+        return Export._encode(columns, rows, fmt, compress)
+
+    @staticmethod
+    def _encode(columns, rows, fmt, compress):
+        encode = Export._csv_encoder() if fmt == 'csv' else Export._jsonl_encoder()
+        gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # wbits 31: gzip framing
+        buffer = []
+        size = 0
+
+        try:
+            for index, batch in enumerate(itertools.chain([columns], rows)):
+                text = encode(batch, header=index == 0)
+                if not text:
+                    continue
+                data = text.encode('utf-8')
+                if gzip:
+                    data = gzip.compress(data)
+                buffer.append(data)
+                size += len(data)
+                if size >= Config.EXPORT_CHUNK_BYTES:
+                    yield b''.join(buffer)
+                    buffer, size = [], 0
+        finally:
+            rows.close()  # cancelled: stops the query now rather than when garbage collected
+
+        if gzip:
+            buffer.append(gzip.flush())
+        if buffer:
+            yield b''.join(buffer)
+
+    @staticmethod
+    def _csv_encoder():
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator='\n')
+
+        def encode(batch, header):
+            out.seek(0)
+            out.truncate()
+            if header:
+                writer.writerow(batch)
+            else:
+                writer.writerows(batch)
+            return out.getvalue()
+        return encode
+
+    @staticmethod
+    def _jsonl_encoder():
+        columns = []
+
+        def encode(batch, header):
+            if header:
+                columns[:] = batch
+                return ''
+            return ''.join(json.dumps(dict(zip(columns, row)), default=_json_value) + '\n' for row in batch)
+        return encode
+
+def _json_value(value):
+    # Decimals as strings keep exact cents; dates as ISO 8601
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot export {type(value).__name__}")
+
+@after_fork
+def _reset_slots_after_fork():
+    global _slots
+    _slots = threading.BoundedSemaphore(Config.EXPORT_MAX_CONCURRENT)
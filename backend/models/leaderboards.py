@@ -0,0 +1,196 @@
+import time
+import threading
+from datetime import date, timedelta
+from config import Config
+from database.connection import db_connection
+from utils.cache import LRUCache
+from utils.forking import after_fork
+from utils.leaderboard import SlidingLeaderboard
+
+bestsellers = SlidingLeaderboard('bestsellers', Config.LEADERBOARD_WINDOW_DAYS, Config.LEADERBOARD_CAPACITY)
+trending = SlidingLeaderboard('trending', Config.TRENDING_WINDOW_DAYS, Config.LEADERBOARD_CAPACITY)
+top_spenders = SlidingLeaderboard('top_customers', Config.LEADERBOARD_WINDOW_DAYS, Config.LEADERBOARD_CAPACITY)
+
+# Book titles / usernames of the keys on the boards
+labels = LRUCache('leaderboard_labels', 10 * Config.LEADERBOARD_CAPACITY, Config.BOOK_CACHE_TTL)
+
+BOOK_SALES_QUERY = "SELECT sale_date, isbn, units FROM Book_Sales_Daily WHERE sale_date >= %s"
+CUSTOMER_SPEND_QUERY = "SELECT sale_date, user_id, total_spent FROM Customer_Spend_Daily WHERE sale_date >= %s"
+# Admin reports: exact totals over every worker's orders, straight from the rollups
+TOP_BOOKS_QUERY = """
+    SELECT bs.isbn, b.title, SUM(bs.units) AS copies_sold
+    FROM Book_Sales_Daily bs
+    JOIN Books b ON b.isbn = bs.isbn
+    WHERE bs.sale_date >= %s
+    GROUP BY bs.isbn, b.title
+    ORDER BY copies_sold DESC, bs.isbn
+    LIMIT %s
+"""
+TOP_CUSTOMERS_QUERY = """
+    SELECT u.username, SUM(cs.total_spent) AS total_spent
+    FROM Customer_Spend_Daily cs
+    JOIN Users u ON u.user_id = cs.user_id
+    WHERE cs.sale_date >= %s
+    GROUP BY cs.user_id, u.username
+    ORDER BY total_spent DESC, cs.user_id
+    LIMIT %s
+"""
+LABEL_QUERIES = {
+    'book': "SELECT isbn, title FROM Books WHERE isbn IN ({placeholders})",
+    'user': "SELECT user_id, username FROM Users WHERE user_id IN ({placeholders})",
+}
+
+class Leaderboards:
+    """
+    In-memory bestseller, trending and top-customer boards.
+
+    Checkout adds each order as it commits (record_order), so reads never aggregate.
+    The boards are loaded from the daily rollups on first use and re-loaded every
+    Config.LEADERBOARD_RESYNC_INTERVAL seconds, which also picks up orders placed
+    through other worker processes (an order that commits while a reload is
+    running may be missing until the next one).
+
+    The boards are per worker process: between reloads, a worker's boards only count
+    the orders it placed itself since. That is fine for the storefront's "trending now".
+    The admin reports need every worker's orders and are rare: report_top_books /
+    report_top_customers add up the rollups (exact, updated in every checkout transaction)
+    with one GROUP BY ... LIMIT instead.
+    """
+    _loaded_at = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def record_order(user_id, items, total_price):
+        """
+        items: [(isbn, quantity)] of an order that just committed.
+        """
+        today = date.today()
+        for isbn, quantity in items:
+            bestsellers.add(isbn, quantity, today)
+            trending.add(isbn, quantity, today)
+        top_spenders.add(user_id, total_price, today)
+
+    @staticmethod
+    def top_books(limit=None, board=None):
+        """
+        [{'isbn', 'title', 'copies_sold'}], best first.
+        """
+        Leaderboards._ensure_loaded()
+        rows = (board or bestsellers).top(limit or Config.TOP_BOOKS_LIMIT, date.today())
+        titles = Leaderboards._labels('book', [isbn for isbn, _ in rows])
+        return [{'isbn': isbn, 'title': titles.get(isbn), 'copies_sold': units}
+                for isbn, units in rows if isbn in titles]
+
+    @staticmethod
+    def trending_books(limit=None):
+        return Leaderboards.top_books(limit or Config.TRENDING_LIMIT, board=trending)
+
+    @staticmethod
+    def top_customers(limit=None):
+        """
+        [{'username', 'total_spent'}], best first.
+        """
+        Leaderboards._ensure_loaded()
+        rows = top_spenders.top(limit or Config.TOP_CUSTOMERS_LIMIT, date.today())
+        usernames = Leaderboards._labels('user', [user_id for user_id, _ in rows])
+        return [{'username': usernames[user_id], 'total_spent': spent}
+                for user_id, spent in rows if user_id in usernames]
+
+    @staticmethod
+    def report_top_books(limit=None):
+        """
+        Like top_books over LEADERBOARD_WINDOW_DAYS, counted from Book_Sales_Daily.
+        """
+        rows = Leaderboards._report(TOP_BOOKS_QUERY, limit or Config.TOP_BOOKS_LIMIT)
+        for row in rows:
+            row['copies_sold'] = int(row['copies_sold'])  # SUM of INT comes back DECIMAL
+        return rows
+
+    @staticmethod
+    def report_top_customers(limit=None):
+        """
+        Like top_customers, counted from Customer_Spend_Daily.
+        """
+        return Leaderboards._report(TOP_CUSTOMERS_QUERY, limit or Config.TOP_CUSTOMERS_LIMIT)
+
+    @staticmethod
+    def rebuild():
+        """
+        Reload every board from Book_Sales_Daily / Customer_Spend_Daily. Returns False if the database is down.
+        """
+        today = date.today()
+        window = max(Config.LEADERBOARD_WINDOW_DAYS, Config.TRENDING_WINDOW_DAYS)
+        since = today - timedelta(days=window - 1)
+        with db_connection(readonly=True) as conn:
+            if not conn:
+                return False
+            cursor = conn.cursor()
+            cursor.execute(BOOK_SALES_QUERY, (since,))
+            book_rows = cursor.fetchall()
+            cursor.execute(CUSTOMER_SPEND_QUERY, (since,))
+            customer_rows = cursor.fetchall()
+
+        bestsellers.load(book_rows, today)
+        trending.load(book_rows, today)
+        top_spenders.load(customer_rows, today)
+        Leaderboards._loaded_at = time.monotonic()
+        return True
+
+    @staticmethod
+    def _report(query, limit):
+        since = date.today() - timedelta(days=Config.LEADERBOARD_WINDOW_DAYS - 1)
+        with db_connection(readonly=True) as conn:
+            if not conn:
+                return []
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(query, (since, limit))
+            return cursor.fetchall()
+
+    @staticmethod
+    def _ensure_loaded():
+        loaded_at = Leaderboards._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < Config.LEADERBOARD_RESYNC_INTERVAL:
+            return
+        if loaded_at is None:
+            # Nothing to serve yet: everyone waits for the first load
+            with Leaderboards._lock:
+                if Leaderboards._loaded_at is None:
+                    Leaderboards.rebuild()
+        elif Leaderboards._lock.acquire(blocking=False):
+            # Resync: one request reloads, the others keep reading the current boards
+            try:
+                if not Leaderboards.rebuild():
+                    # Database down: keep serving these boards, retry after another interval
+                    Leaderboards._loaded_at = time.monotonic()
+            finally:
+                Leaderboards._lock.release()
+
+    @staticmethod
+    def _labels(kind, keys):
+        found, missing = {}, []
+        for key in keys:
+            label = labels.get((kind, key))
+            if label is None:
+                missing.append(key)
+            else:
+                found[key] = label
+        if not missing:
+            return found
+
+        query = LABEL_QUERIES[kind].format(placeholders=", ".join(["%s"] * len(missing)))
+        with db_connection(readonly=True) as conn:
+            if not conn:
+                return found
+            cursor = conn.cursor()
+            cursor.execute(query, missing)
+            for key, label in cursor.fetchall():
+                labels.set((kind, key), label)
+                found[key] = label
+        return found
+
+@after_fork
+def _reset_boards_after_fork():
+    for board in (bestsellers, trending, top_spenders):
+        board.reset()
+    Leaderboards._loaded_at = None
+    Leaderboards._lock = threading.Lock()
@@ -1,111 +1,193 @@
 from datetime import datetime
-from database.connection import get_db_connection
+from database.connection import db_connection
+from database import records, statements
+from models.book import Book
+from models.admin_stats import AdminStats
+from models.leaderboards import Leaderboards
+from models.sales_rollup import SalesRollup
+from models.stock_reservation import StockReservation
+
+# Queries shared with database/plan_check.py
+CART_LINES_QUERY = "SELECT isbn, quantity FROM Shopping_Cart WHERE user_id = %s ORDER BY isbn"
+# The cart rows stay locked until the order commits
+CART_ITEMS_QUERY = """
+    SELECT sc.isbn, sc.quantity, b.selling_price
+    FROM Shopping_Cart sc
+    JOIN Books b ON sc.isbn = b.isbn
+    WHERE sc.user_id = %s
+    ORDER BY sc.isbn
+    FOR UPDATE OF sc
+"""
+USER_ORDERS_QUERY = "SELECT * FROM Customer_Orders WHERE user_id = %s ORDER BY order_date DESC"
+HISTORY_ITEMS_QUERY = """
+    SELECT oi.order_id, oi.isbn, oi.quantity, oi.unit_price, b.title, s.authors
+    FROM Order_Items oi
+    JOIN Books b ON oi.isbn = b.isbn
+    LEFT JOIN Book_Search s ON oi.isbn = s.isbn
+    WHERE oi.order_id IN ({placeholders})
+"""
+ORDER_ITEMS_QUERY = """
+    SELECT oi.isbn, oi.quantity, oi.unit_price, b.title
+    FROM Order_Items oi
+    JOIN Books b ON oi.isbn = b.isbn
+    WHERE oi.order_id = %s
+"""
 
 class Order:
     @staticmethod
     def create_order(user_id, credit_card_no, expiry_date):
         """
         Create order from current cart contents.
+        Stock is reserved first (see models/stock_reservation.py), so the order
+        transaction only locks the sold books' rows for its last few statements.
         """
-        conn = get_db_connection()
-        if not conn:
-            return False, "Database connection error"
-        
-        try:
-            cursor = conn.cursor(dictionary=True)
-            conn.start_transaction()
-
-            # 1. Get Cart Items
-            cursor.execute("SELECT isbn, quantity FROM Shopping_Cart WHERE user_id = %s", (user_id,))
-            cart_items = cursor.fetchall()
-            
-            if not cart_items:
-                return False, "Cart is empty"
-
-            # 2. Calculate Total Price and Check Stock? 
-            # Note: Trigger 'Deduct_Stock_On_Purchase' handles deduction, 
-            # and 'Prevent_Negative_Stock' handles validation.
-            # But we might want to check price here or let the DB handle it if possible? Use Python for total calculation.
-            
-            total_price = 0
-            order_items_data = [] # List of tuples (isbn, quantity, price)
-
-            for item in cart_items:
-                cursor.execute("SELECT selling_price FROM Books WHERE isbn = %s", (item['isbn'],))
-                book = cursor.fetchone()
-                if not book:
-                    raise Exception(f"Book {item['isbn']} not found")
-                
-                price = book['selling_price']
-                quantity = item['quantity']
-                total_price += price * quantity
-                order_items_data.append((item['isbn'], quantity, price))
-
-            # 3. Create Order Header
-            query_order = """
-                INSERT INTO Customer_Orders (user_id, total_price, credit_card_no, expiry_date)
-                VALUES (%s, %s, %s, %s)
-            """
-            cursor.execute(query_order, (user_id, total_price, credit_card_no, expiry_date))
-            order_id = cursor.lastrowid
-
-            # 4. Insert Order Items (Triggers will fire here)
-            query_item = """
-                INSERT INTO Order_Items (order_id, isbn, quantity, unit_price)
-                VALUES (%s, %s, %s, %s)
-            """
-            for isbn, qty, price in order_items_data:
-                cursor.execute(query_item, (order_id, isbn, qty, price))
-
-            # 5. Clear Cart
-            cursor.execute("DELETE FROM Shopping_Cart WHERE user_id = %s", (user_id,))
-
-            conn.commit()
-            return True, f"Order #{order_id} placed successfully"
-        except Exception as e:
-            conn.rollback()
-            return False, f"Order failed: {str(e)}"
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+        StockReservation.sweep_if_due()
+
+        # 1. Get the cart lines to reserve (plain read, nothing locked yet)
+        with db_connection() as conn:
+            if not conn:
+                return False, "Database connection error"
+            lines = [tuple(line) for line in statements.fetch_all(conn, CART_LINES_QUERY, (user_id,))]
+
+        if not lines:
+            return False, "Cart is empty"
+
+        # 2. Reserve the stock: short conditional increments of Books.reserved in ISBN order, committed at once
+        reservation_id, error = StockReservation.reserve(lines)
+        if not reservation_id:
+            return False, f"Order failed: {error}"
+
+        with db_connection() as conn:
+            if not conn:
+                StockReservation.release(reservation_id)
+                return False, "Database connection error"
+
+            try:
+                cursor = conn.cursor()
+                conn.start_transaction()
+
+                # 3. Cart items with their prices, read in the order's transaction: the cart
+                #    rows stay locked until commit and the total uses this snapshot's prices
+                cart_items = statements.fetch_all(conn, CART_ITEMS_QUERY, (user_id,), dictionary=True)
+                if [(item['isbn'], item['quantity']) for item in cart_items] != lines:
+                    raise RuntimeError("Your cart changed during checkout, please try again")
+                total_price = sum(item['selling_price'] * item['quantity'] for item in cart_items)
+
+                # 4. Create Order Header
+                query_order = """
+                    INSERT INTO Customer_Orders (user_id, total_price, credit_card_no, expiry_date)
+                    VALUES (%s, %s, %s, %s)
+                """
+                order_id = statements.execute(conn, query_order,
+                                              (user_id, total_price, credit_card_no, expiry_date)).lastrowid
+
+                # 5. Insert all Order Items in one multi-row statement (prepared once per cart size)
+                placeholders = ", ".join(["(%s, %s, %s, %s)"] * len(cart_items))
+                params = []
+                for item in cart_items:
+                    params.extend([order_id, item['isbn'], item['quantity'], item['selling_price']])
+                statements.execute(conn, f"INSERT INTO Order_Items (order_id, isbn, quantity, unit_price) "
+                                         f"VALUES {placeholders}", params)
+
+                # 6. Clear the purchased lines
+                placeholders = ", ".join(["%s"] * len(cart_items))
+                statements.execute(conn, f"DELETE FROM Shopping_Cart WHERE user_id = %s AND isbn IN ({placeholders})",
+                                   [user_id] + [item['isbn'] for item in cart_items])
+
+                # 7. The reserved stock is now sold (Auto_Order_Trigger fires here if a book runs low)
+                ran_low = StockReservation.consume(cursor, reservation_id, len(cart_items))
+                if ran_low is None:
+                    raise RuntimeError("Stock reservation expired, please try again")
+
+                # 8. Add the order to the daily report rollups (last: today's row is shared)
+                SalesRollup.record_order(cursor, order_id)
+
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                StockReservation.release(reservation_id)
+                return False, f"Order failed: {str(e)}"
+
+        Book.stock_changed(*(item['isbn'] for item in cart_items))
+        Leaderboards.record_order(user_id, [(item['isbn'], item['quantity']) for item in cart_items], total_price)
+        # The dashboard's sales total may lag by up to STATS_TTL; its low stock list and
+        # pending publisher orders only change when a book ran low (Auto_Order_Trigger)
+        if ran_low:
+            AdminStats.invalidate()
+        return True, f"Order #{order_id} placed successfully"
 
     @staticmethod
     def get_user_orders(user_id):
-        conn = get_db_connection()
-        if not conn:
-            return []
-        try:
+        with db_connection(readonly=True) as conn:
+            if not conn:
+                return []
+            cursor = conn.cursor()
+            cursor.execute(USER_ORDERS_QUERY, (user_id,))
+            return records.fetch_all(cursor)
+
+    @staticmethod
+    def get_order_history(user_id, after=None, limit=None):
+        """
+        A user's orders, newest first, each with its 'book_list' and 'total_items'.
+        Always two queries, however many orders: one page of headers (a range scan of
+        idx_customer_orders_user_date), then every item of those orders in one IN (...) fetch.
+        after: [order_date, order_id] of the last order already shown (keyset pagination)
+        limit: maximum number of orders
+        """
+        with db_connection(readonly=True) as conn:
+            if not conn:
+                return []
             cursor = conn.cursor(dictionary=True)
-            query = "SELECT * FROM Customer_Orders WHERE user_id = %s ORDER BY order_date DESC"
-            cursor.execute(query, (user_id,))
-            return cursor.fetchall()
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
-    
+
+            # 1. Order headers
+            cursor.execute(*Order.history_query(user_id, after, limit))
+            orders = cursor.fetchall()
+            if not orders:
+                return orders
+
+            # 2. Items of all those orders at once, grouped by order in Python
+            items_by_order = {order['order_id']: [] for order in orders}
+            placeholders = ", ".join(["%s"] * len(items_by_order))
+            cursor.execute(HISTORY_ITEMS_QUERY.format(placeholders=placeholders), list(items_by_order))
+            for item in cursor.fetchall():
+                items_by_order[item['order_id']].append(item)
+
+        for order in orders:
+            order['book_list'] = items_by_order[order['order_id']]
+            order['total_items'] = sum(item['quantity'] for item in order['book_list'])
+        return orders
+
+    @staticmethod
+    def history_query(user_id, after=None, limit=None):
+        """
+        (query, params) of one page of order headers for get_order_history.
+        """
+        query = "SELECT * FROM Customer_Orders WHERE user_id = %s"
+        params = [user_id]
+        if after and len(after) == 2:
+            query += " AND (order_date < %s OR (order_date = %s AND order_id < %s))"
+            params.extend([after[0], after[0], after[1]])
+        query += " ORDER BY order_date DESC, order_id DESC"
+        if limit:
+            query += " LIMIT %s"
+            params.append(int(limit))
+        return query, params
+
+    @staticmethod
+    def history_cursor_key(order):
+        return [order['order_date'], order['order_id']]
+
     @staticmethod
     def get_order_details(order_id):
         # Could return header + items
-        conn = get_db_connection()
-        if not conn: 
-            return None
-        try:
+        with db_connection(readonly=True) as conn:
+            if not conn:
+                return None
             cursor = conn.cursor(dictionary=True)
             cursor.execute("SELECT * FROM Customer_Orders WHERE order_id = %s", (order_id,))
             header = cursor.fetchone()
-            
-            cursor.execute("""
-                SELECT oi.isbn, oi.quantity, oi.unit_price, b.title 
-                FROM Order_Items oi
-                JOIN Books b ON oi.isbn = b.isbn
-                WHERE oi.order_id = %s
-            """, (order_id,))
+
+            cursor.execute(ORDER_ITEMS_QUERY, (order_id,))
             items = cursor.fetchall()
-            
+
             return {'header': header, 'items': items}
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
@@ -1,131 +1,179 @@
-from database.connection import get_db_connection
+from database.connection import db_connection
+from models.book import Book
+from models.admin_stats import AdminStats
+
+# Books per restock UPDATE in confirm_orders
+STOCK_CHUNK = 1000
+
+PENDING_QUERY = """
+    SELECT po.po_id, po.isbn, po.quantity, po.order_date, b.title, p.name as publisher_name
+    FROM Publisher_Orders po
+    JOIN Books b ON po.isbn = b.isbn
+    JOIN Publishers p ON po.publisher_id = p.publisher_id
+    WHERE po.status = 'Pending'
+"""
+# Pending orders matching {conditions}, locked for confirm_orders
+CONFIRM_LOCK_QUERY = """
+    SELECT po_id, isbn, quantity FROM Publisher_Orders
+    WHERE {conditions}
+    ORDER BY po_id
+    FOR UPDATE
+"""
+PUBLISHERS_QUERY = "SELECT * FROM Publishers"
+# Same window as the query in db.sql: the previous calendar month
+LAST_MONTH_SALES_QUERY = """
+    SELECT SUM(total_sales) AS Last_Month_Sales
+    FROM Sales_Daily
+    WHERE sale_date >= DATE_FORMAT(CURRENT_DATE - INTERVAL 1 MONTH, '%Y-%m-01')
+    AND sale_date < DATE_FORMAT(CURRENT_DATE, '%Y-%m-01')
+"""
+DAY_SALES_QUERY = "SELECT total_sales AS Daily_Sales FROM Sales_Daily WHERE sale_date = %s"
+# Not a sales aggregate: an index-only COUNT on the Publisher_Orders(isbn) foreign key index
+REPLENISHMENT_QUERY = "SELECT COUNT(*) as order_count FROM Publisher_Orders WHERE isbn = %s"
 
 class Publisher:
     @staticmethod
     def get_pending_orders():
-        conn = get_db_connection()
-        if not conn:
-            return []
-        try:
+        with db_connection() as conn:
+            if not conn:
+                return []
             cursor = conn.cursor(dictionary=True)
             # Join with Publisher name and Book title
-            query = """
-                SELECT po.po_id, po.isbn, po.quantity, po.order_date, b.title, p.name as publisher_name
-                FROM Publisher_Orders po
-                JOIN Books b ON po.isbn = b.isbn
-                JOIN Publishers p ON po.publisher_id = p.publisher_id
-                WHERE po.status = 'Pending'
-            """
-            cursor.execute(query)
+            cursor.execute(PENDING_QUERY)
             return cursor.fetchall()
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
 
     @staticmethod
     def confirm_order(po_id):
         """
-        Mark order as confirmed. Trigger will update stock.
+        Mark one order as confirmed and add its quantity to the book's stock.
+        """
+        success, message, count = Publisher.confirm_orders(po_ids=[po_id])
+        if success and not count:
+            return False, "Order not found"
+        return success, ("Order confirmed" if success else message)
+
+    @staticmethod
+    def confirm_orders(po_ids=None, publisher_id=None, all_pending=False):
+        """
+        Confirm pending publisher orders in bulk: the given po_ids, every pending order
+        of publisher_id, or all_pending. Returns (success, message, confirmed count).
+
+        One transaction of a few set-based statements however many orders there are:
+        lock the pending rows, flip their status, then add the quantities to Books
+        summed per book (one UPDATE per STOCK_CHUNK books, rows in ISBN order).
+        Orders that are already confirmed are skipped.
         """
-        conn = get_db_connection()
-        if not conn:
-            return False, "Connection error"
-        try:
-            cursor = conn.cursor()
-            cursor.execute("UPDATE Publisher_Orders SET status='Confirmed' WHERE po_id=%s", (po_id,))
-            rows_affected = cursor.rowcount
-            conn.commit()
-            if rows_affected > 0:
-                return True, "Order confirmed"
-            else:
-                return False, "Order not found"
-        except Exception as e:
-            return False, str(e)
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+        conditions, params = ["status = 'Pending'"], []
+        if po_ids is not None:
+            po_ids = sorted({int(po_id) for po_id in po_ids})
+            if not po_ids:
+                return False, "No orders selected", 0
+            conditions.append(f"po_id IN ({', '.join(['%s'] * len(po_ids))})")
+            params.extend(po_ids)
+        if publisher_id is not None:
+            conditions.append("publisher_id = %s")
+            params.append(publisher_id)
+        if not params and not all_pending:
+            return False, "No orders selected", 0
+
+        with db_connection() as conn:
+            if not conn:
+                return False, "Connection error", 0
+            try:
+                cursor = conn.cursor()
+                conn.start_transaction()
+
+                # 1. Lock the orders (a concurrent confirm waits, then finds them confirmed)
+                cursor.execute(CONFIRM_LOCK_QUERY.format(conditions=' AND '.join(conditions)), params)
+                orders = cursor.fetchall()
+                if not orders:
+                    conn.rollback()
+                    return True, "No pending orders to confirm", 0
+
+                # 2. Flip them all at once
+                locked_ids = [order[0] for order in orders]
+                cursor.execute(f"""
+                    UPDATE Publisher_Orders SET status = 'Confirmed'
+                    WHERE po_id IN ({', '.join(['%s'] * len(locked_ids))})
+                """, locked_ids)
+
+                # 3. Restock: one increment per book, whatever the number of its orders
+                totals = {}
+                for _, isbn, quantity in orders:
+                    totals[isbn] = totals.get(isbn, 0) + quantity
+                isbns = sorted(totals)
+                for i in range(0, len(isbns), STOCK_CHUNK):
+                    chunk = isbns[i:i + STOCK_CHUNK]
+                    cases = " ".join(["WHEN %s THEN %s"] * len(chunk))
+                    case_params = [value for isbn in chunk for value in (isbn, totals[isbn])]
+                    cursor.execute(f"""
+                        UPDATE Books SET stock = stock + CASE isbn {cases} END
+                        WHERE isbn IN ({', '.join(['%s'] * len(chunk))})
+                    """, case_params + chunk)
+
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                return False, str(e), 0
+
+        Book.stock_changed(*isbns)
+        AdminStats.invalidate()
+        return True, f"{len(orders)} orders confirmed ({len(isbns)} books restocked)", len(orders)
 
     @staticmethod
     def get_all_publishers():
         # Helper for dropdowns
-        conn = get_db_connection()
-        if not conn: return []
-        try:
+        with db_connection() as conn:
+            if not conn: return []
             cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM Publishers")
+            cursor.execute(PUBLISHERS_QUERY)
             return cursor.fetchall()
-        finally:
-            conn.close()
 
     @staticmethod
     def add_publisher(name, address, email, phone, banking):
-        conn = get_db_connection()
-        if not conn: return False, "DB Connection Error"
-        try:
-            cursor = conn.cursor()
-            query = """
-                INSERT INTO Publishers (name, address, email_address, phone_number, banking_account)
-                VALUES (%s, %s, %s, %s, %s)
-            """
-            cursor.execute(query, (name, address, email, phone, banking))
-            conn.commit()
-            return True, "Publisher added successfully"
-        except Exception as e:
-            return False, str(e)
-        finally:
-            conn.close()
-
-    # Reports Logic can be here or in a separate Report model, 
+        with db_connection() as conn:
+            if not conn: return False, "DB Connection Error"
+            try:
+                cursor = conn.cursor()
+                query = """
+                    INSERT INTO Publishers (name, address, email_address, phone_number, banking_account)
+                    VALUES (%s, %s, %s, %s, %s)
+                """
+                cursor.execute(query, (name, address, email, phone, banking))
+                conn.commit()
+                return True, "Publisher added successfully"
+            except Exception as e:
+                return False, str(e)
+
+    # Reports Logic can be here or in a separate Report model,
     # but file-structure says models/publisher.py generates reports (line 141)
-    
+
+    # Sales reports read the daily rollups (models/sales_rollup.py), so their cost
+    # grows with the number of days covered, not with the number of orders.
+
     @staticmethod
     def report_sales_last_month():
-        conn = get_db_connection()
-        try:
+        with db_connection(readonly=True) as conn:
+            if not conn: return 0
             cursor = conn.cursor(dictionary=True)
-            # Query from db.sql line 160
-            query = """
-                SELECT SUM(total_price) AS Last_Month_Sales
-                FROM Customer_Orders 
-                WHERE order_date >= DATE_FORMAT(CURRENT_DATE - INTERVAL 1 MONTH, '%Y-%m-01') 
-                AND order_date < DATE_FORMAT(CURRENT_DATE, '%Y-%m-01')
-            """
-            cursor.execute(query)
+            cursor.execute(LAST_MONTH_SALES_QUERY)
             result = cursor.fetchone()
-            return result['Last_Month_Sales'] if result else 0
-        finally:
-            if conn: conn.close()
+            return (result['Last_Month_Sales'] or 0) if result else 0
 
     @staticmethod
     def report_sales_day(date_str):
-        conn = get_db_connection()
-        try:
+        with db_connection(readonly=True) as conn:
+            if not conn: return 0
             cursor = conn.cursor(dictionary=True)
-            query = """
-                SELECT SUM(total_price) AS Daily_Sales
-                FROM Customer_Orders 
-                WHERE date(order_date) = %s
-            """
-            cursor.execute(query, (date_str,))
+            cursor.execute(DAY_SALES_QUERY, (date_str,))
             result = cursor.fetchone()
             return result['Daily_Sales'] if result and result['Daily_Sales'] else 0
-        finally:
-            if conn: conn.close()
 
     @staticmethod
     def get_replenishment_history(isbn):
-        conn = get_db_connection()
-        try:
+        with db_connection(readonly=True) as conn:
+            if not conn: return 0
             cursor = conn.cursor(dictionary=True)
-            query = """
-                SELECT COUNT(*) as order_count
-                FROM Publisher_Orders
-                WHERE isbn = %s
-            """
-            cursor.execute(query, (isbn,))
+            cursor.execute(REPLENISHMENT_QUERY, (isbn,))
             result = cursor.fetchone()
             return result['order_count'] if result else 0
-        finally:
-            if conn: conn.close()
@@ -0,0 +1,253 @@
+import hashlib
+import json
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+import mysql.connector
+from config import Config
+from database.connection import db_connection
+from models.book import Book
+from models.publisher import Publisher
+from models.user import User
+from utils.forking import after_fork
+
+# report name -> (function, parameter names)
+REPORTS = {
+    'sales-month': (Publisher.report_sales_last_month, ()),
+    'sales-day': (Publisher.report_sales_day, ('date',)),
+    'top-customers': (User.get_top_customers, ()),
+    'top-books': (Book.get_top_selling_books, ()),
+    'replenishment': (Publisher.get_replenishment_history, ('isbn',)),
+}
+
+JOB_COLUMNS = "job_id, report, params, status, result, error, submitted_at, finished_at"
+PRUNE_BATCH = 100
+
+ACTIVE_QUERY = f"SELECT {JOB_COLUMNS} FROM Report_Jobs WHERE active_key = %s"
+CACHED_QUERY = f"""
+    SELECT {JOB_COLUMNS} FROM Report_Jobs
+    WHERE params_key = %s AND status = 'done' AND finished_at >= NOW(3) - INTERVAL %s SECOND
+    ORDER BY finished_at DESC
+    LIMIT 1
+"""
+# Give up on jobs whose worker died
+ABANDON_QUERY = """
+    UPDATE Report_Jobs
+    SET status = 'failed', error = 'Report was abandoned, please try again',
+        finished_at = NOW(3), active_key = NULL
+    WHERE active_key IS NOT NULL AND submitted_at < NOW(3) - INTERVAL %s SECOND
+"""
+# Forget finished jobs nobody polled for a while
+PRUNE_QUERY = """
+    DELETE FROM Report_Jobs
+    WHERE finished_at < NOW(3) - INTERVAL %s SECOND
+    LIMIT %s
+"""
+
+class ReportBusy(Exception):
+    """
+    Raised when too many report jobs are already waiting (or the job table can't be reached).
+    """
+
+class ReportJobRunner:
+    """
+    Runs admin reports on a background thread pool instead of the request thread.
+
+    submit() returns a job right away; the page polls get() until it is done.
+    Jobs live in the Report_Jobs table, so any worker process can answer a poll for a
+    job another one is running, and identical requests share one computation whichever
+    worker gets them: while a job is queued or running its active_key (report and
+    parameters) is set, and that column is unique. A finished result is reused for
+    Config.REPORT_CACHE_TTL seconds. A job whose worker died before finishing it is
+    given up after Config.REPORT_JOB_RETENTION seconds. Both clean-ups run at most once
+    per prune_interval in each process, from submit().
+    """
+
+    def __init__(self, workers, queue_size, cache_ttl, retention, prune_interval):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.cache_ttl = cache_ttl
+        self.retention = retention
+        self.prune_interval = prune_interval
+        self.reset()
+
+    def reset(self):
+        """
+        New thread pool (used in forked workers: the parent's pool threads are not copied).
+        """
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='report')
+        self._queued = set()  # ids of the jobs this process has queued but not started
+        self._lock = threading.Lock()
+        self._prune_lock = threading.Lock()
+        self._last_prune = float('-inf')
+
+    def submit(self, report, params=None):
+        """
+        Start (or join, or answer from cache) a report. Returns the job dict.
+        Raises KeyError for an unknown report, ValueError for missing parameters.
+        """
+        fn, names = REPORTS[report]
+        params = params or {}
+        values = tuple(str(params.get(name) or '').strip() for name in names)
+        missing = [name for name, value in zip(names, values) if not value]
+        if missing:
+            raise ValueError(f"Missing {', '.join(missing)}")
+        key = hashlib.sha256(json.dumps([report, values]).encode('utf-8')).hexdigest()
+        self._prune_if_due()
+
+        with db_connection() as conn:
+            if not conn:
+                raise ReportBusy("Database connection error")
+            cursor = conn.cursor(dictionary=True)
+
+            # Running or queued somewhere: join it
+            cursor.execute(ACTIVE_QUERY, (key,))
+            job = cursor.fetchone()
+            if job:
+                return self._job(job)
+
+            # Finished recently: reuse the result
+            cursor.execute(CACHED_QUERY, (key, self.cache_ttl))
+            job = cursor.fetchone()
+            if job:
+                return self._job(job, cached=True)
+
+            cursor.execute("SELECT COUNT(*) AS count FROM Report_Jobs WHERE active_key IS NOT NULL")
+            if cursor.fetchone()['count'] >= self.queue_size:
+                raise ReportBusy("Too many reports are running, try again shortly")
+
+            job_id = uuid.uuid4().hex
+            try:
+                cursor.execute("""
+                    INSERT INTO Report_Jobs (job_id, report, params, params_key, active_key)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, (job_id, report, json.dumps(dict(zip(names, values))), key, key))
+                conn.commit()
+            except mysql.connector.IntegrityError:
+                # Another worker queued the same report a moment ago
+                conn.rollback()
+                cursor.execute(ACTIVE_QUERY, (key,))
+                job = cursor.fetchone()
+                if job:
+                    return self._job(job)
+                raise ReportBusy("Report is being restarted, try again shortly")
+            cursor.execute(f"SELECT {JOB_COLUMNS} FROM Report_Jobs WHERE job_id = %s", (job_id,))
+            job = cursor.fetchone()
+
+        with self._lock:
+            self._queued.add(job_id)
+        self._executor.submit(self._run, job_id, fn, values)
+        return self._job(job)
+
+    def get(self, job_id):
+        with db_connection() as conn:
+            if not conn:
+                return None
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(f"SELECT {JOB_COLUMNS} FROM Report_Jobs WHERE job_id = %s", (job_id,))
+            job = cursor.fetchone()
+        return self._job(job) if job else None
+
+    def wait(self, job_id, timeout=None):
+        """
+        Block until the job is finished (for callers without polling). Returns the job dict.
+        """
+        deadline = time.monotonic() + (timeout or Config.REPORT_WAIT_TIMEOUT)
+        delay = 0.05
+        while True:
+            job = self.get(job_id)
+            if job is None or job['status'] in ('done', 'failed') or time.monotonic() >= deadline:
+                return job
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    def shutdown(self, cancel_pending=False):
+        """
+        Wait for the running reports; with cancel_pending, queued ones never start
+        (and are marked failed, so nobody waits for them).
+        """
+        self._executor.shutdown(wait=True, cancel_futures=cancel_pending)
+        with self._lock:
+            cancelled, self._queued = list(self._queued), set()
+        if cancelled:
+            self._finish(cancelled, 'failed', None, "Server restarted before the report ran, please try again")
+
+    def _run(self, job_id, fn, values):
+        with self._lock:
+            self._queued.discard(job_id)
+        try:
+            with db_connection() as conn:
+                if conn:
+                    cursor = conn.cursor()
+                    cursor.execute("UPDATE Report_Jobs SET status = 'running' WHERE job_id = %s", (job_id,))
+                    conn.commit()
+            result = json.dumps(fn(*values), default=_json_value)
+            error = None
+        except Exception as e:
+            result, error = None, str(e)
+        self._finish([job_id], 'failed' if error else 'done', result, error)
+
+    def _finish(self, job_ids, status, result, error):
+        placeholders = ", ".join(["%s"] * len(job_ids))
+        with db_connection() as conn:
+            if not conn:
+                return  # given up after the retention time
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                UPDATE Report_Jobs
+                SET status = %s, result = %s, error = %s, finished_at = NOW(3), active_key = NULL
+                WHERE job_id IN ({placeholders}) AND active_key IS NOT NULL
+            """, [status, result, error] + list(job_ids))
+            conn.commit()
+
+    def _prune_if_due(self):
+        # One request per interval does it; the others (and that one, on failure) go on
+        now = time.monotonic()
+        if now - self._last_prune < self.prune_interval or not self._prune_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_prune = now
+            self._prune()
+        except mysql.connector.Error as e:
+            print(f"⚠️ Report job pruning failed: {e}")
+        finally:
+            self._prune_lock.release()
+
+    def _prune(self):
+        # Give up on jobs whose worker died, then prune old finished ones
+        with db_connection() as conn:
+            if not conn:
+                return
+            cursor = conn.cursor()
+            cursor.execute(ABANDON_QUERY, (self.retention,))
+            cursor.execute(PRUNE_QUERY, (self.retention, PRUNE_BATCH))
+            conn.commit()
+
+    @staticmethod
+    def _job(row, cached=False):
+        return {
+            'job_id': row['job_id'],
+            'report': row['report'],
+            'params': json.loads(row['params']),
+            'status': row['status'],
+            'result': json.loads(row['result']) if row['result'] is not None else None,
+            'error': row['error'],
+            'cached': cached,
+            'submitted_at': row['submitted_at'],
+            'finished_at': row['finished_at'],
+        }
+
+def _json_value(value):
+    # Amounts as strings keep exact cents (shown as is by the reports page)
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot store {type(value).__name__} in a report result")
+
+report_jobs = ReportJobRunner(Config.REPORT_WORKERS, Config.REPORT_QUEUE_SIZE,
+                              Config.REPORT_CACHE_TTL, Config.REPORT_JOB_RETENTION, Config.REPORT_PRUNE_INTERVAL)
+after_fork(report_jobs.reset)
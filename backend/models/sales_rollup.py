@@ -0,0 +1,94 @@
+from database.connection import db_connection
+
+# Daily sales rollups feeding the admin reports:
+#   Sales_Daily           (sale_date)          -> order_count, total_sales
+#   Book_Sales_Daily      (sale_date, isbn)    -> units
+#   Customer_Spend_Daily  (sale_date, user_id) -> order_count, total_spent
+# Each statement aggregates the Customer_Orders rows matched by {where} and adds them
+# onto the existing rollup rows, so the same SQL records one order or backfills history.
+
+SALES_UPSERT = """
+    INSERT INTO Sales_Daily (sale_date, order_count, total_sales)
+    SELECT * FROM (
+        SELECT DATE(co.order_date) AS sale_date, COUNT(*) AS order_count,
+               COALESCE(SUM(co.total_price), 0) AS total_sales
+        FROM Customer_Orders co
+        {where}
+        GROUP BY DATE(co.order_date)
+    ) AS src
+    ON DUPLICATE KEY UPDATE order_count = Sales_Daily.order_count + src.order_count,
+                            total_sales = Sales_Daily.total_sales + src.total_sales
+"""
+
+BOOK_SALES_UPSERT = """
+    INSERT INTO Book_Sales_Daily (sale_date, isbn, units)
+    SELECT * FROM (
+        SELECT DATE(co.order_date) AS sale_date, oi.isbn, SUM(oi.quantity) AS units
+        FROM Customer_Orders co
+        JOIN Order_Items oi ON oi.order_id = co.order_id
+        {where}
+        GROUP BY DATE(co.order_date), oi.isbn
+    ) AS src
+    ON DUPLICATE KEY UPDATE units = Book_Sales_Daily.units + src.units
+"""
+
+CUSTOMER_SPEND_UPSERT = """
+    INSERT INTO Customer_Spend_Daily (sale_date, user_id, order_count, total_spent)
+    SELECT * FROM (
+        SELECT DATE(co.order_date) AS sale_date, co.user_id, COUNT(*) AS order_count,
+               COALESCE(SUM(co.total_price), 0) AS total_spent
+        FROM Customer_Orders co
+        {where}
+        GROUP BY DATE(co.order_date), co.user_id
+    ) AS src
+    ON DUPLICATE KEY UPDATE order_count = Customer_Spend_Daily.order_count + src.order_count,
+                            total_spent = Customer_Spend_Daily.total_spent + src.total_spent
+"""
+
+class SalesRollup:
+    @staticmethod
+    def _apply(cursor, conditions, params):
+        where = "WHERE " + " AND ".join(conditions) if conditions else ""
+        cursor.execute(SALES_UPSERT.format(where=where), params)
+        cursor.execute(BOOK_SALES_UPSERT.format(where=where), params)
+        customer_where = "WHERE " + " AND ".join(conditions + ["co.user_id IS NOT NULL"])
+        cursor.execute(CUSTOMER_SPEND_UPSERT.format(where=customer_where), params)
+
+    @staticmethod
+    def record_order(cursor, order_id):
+        """
+        Add one freshly inserted order (header + items) to the rollups.
+        Call inside the checkout transaction, as late as possible: today's
+        Sales_Daily row is shared by every checkout and stays locked until commit.
+        """
+        SalesRollup._apply(cursor, ["co.order_id = %s"], (order_id,))
+
+    @staticmethod
+    def rebuild(since=None):
+        """
+        Recompute the rollups from Customer_Orders/Order_Items, for every day
+        or only from the date `since` (YYYY-MM-DD) onwards.
+        Returns the number of days rebuilt.
+        """
+        with db_connection() as conn:
+            if not conn:
+                return 0
+            try:
+                cursor = conn.cursor()
+                conn.start_transaction()
+                if since:
+                    for table in ('Sales_Daily', 'Book_Sales_Daily', 'Customer_Spend_Daily'):
+                        cursor.execute(f"DELETE FROM {table} WHERE sale_date >= %s", (since,))
+                    SalesRollup._apply(cursor, ["co.order_date >= %s"], (since,))
+                    cursor.execute("SELECT COUNT(*) FROM Sales_Daily WHERE sale_date >= %s", (since,))
+                else:
+                    for table in ('Sales_Daily', 'Book_Sales_Daily', 'Customer_Spend_Daily'):
+                        cursor.execute(f"DELETE FROM {table}")
+                    SalesRollup._apply(cursor, [], ())
+                    cursor.execute("SELECT COUNT(*) FROM Sales_Daily")
+                days = cursor.fetchone()[0]
+                conn.commit()
+                return days
+            except Exception:
+                conn.rollback()
+                raise
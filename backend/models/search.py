@@ -0,0 +1,229 @@
+import re
+from decimal import Decimal, InvalidOperation
+from database.connection import db_connection
+from database import statements
+
+# Words are indexed by InnoDB FULLTEXT; anything that is not a word character is dropped,
+# so user input can never smuggle boolean-mode operators into the query.
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+# Digits, dashes and X only -> a generic query is also an ISBN prefix (ISBN hits rank first)
+ISBN_RE = re.compile(r'^[0-9Xx-]*[0-9][0-9Xx-]*$')
+MAX_TOKEN_LENGTH = 84  # innodb_ft_max_token_size
+MAX_ROWS = 2 ** 63 - 1  # LIMIT of a search without a limit
+ISBN_HIT_SCORE = 1000000  # above any MATCH() relevance
+
+# Books whose ISBN starts with the prefix or whose document has the words: one branch per
+# index (an OR of the two in WHERE could use neither)
+ISBN_OR_WORDS_JOIN = """
+    JOIN (
+        SELECT isbn FROM Book_Search WHERE isbn LIKE %s
+        UNION
+        SELECT isbn FROM Book_Search WHERE MATCH(title, authors, publisher_name) AGAINST (%s IN BOOLEAN MODE)
+    ) hit ON hit.isbn = s.isbn
+"""
+
+# (isbn, title, authors, publisher_name) for every book matched by {where}
+DOCUMENT_QUERY = """
+    SELECT b.isbn, b.title, GROUP_CONCAT(a.author_name SEPARATOR ', ') AS authors, p.name AS publisher_name
+    FROM Books b
+    JOIN Publishers p ON b.publisher_id = p.publisher_id
+    LEFT JOIN Book_Authors ba ON b.isbn = ba.isbn
+    LEFT JOIN Authors a ON ba.author_id = a.author_id
+    {where}
+    GROUP BY b.isbn
+"""
+
+UPSERT_QUERY = """
+    INSERT INTO Book_Search (isbn, title, authors, publisher_name)
+    SELECT * FROM ({documents}) AS doc
+    ON DUPLICATE KEY UPDATE title = doc.title, authors = doc.authors, publisher_name = doc.publisher_name
+"""
+
+class BookSearch:
+    """
+    Ranked catalog search over the Book_Search table.
+
+    Each book has one search document (title, authors, publisher name) with FULLTEXT
+    indexes on the whole document and on each column. Queries run in boolean mode with
+    every word required and prefix-matched ("harr pot" finds "Harry Potter"), ranked by
+    relevance with matches in the title counting double.
+    """
+
+    @staticmethod
+    def boolean_query(text):
+        """
+        Turn free text into a boolean-mode query: +word1* +word2* ...
+        Returns None if the text contains no searchable words.
+        """
+        if not text:
+            return None
+        tokens = [t for t in TOKEN_RE.findall(text.lower()) if len(t) <= MAX_TOKEN_LENGTH]
+        if not tokens:
+            return None
+        return ' '.join(f'+{t}*' for t in tokens)
+
+    @staticmethod
+    def index_book(cursor, isbn):
+        """
+        (Re)build the search document for one book.
+        Call inside the transaction that changed the book, its authors or its publisher.
+        """
+        documents = DOCUMENT_QUERY.format(where="WHERE b.isbn = %s")
+        cursor.execute(UPSERT_QUERY.format(documents=documents), (isbn,))
+
+    @staticmethod
+    def index_books(cursor, isbns):
+        """
+        index_book for many books in one statement (bulk import).
+        """
+        if not isbns:
+            return
+        placeholders = ", ".join(["%s"] * len(isbns))
+        documents = DOCUMENT_QUERY.format(where=f"WHERE b.isbn IN ({placeholders})")
+        cursor.execute(UPSERT_QUERY.format(documents=documents), list(isbns))
+
+    @staticmethod
+    def rebuild():
+        """
+        Rebuild every search document from Books/Authors/Publishers.
+        Returns the number of documents written.
+        """
+        with db_connection() as conn:
+            if not conn:
+                return 0
+            try:
+                cursor = conn.cursor()
+                conn.start_transaction()
+                cursor.execute("DELETE FROM Book_Search WHERE isbn NOT IN (SELECT isbn FROM Books)")
+                cursor.execute(UPSERT_QUERY.format(documents=DOCUMENT_QUERY.format(where="")))
+                cursor.execute("SELECT COUNT(*) FROM Book_Search")
+                count = cursor.fetchone()[0]
+                conn.commit()
+                return count
+            except Exception:
+                conn.rollback()
+                raise
+
+    @staticmethod
+    def search(query_str=None, isbn=None, title=None, author=None, publisher=None, category=None,
+               after=None, limit=None):
+        """
+        Returns books in the same shape as Book.get_book_details (b.*, publisher_name, authors)
+        plus a 'relevance' score, best matches first (ties broken by ISBN).
+        after: sort key [relevance, isbn] of the last row already shown (see cursor_key)
+        limit: maximum number of rows
+        """
+        built = BookSearch.build_query(query_str=query_str, isbn=isbn, title=title, author=author,
+                                       publisher=publisher, category=category, after=after, limit=limit)
+        if built is None:
+            return []
+        query, params = built
+        with db_connection(readonly=True) as conn:
+            if not conn:
+                return []
+            return statements.fetch_records(conn, query, params)
+
+    @staticmethod
+    def build_query(query_str=None, isbn=None, title=None, author=None, publisher=None, category=None,
+                    after=None, limit=None):
+        """
+        (query, params) of a search, or None if it can match nothing (no searchable words).
+        """
+        score_terms, score_params = [], []
+        joins, join_params = [], []
+        where_clauses, params = [], []
+
+        def match(columns, text, weight=1):
+            terms = BookSearch.boolean_query(text)
+            if terms is None:
+                return False
+            where_clauses.append(f"MATCH({columns}) AGAINST (%s IN BOOLEAN MODE)")
+            params.append(terms)
+            score_terms.append(f"{weight} * MATCH({columns}) AGAINST (%s IN BOOLEAN MODE)")
+            score_params.append(terms)
+            return True
+
+        # Generic query (global search box): words anywhere in the document, and if it
+        # looks like one, an ISBN prefix ("1984" is both)
+        if query_str:
+            query_str = query_str.strip()
+            if ISBN_RE.match(query_str):
+                terms = BookSearch.boolean_query(query_str)  # never None: there is a digit
+                joins.append(ISBN_OR_WORDS_JOIN)
+                join_params += [f"{query_str}%", terms]
+                score_terms.append(f"{ISBN_HIT_SCORE} * (s.isbn LIKE %s)")
+                score_params.append(f"{query_str}%")
+                score_terms.append("MATCH(s.title, s.authors, s.publisher_name) AGAINST (%s IN BOOLEAN MODE)")
+                score_params.append(terms)
+                score_terms.append("2 * MATCH(s.title) AGAINST (%s IN BOOLEAN MODE)")
+                score_params.append(terms)
+            else:
+                if not match("s.title, s.authors, s.publisher_name", query_str):
+                    return None
+                # Title hits rank above author/publisher hits
+                score_terms.append("2 * MATCH(s.title) AGAINST (%s IN BOOLEAN MODE)")
+                score_params.append(BookSearch.boolean_query(query_str))
+
+        # Specific fields
+        if isbn:
+            where_clauses.append("s.isbn LIKE %s")
+            params.append(f"{isbn.strip()}%")
+
+        if title and not match("s.title", title, weight=2):
+            return None
+
+        if author and not match("s.authors", author):
+            return None
+
+        if publisher and not match("s.publisher_name", publisher):
+            return None
+
+        if category:
+            where_clauses.append("b.category = %s")
+            params.append(category)
+
+        # Fixed precision so the score round-trips exactly through a page cursor
+        score = " + ".join(score_terms) if score_terms else "0"
+        query = f"""
+            SELECT b.*, s.publisher_name, s.authors, CAST({score} AS DECIMAL(20, 6)) AS relevance
+            FROM Book_Search s
+            JOIN Books b ON b.isbn = s.isbn
+        """ + "".join(joins)
+        having, having_params = "", []
+        after = BookSearch._parse_key(after)
+        if after and score_terms:
+            # Keyset on (relevance DESC, isbn ASC); relevance is computed, so filter after scoring
+            having = " HAVING relevance < %s OR (relevance = %s AND isbn > %s)"
+            having_params = [after[0], after[0], after[1]]
+        elif after:
+            # Unscored listing: plain primary-key range scan
+            where_clauses.append("s.isbn > %s")
+            params.append(after[1])
+
+        if where_clauses:
+            query += " WHERE " + " AND ".join(where_clauses)
+        query += having
+        query += " ORDER BY relevance DESC, s.isbn" if score_terms else " ORDER BY s.isbn"
+        # Always a LIMIT placeholder, so a search with and without a limit share a statement
+        query += " LIMIT %s"
+        having_params.append(int(limit) if limit else MAX_ROWS)
+
+        # The filters above are always added in the same order, so each combination of
+        # filters gives one statement text: prepared once per connection, then reused
+        return statements.canonical(query), score_params + join_params + params + having_params
+
+    @staticmethod
+    def cursor_key(row):
+        """
+        Sort key of a search result row, for utils.pagination.
+        """
+        return [row['relevance'], row['isbn']]
+
+    @staticmethod
+    def _parse_key(after):
+        if not after or len(after) != 2:
+            return None
+        try:
+            return [Decimal(after[0]), after[1]]
+        except InvalidOperation:
+            return None
@@ -0,0 +1,203 @@
+import time
+import uuid
+import threading
+from config import Config
+from database.connection import db_connection
+from database import statements
+from utils.forking import after_fork
+
+# Checkout takes stock in two steps so a hot title's Books row is only locked for
+# a moment instead of for the whole order transaction:
+#   1. reserve()  - one short transaction: for each line, in ISBN order, a conditional
+#                   increment of Books.reserved (UPDATE ... WHERE stock - reserved >= qty) plus
+#                   a Stock_Reservations row. Commits right away, so the row lock is released
+#                   before the order is written. Books.stock itself is untouched: a checkout
+#                   that fails or is abandoned never fires Auto_Order_Trigger.
+#   2. consume()  - inside the order transaction: moves the reserved quantities out of both
+#                   stock and reserved (the sale; Auto_Order_Trigger fires here as for any
+#                   stock change) and deletes the reservation rows. If they are gone (expired
+#                   and swept), the order must roll back.
+# On failure release() hands the reserved units back; reservations nobody consumed or
+# released (crashed worker) expire after Config.RESERVATION_TTL and are swept by
+# release_expired(). stock - reserved is what can still be sold.
+
+RELEASE_BATCH = 500
+
+RESERVE_QUERY = "UPDATE Books SET reserved = reserved + %s WHERE isbn = %s AND stock - reserved >= %s"
+LINES_QUERY = """
+    SELECT isbn, quantity FROM Stock_Reservations
+    WHERE reservation_id = %s ORDER BY isbn FOR UPDATE
+"""
+# Locks the reservation's lines and their books, in ISBN order, before the sale
+CONSUME_LINES_QUERY = """
+    SELECT r.isbn, r.quantity, b.stock, b.threshold
+    FROM Stock_Reservations r
+    JOIN Books b ON b.isbn = r.isbn
+    WHERE r.reservation_id = %s ORDER BY r.isbn FOR UPDATE
+"""
+# The sale: every line of the reservation in one statement
+CONSUME_QUERY = """
+    UPDATE Books b
+    JOIN Stock_Reservations r ON r.isbn = b.isbn
+    SET b.stock = b.stock - r.quantity, b.reserved = b.reserved - r.quantity
+    WHERE r.reservation_id = %s
+"""
+# Given back: the listed (reservation_id, isbn) lines, summed per book (several expired
+# reservations can hold the same book, and a multi-table UPDATE changes each row once)
+UNRESERVE_QUERY = """
+    UPDATE Books b
+    JOIN (
+        SELECT isbn, SUM(quantity) AS quantity FROM Stock_Reservations
+        WHERE (reservation_id, isbn) IN ({placeholders})
+        GROUP BY isbn
+    ) r ON r.isbn = b.isbn
+    SET b.reserved = b.reserved - r.quantity
+"""
+# SKIP LOCKED: a line being consumed right now belongs to that checkout
+EXPIRED_QUERY = """
+    SELECT reservation_id, isbn, quantity FROM Stock_Reservations
+    WHERE expires_at < NOW()
+    ORDER BY isbn
+    LIMIT %s
+    FOR UPDATE SKIP LOCKED
+"""
+
+_sweep_lock = threading.Lock()
+_last_sweep = 0.0
+
+class StockReservation:
+    @staticmethod
+    def reserve(lines, ttl=None):
+        """
+        Reserve stock for [(isbn, quantity), ...].
+        Returns (reservation_id, None), or (None, error message) with nothing reserved.
+        """
+        ttl = int(ttl or Config.RESERVATION_TTL)
+        # Same lock order for every checkout, so two carts sharing books can't deadlock
+        lines = sorted(lines)
+        reservation_id = uuid.uuid4().hex
+
+        with db_connection() as conn:
+            if not conn:
+                return None, "Database connection error"
+            try:
+                conn.start_transaction()
+                for isbn, quantity in lines:
+                    # Never reserves more than is unsold and unreserved
+                    cursor = statements.execute(conn, RESERVE_QUERY, (quantity, isbn, quantity))
+                    if cursor.rowcount != 1:
+                        conn.rollback()
+                        return None, f"Not enough stock for book {isbn}"
+
+                placeholders = ", ".join(["(%s, %s, %s, NOW() + INTERVAL %s SECOND)"] * len(lines))
+                params = []
+                for isbn, quantity in lines:
+                    params.extend([reservation_id, isbn, quantity, ttl])
+                statements.execute(conn, f"INSERT INTO Stock_Reservations (reservation_id, isbn, quantity, expires_at) "
+                                         f"VALUES {placeholders}", params)
+                conn.commit()
+                return reservation_id, None
+            except Exception as e:
+                conn.rollback()
+                return None, str(e)
+
+    @staticmethod
+    def consume(cursor, reservation_id, line_count):
+        """
+        Turn a reservation into a sale. Call inside the order transaction; returns None
+        if the reservation already expired (its stock went back), so the caller must roll back.
+        Otherwise the ISBNs this sale took below their threshold (Auto_Order_Trigger ordered
+        more of them), usually none.
+        The sold books' rows stay locked until the caller commits.
+        """
+        cursor.execute(CONSUME_LINES_QUERY, (reservation_id,))
+        lines = cursor.fetchall()
+        if len(lines) != line_count:
+            return None
+        cursor.execute(CONSUME_QUERY, (reservation_id,))
+        cursor.execute("DELETE FROM Stock_Reservations WHERE reservation_id = %s", (reservation_id,))
+        return [isbn for isbn, quantity, stock, threshold in lines if stock >= threshold > stock - quantity]
+
+    @staticmethod
+    def release(reservation_id):
+        """
+        Give a reservation's units back (checkout failed). Lines already consumed
+        or swept are not there anymore, so nothing is ever returned twice.
+        """
+        with db_connection() as conn:
+            if not conn:
+                return False
+            try:
+                cursor = conn.cursor()
+                conn.start_transaction()
+                cursor.execute(LINES_QUERY, (reservation_id,))
+                rows = [(reservation_id, isbn, qty) for isbn, qty in cursor.fetchall()]
+                StockReservation._unreserve(cursor, rows)
+                conn.commit()
+                return True
+            except Exception:
+                conn.rollback()
+                return False
+
+    @staticmethod
+    def release_expired(limit=None):
+        """
+        Give back the units of every expired reservation. Returns the number of lines released.
+        """
+        limit = limit or RELEASE_BATCH
+        released = 0
+        with db_connection() as conn:
+            if not conn:
+                return 0
+            cursor = conn.cursor()
+            while True:
+                try:
+                    conn.start_transaction()
+                    cursor.execute(EXPIRED_QUERY, (limit,))
+                    rows = cursor.fetchall()
+                    StockReservation._unreserve(cursor, rows)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                released += len(rows)
+                if len(rows) < limit:
+                    break
+        return released
+
+    @staticmethod
+    def sweep_if_due():
+        """
+        release_expired() at most once per Config.RESERVATION_SWEEP_INTERVAL in this process
+        (called from checkout, so abandoned reservations come back without a cron job).
+        """
+        global _last_sweep
+        now = time.monotonic()
+        if now - _last_sweep < Config.RESERVATION_SWEEP_INTERVAL or not _sweep_lock.acquire(blocking=False):
+            return 0
+        try:
+            _last_sweep = now
+            return StockReservation.release_expired()
+        except Exception as e:
+            print(f"⚠️ Reservation sweep failed: {e}")
+            return 0
+        finally:
+            _sweep_lock.release()
+
+    @staticmethod
+    def _unreserve(cursor, rows):
+        # rows: [(reservation_id, isbn, quantity)], already locked by the caller.
+        # Only reserved changes: stock (and so the cached book pages) stays as it was
+        if not rows:
+            return
+        placeholders = ", ".join(["(%s, %s)"] * len(rows))
+        params = []
+        for reservation_id, isbn, _ in rows:
+            params.extend([reservation_id, isbn])
+        cursor.execute(UNRESERVE_QUERY.format(placeholders=placeholders), params)
+        cursor.execute(f"DELETE FROM Stock_Reservations WHERE (reservation_id, isbn) IN ({placeholders})", params)
+
+@after_fork
+def _reset_sweep_after_fork():
+    global _sweep_lock
+    _sweep_lock = threading.Lock()
@@ -1,128 +1,163 @@
-import bcrypt
-from database.connection import get_db_connection
+from concurrent.futures import ThreadPoolExecutor
+from database.connection import db_connection
+from database import statements
+from models.admin_stats import AdminStats
+from models.leaderboards import Leaderboards
+from utils.forking import after_fork
+from utils.passwords import PasswordHasherBusy, hash_password, hash_password_async, check_password, needs_rehash
+
+BUSY_MESSAGE = "Server is busy, please try again in a moment"
+
+TAKEN_QUERY = "SELECT user_id FROM Users WHERE username = %s OR email = %s"
+LOGIN_QUERY = "SELECT * FROM Users WHERE username = %s"
+PROFILE_QUERY = """
+    SELECT user_id, username, first_name, last_name, email, phone_number, shipping_address, role
+    FROM Users WHERE user_id = %s
+"""
+
+# Upgraded hashes are written here, not on the bcrypt pool: a bcrypt worker then never
+# waits for a pool connection, and the writes (rare, one per user) queue up on one thread.
+_hash_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='rehash')
 
 class User:
     @staticmethod
     def register_user(username, password, first_name, last_name, email, phone_number, shipping_address):
-        conn = get_db_connection()
-        if not conn:
-            return False, "Database connection error"
-        
+        # Hash password on the bcrypt worker pool, before taking a DB connection
         try:
-            cursor = conn.cursor(dictionary=True)
-            
-            # Check if username or email exists
-            query_check = "SELECT user_id FROM Users WHERE username = %s OR email = %s"
-            cursor.execute(query_check, (username, email))
-            if cursor.fetchone():
-                return False, "Username or Email already exists"
-
-            # Hash password
-            hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-
-            query_insert = """
-                INSERT INTO Users (username, password, first_name, last_name, email, phone_number, shipping_address, role)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, 'customer')
-            """
-            cursor.execute(query_insert, (username, hashed_password, first_name, last_name, email, phone_number, shipping_address))
-            conn.commit()
-            return True, "User registered successfully"
-        except Exception as e:
-            return False, str(e)
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+            hashed_password = hash_password(password)
+        except PasswordHasherBusy:
+            return False, BUSY_MESSAGE
+
+        with db_connection() as conn:
+            if not conn:
+                return False, "Database connection error"
+
+            try:
+                cursor = conn.cursor(dictionary=True)
+
+                # Check if username or email exists
+                cursor.execute(TAKEN_QUERY, (username, email))
+                if cursor.fetchone():
+                    return False, "Username or Email already exists"
+
+                query_insert = """
+                    INSERT INTO Users (username, password, first_name, last_name, email, phone_number, shipping_address, role)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, 'customer')
+                """
+                cursor.execute(query_insert, (username, hashed_password, first_name, last_name, email, phone_number, shipping_address))
+                conn.commit()
+                AdminStats.invalidate()
+                return True, "User registered successfully"
+            except Exception as e:
+                return False, str(e)
 
     @staticmethod
     def login(username, password):
-        conn = get_db_connection()
-        if not conn:
-            return None, "Database connection error"
-        
-        try:
-            cursor = conn.cursor(dictionary=True)
-            query = "SELECT * FROM Users WHERE username = %s"
-            cursor.execute(query, (username,))
-            user = cursor.fetchone()
+        with db_connection() as conn:
+            if not conn:
+                return None, "Database connection error"
 
-            if user and bcrypt.checkpw(password.encode('utf-8'), user['password'].encode('utf-8')):
+            try:
+                rows = statements.fetch_all(conn, LOGIN_QUERY, (username,),
+                                            dictionary=True)
+                user = rows[0] if rows else None
+            except Exception as e:
+                return None, str(e)
+
+        # Connection is back in the pool while bcrypt runs
+        try:
+            if user and check_password(password, user['password']):
+                if needs_rehash(user['password']):
+                    User._upgrade_hash(user['user_id'], password, user['password'])
                 return user, "Login successful"
             else:
                 return None, "Invalid credentials"
+        except PasswordHasherBusy:
+            return None, BUSY_MESSAGE
         except Exception as e:
             return None, str(e)
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
 
     @staticmethod
-    def get_user_by_id(user_id):
-        conn = get_db_connection()
-        if not conn:
-            return None
+    def _upgrade_hash(user_id, password, old_hash):
+        """
+        Re-hash a password stored at an old cost factor, in the background.
+        Skipped when the hashing queue is full; the next login tries again.
+        """
         try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT user_id, username, first_name, last_name, email, phone_number, shipping_address, role FROM Users WHERE user_id = %s", (user_id,))
-            return cursor.fetchone()
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+            future = hash_password_async(password)
+        except PasswordHasherBusy:
+            return
+        future.add_done_callback(lambda f: User._hashed(f, user_id, old_hash))
 
     @staticmethod
-    def update_profile(user_id, first_name, last_name, email, phone_number, shipping_address, password=None):
-        conn = get_db_connection()
-        if not conn:
-            return False, "Database connection error"
-        try:
+    def _hashed(future, user_id, old_hash):
+        # Runs on the bcrypt thread that computed the hash: only hand the write over
+        if future.cancelled() or future.exception():
+            return
+        _hash_writer.submit(User._store_hash, user_id, future.result(), old_hash)
+
+    @staticmethod
+    def _store_hash(user_id, new_hash, old_hash):
+        with db_connection() as conn:
+            if not conn:
+                return
             cursor = conn.cursor()
-            
-            if password:
-                hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-                query = """
-                    UPDATE Users 
-                    SET first_name=%s, last_name=%s, email=%s, phone_number=%s, shipping_address=%s, password=%s
-                    WHERE user_id=%s
-                """
-                cursor.execute(query, (first_name, last_name, email, phone_number, shipping_address, hashed_password, user_id))
-            else:
-                query = """
-                    UPDATE Users 
-                    SET first_name=%s, last_name=%s, email=%s, phone_number=%s, shipping_address=%s
-                    WHERE user_id=%s
-                """
-                cursor.execute(query, (first_name, last_name, email, phone_number, shipping_address, user_id))
-                
+            # Only if the password was not changed in the meantime
+            cursor.execute("UPDATE Users SET password = %s WHERE user_id = %s AND password = %s",
+                           (new_hash, user_id, old_hash))
             conn.commit()
-            return True, "Profile updated"
-        except Exception as e:
-            return False, str(e)
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
 
     @staticmethod
-    def get_top_customers(limit=5):
-        conn = get_db_connection()
-        if not conn: return []
-        try:
+    def get_user_by_id(user_id):
+        with db_connection() as conn:
+            if not conn:
+                return None
             cursor = conn.cursor(dictionary=True)
-            # Sum of total_price from Customer_Orders group by user
-            query = """
-                SELECT u.username, SUM(co.total_price) as total_spent
-                FROM Users u
-                JOIN Customer_Orders co ON u.user_id = co.user_id
-                WHERE co.order_date >= DATE_SUB(NOW(), INTERVAL 3 MONTH)
-                GROUP BY u.user_id
-                ORDER BY total_spent DESC
-                LIMIT %s
-            """
-            cursor.execute(query, (limit,))
-            return cursor.fetchall()
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+            cursor.execute(PROFILE_QUERY, (user_id,))
+            return cursor.fetchone()
+
+    @staticmethod
+    def update_profile(user_id, first_name, last_name, email, phone_number, shipping_address, password=None):
+        hashed_password = None
+        if password:
+            try:
+                hashed_password = hash_password(password)
+            except PasswordHasherBusy:
+                return False, BUSY_MESSAGE
+
+        with db_connection() as conn:
+            if not conn:
+                return False, "Database connection error"
+            try:
+                cursor = conn.cursor()
+
+                if hashed_password:
+                    query = """
+                        UPDATE Users
+                        SET first_name=%s, last_name=%s, email=%s, phone_number=%s, shipping_address=%s, password=%s
+                        WHERE user_id=%s
+                    """
+                    cursor.execute(query, (first_name, last_name, email, phone_number, shipping_address, hashed_password, user_id))
+                else:
+                    query = """
+                        UPDATE Users
+                        SET first_name=%s, last_name=%s, email=%s, phone_number=%s, shipping_address=%s
+                        WHERE user_id=%s
+                    """
+                    cursor.execute(query, (first_name, last_name, email, phone_number, shipping_address, user_id))
+
+                conn.commit()
+                return True, "Profile updated"
+            except Exception as e:
+                return False, str(e)
+
+    @staticmethod
+    def get_top_customers(limit=None):
+        # Total spent per customer over the last LEADERBOARD_WINDOW_DAYS (admin report: summed
+        # from the rollups, so orders taken by other workers count)
+        return Leaderboards.report_top_customers(limit)
+
+@after_fork
+def _reset_hash_writer_after_fork():
+    global _hash_writer
+    _hash_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='rehash')
@@ -1,59 +1,64 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify, abort
+import io
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify, abort, Response, stream_with_context
 from models.book import Book
+from models.book_import import BookImport
 from models.publisher import Publisher
-from models.user import User
+from models.admin_stats import AdminStats
+from models.report_jobs import report_jobs, ReportBusy
+from models.export import Export, ExportBusy, DATASETS, FORMATS
 from utils.auth_decorators import admin_required
 from utils.validators import validate_isbn
-from database.connection import get_db_connection
+from utils.pagination import get_page_args, paginate, next_page_url
+from utils.cache import CACHES
+from database.connection import db_connection
+from database import trace, statements
+from database.replicas import replicas
+from config import Config
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
 @admin_bp.route('/dashboard')
 @admin_required
 def dashboard():
-    conn = get_db_connection()
-    if conn is None:
+    # Counters and low stock list come from the cached snapshot (models/admin_stats.py)
+    stats = AdminStats.get()
+    if stats is None:
         return "Database connection failed! Check the terminal logs for the error message."
-    
-    cursor = conn.cursor(dictionary=True)
-    
-    # 1. Get Total Books
-    cursor.execute("SELECT COUNT(*) as count FROM Books")
-    book_count = cursor.fetchone()['count']
-    
-    # 2. Get Total Customers
-    cursor.execute("SELECT COUNT(*) as count FROM Users WHERE role = 'customer'")
-    user_count = cursor.fetchone()['count']
-
-    # 3. Get Pending Orders
-    cursor.execute("SELECT COUNT(*) as count FROM Publisher_Orders WHERE status = 'Pending'")
-    pending_orders_count = cursor.fetchone()['count']
-
-    # 4. Get Monthly Sales (Last 30 days)
-    # Using Publisher.report_sales_last_month helper or direct query. 
-    # Let's use direct query for simplicity and speed here.
-    cursor.execute("""
-        SELECT COALESCE(SUM(total_price), 0) as total 
-        FROM Customer_Orders 
-        WHERE order_date >= date_sub(now(), interval 1 month)
-    """)
-    monthly_sales = cursor.fetchone()['total']
-
-    # 5. Low Stock Books
-    cursor.execute("SELECT * FROM Books WHERE stock < threshold")
-    low_stock_books = cursor.fetchall()
-    
-    cursor.close()
-    conn.close()
-    
+
     stats_data = {
-        'total_books': book_count,
-        'total_customers': user_count,
-        'pending_orders': pending_orders_count,
-        'monthly_sales': monthly_sales
+        'total_books': stats['total_books'],
+        'total_customers': stats['total_customers'],
+        'pending_orders': stats['pending_orders'],
+        'monthly_sales': stats['monthly_sales']
     }
 
-    return render_template('admin/dashboard.html', stats=stats_data, low_stock_books=low_stock_books)
+    return render_template('admin/dashboard.html', stats=stats_data, low_stock_books=stats['low_stock_books'])
+
+@admin_bp.route('/stats', methods=['GET'])
+@admin_required
+def get_stats():
+    stats = AdminStats.get()
+    if stats is None:
+        return jsonify({'error': 'Database connection error'}), 503
+    return jsonify({
+        'total_books': stats['total_books'],
+        'total_customers': stats['total_customers'],
+        'pending_orders': stats['pending_orders'],
+        'confirmed_orders': stats['confirmed_orders'],
+        'total_publisher_orders': stats['total_publisher_orders'],
+        'monthly_sales': float(stats['monthly_sales'])
+    }), 200
+
+@admin_bp.route('/low-stock', methods=['GET'])
+@admin_required
+def get_low_stock():
+    stats = AdminStats.get()
+    if stats is None:
+        return jsonify({'error': 'Database connection error'}), 503
+    return jsonify([
+        {'isbn': b['isbn'], 'title': b['title'], 'stock': b['stock'], 'threshold': b['threshold']}
+        for b in stats['low_stock_books']
+    ]), 200
 
 @admin_bp.route('/add-book', methods=['GET', 'POST']) # Renaming to match frontend link /admin/add-book
 @admin_required
@@ -93,6 +98,28 @@ def add_book():
         flash(message, 'danger')
         return redirect(url_for('admin.add_book'))
 
+@admin_bp.route('/import-books', methods=['GET', 'POST'])
+@admin_required
+def import_books():
+    if request.method == 'GET':
+        return render_template('admin/import_books.html')
+
+    # POST: CSV or JSONL upload, read as a stream (never loaded whole into memory)
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        flash('Choose a CSV or JSONL file to import', 'danger')
+        return redirect(url_for('admin.import_books'))
+
+    fmt = request.form.get('format') or BookImport.detect_format(upload.filename)
+    stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+    result = BookImport.run(stream, fmt)
+
+    if result['imported']:
+        flash(f"Imported {result['imported']} of {result['rows']} books in {result['seconds']}s", 'success')
+    if result['errors']:
+        flash(f"{len(result['errors'])} rows were skipped", 'warning')
+    return render_template('admin/import_books.html', result=result, errors=result['errors'][:500])
+
 @admin_bp.route('/add-publisher', methods=['GET', 'POST'])
 @admin_required
 def add_publisher():
@@ -147,11 +174,14 @@ def modify_book():
         # modify_book.html implies "Search book, then edit form".
         # Let's search and pick first or exact match?
         # Book.search_books returns list.
-        results = Book.search_books(search_query)
+        after, page_size = get_page_args()
+        results = Book.search_books(search_query, after=after, limit=page_size + 1)
+        results, next_cursor = paginate(results, page_size, Book.search_cursor_key)
         # If specific ISBN update? 
         # Let's assume this route handles both listing results and showing edit form?
         # Or maybe just List.
-        return render_template('admin/modify_book.html', search_results=results)
+        return render_template('admin/modify_book.html', search_results=results,
+                               next_page=next_page_url(next_cursor))
     
     # If POST (Update)
     if request.method == 'POST':
@@ -181,64 +211,61 @@ def modify_book():
 @admin_bp.route('/orders', methods=['GET'])
 @admin_required
 def orders():
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    # 1. Get Pending Orders
-    # Join with books and publishers for details
-    query = """
-        SELECT po.po_id, po.isbn, po.quantity, po.order_date, b.title as book_title, p.name as publisher_name
-        FROM Publisher_Orders po
-        JOIN Books b ON po.isbn = b.isbn
-        JOIN Publishers p ON po.publisher_id = p.publisher_id
-        WHERE po.status = 'Pending'
-    """
-    cursor.execute(query)
-    pending_orders = cursor.fetchall()
-
-    # 2. Get Confirmed Orders (Last 50 maybe?)
-    query_confirmed = """
-        SELECT po.po_id, po.isbn, po.quantity, po.order_date, b.title as book_title, p.name as publisher_name
-        FROM Publisher_Orders po
-        JOIN Books b ON po.isbn = b.isbn
-        JOIN Publishers p ON po.publisher_id = p.publisher_id
-        WHERE po.status = 'Confirmed'
-        ORDER BY po.order_date DESC LIMIT 20
-    """
-    cursor.execute(query_confirmed)
-    confirmed_orders = cursor.fetchall()
-
-    # 3. Get Customer Orders (New)
-    query_customer = """
-        SELECT co.order_id, co.order_date, co.total_price, co.status, u.username
-        FROM Customer_Orders co
-        JOIN Users u ON co.user_id = u.user_id
-        ORDER BY co.order_date DESC LIMIT 20
-    """
-    cursor.execute(query_customer)
-    customer_orders = cursor.fetchall()
-    
-    # 4. Stats
-    cursor.execute("SELECT COUNT(*) as count FROM Publisher_Orders")
-    total_count = cursor.fetchone()['count']
-
-    cursor.execute("SELECT COUNT(*) as count FROM Publisher_Orders WHERE status = 'Pending'")
-    pending_count = cursor.fetchone()['count']
-
-    cursor.execute("SELECT COUNT(*) as count FROM Publisher_Orders WHERE status = 'Confirmed'")
-    confirmed_count = cursor.fetchone()['count']
-    
+    with db_connection() as conn:
+        if conn is None:
+            return "Database connection failed! Check the terminal logs for the error message."
+
+        cursor = conn.cursor(dictionary=True)
+
+        # 1. Get Pending Orders
+        # Join with books and publishers for details
+        query = """
+            SELECT po.po_id, po.isbn, po.quantity, po.order_date, b.title as book_title,
+                   po.publisher_id, p.name as publisher_name
+            FROM Publisher_Orders po
+            JOIN Books b ON po.isbn = b.isbn
+            JOIN Publishers p ON po.publisher_id = p.publisher_id
+            WHERE po.status = 'Pending'
+        """
+        cursor.execute(query)
+        pending_orders = cursor.fetchall()
+        # For the "confirm all from publisher" action
+        pending_publishers = sorted({(o['publisher_id'], o['publisher_name']) for o in pending_orders},
+                                    key=lambda p: p[1])
+
+        # 2. Get Confirmed Orders (Last 50 maybe?)
+        query_confirmed = """
+            SELECT po.po_id, po.isbn, po.quantity, po.order_date, b.title as book_title, p.name as publisher_name
+            FROM Publisher_Orders po
+            JOIN Books b ON po.isbn = b.isbn
+            JOIN Publishers p ON po.publisher_id = p.publisher_id
+            WHERE po.status = 'Confirmed'
+            ORDER BY po.order_date DESC LIMIT 20
+        """
+        cursor.execute(query_confirmed)
+        confirmed_orders = cursor.fetchall()
+
+        # 3. Get Customer Orders (New)
+        query_customer = """
+            SELECT co.order_id, co.order_date, co.total_price, co.status, u.username
+            FROM Customer_Orders co
+            JOIN Users u ON co.user_id = u.user_id
+            ORDER BY co.order_date DESC LIMIT 20
+        """
+        cursor.execute(query_customer)
+        customer_orders = cursor.fetchall()
+
+    # 4. Stats (cached snapshot)
+    stats = AdminStats.get() or {}
     stats_data = {
-        'total_orders': total_count,
-        'pending_count': pending_count,
-        'confirmed_count': confirmed_count
+        'total_orders': stats.get('total_publisher_orders', 0),
+        'pending_count': stats.get('pending_orders', 0),
+        'confirmed_count': stats.get('confirmed_orders', 0)
     }
 
-    cursor.close()
-    conn.close()
-
     return render_template('admin/orders.html', 
                            pending_orders=pending_orders, 
+                           pending_publishers=pending_publishers,
                            confirmed_orders=confirmed_orders, 
                            customer_orders=customer_orders,
                            stats=stats_data)
@@ -252,6 +279,93 @@ def confirm_order(po_id):
     else:
         return jsonify({'success': False, 'message': message}), 400
 
+@admin_bp.route('/orders/confirm', methods=['POST'])
+@admin_required
+def confirm_orders():
+    # Bulk confirm, JSON body: {"po_ids": [1, 2, ...]} or {"publisher_id": 3} or {"all": true}
+    data = request.get_json(silent=True) or {}
+    po_ids = data.get('po_ids')
+    publisher_id = data.get('publisher_id')
+    try:
+        if po_ids is not None:
+            po_ids = [int(po_id) for po_id in po_ids]
+        if publisher_id is not None:
+            publisher_id = int(publisher_id)
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'po_ids and publisher_id must be integers'}), 400
+
+    success, message, count = Publisher.confirm_orders(po_ids=po_ids, publisher_id=publisher_id,
+                                                       all_pending=bool(data.get('all')))
+    status = 200 if success else 400
+    return jsonify({'success': success, 'message': message, 'confirmed': count}), status
+
+@admin_bp.route('/cache-stats', methods=['GET'])
+@admin_required
+def cache_stats():
+    # Hit/miss/eviction counters of this worker's in-process caches (for sizing them)
+    stats = {name: cache.stats() for name, cache in CACHES.items()}
+    stats['prepared_statements'] = statements.stats()
+    return jsonify(stats), 200
+
+@admin_bp.route('/replica-stats', methods=['GET'])
+@admin_required
+def replica_stats():
+    # Health, lag and load of the read replicas as this worker sees them
+    return jsonify(dict(replicas.stats(), enabled=replicas.enabled())), 200
+
+@admin_bp.route('/sql-stats', methods=['GET'])
+@admin_required
+def sql_stats():
+    # Top statements by total time and the last traced requests (this worker only)
+    limit = request.args.get('limit', 20, type=int)
+    return jsonify({
+        'enabled': Config.SQL_TRACE,
+        'slow_query_ms': Config.SLOW_QUERY_MS,
+        'statements': trace.top_statements(limit),
+        'recent_requests': list(trace.RECENT_REQUESTS)
+    }), 200
+
+@admin_bp.route('/sql-stats/reset', methods=['POST'])
+@admin_required
+def reset_sql_stats():
+    trace.reset()
+    return jsonify({'success': True}), 200
+
+@admin_bp.route('/export/<dataset>', methods=['GET'])
+@admin_required
+def export(dataset):
+    # Streamed download: ?from=YYYY-MM-DD&to=YYYY-MM-DD&format=csv|jsonl&gzip=1
+    if dataset not in DATASETS:
+        return jsonify({'success': False, 'message': 'Unknown dataset'}), 404
+    fmt = request.args.get('format', 'csv')
+    if fmt not in FORMATS:
+        return jsonify({'success': False, 'message': 'format must be csv or jsonl'}), 400
+    try:
+        start, end = Export.parse_range(request.args.get('from'), request.args.get('to'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    compress = request.args.get('gzip') in ('1', 'true', 'on')
+
+    try:
+        Export.acquire()
+    except ExportBusy as e:
+        return jsonify({'success': False, 'message': str(e)}), 429, {'Retry-After': '30'}
+    try:
+        chunks = Export.stream(dataset, fmt, start, end, compress)
+    except Exception as e:
+        Export.release()
+        print(f"❌ Export {dataset} failed: {e}")
+        return jsonify({'success': False, 'message': 'Database connection error'}), 503
+
+    response = Response(stream_with_context(chunks),
+                        mimetype='application/gzip' if compress else FORMATS[fmt])
+    response.headers['Content-Disposition'] = \
+        f'attachment; filename="{Export.filename(dataset, fmt, start, end, compress)}"'
+    response.headers['X-Accel-Buffering'] = 'no'  # don't let a proxy buffer the whole file
+    # Runs when the download ends, finished or not (the generator is closed first)
+    response.call_on_close(Export.release)
+    return response
+
 @admin_bp.route('/reports', methods=['GET'])
 @admin_required
 def reports():
@@ -260,7 +374,11 @@ def reports():
     # If page has 'Generate' buttons, they might post to these routes.
     # Let's keep separate report routes but make them return JSON or render back to reports page with data?
     # Usually easier to render reports.html with data.
-    return render_template('admin/reports.html')
+    return _render_reports()
+
+def _render_reports(**results):
+    # Every render of the page needs the export form's dataset list, results or not
+    return render_template('admin/reports.html', export_datasets=DATASETS, **results)
 
 # Report calculation routes (returning JSON for AJAX or rendering?)
 # Frontend README implies rendering or JSON. "Forms to select date... display results". 
@@ -269,34 +387,74 @@ def reports():
 # The README says: "Actions: POST /admin/reports/sales-month". 
 # admin.js likely handles it.
 
+# Reports run as background jobs (models/report_jobs.py). reports.html submits them
+# with fetch and polls for the result; the form posts below are the no-JS fallback
+# and wait for the same (shared, cached) job.
+
+@admin_bp.route('/reports/jobs', methods=['POST'])
+@admin_required
+def submit_report_job():
+    data = request.get_json(silent=True) or request.form.to_dict()
+    try:
+        job = report_jobs.submit(data.get('report'), data.get('params') or data)
+    except KeyError:
+        return jsonify({'success': False, 'message': 'Unknown report'}), 400
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except ReportBusy as e:
+        return jsonify({'success': False, 'message': str(e)}), 503
+    return jsonify(dict(job, success=True)), 200 if job['status'] == 'done' else 202
+
+@admin_bp.route('/reports/jobs/<job_id>', methods=['GET'])
+@admin_required
+def report_job_status(job_id):
+    job = report_jobs.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    return jsonify(dict(job, success=True)), 200
+
+def _run_report(report, params=None):
+    """
+    Result of a report job, waiting for it (None if it failed or is still running).
+    """
+    try:
+        job = report_jobs.wait(report_jobs.submit(report, params)['job_id'])
+    except (ValueError, ReportBusy) as e:
+        flash(str(e), 'danger')
+        return None
+    if job and job['status'] == 'done':
+        return job['result']
+    flash(job['error'] if job and job['error'] else 'Report is still running, try again shortly', 'warning')
+    return None
+
 @admin_bp.route('/reports/sales-month', methods=['POST'])
 @admin_required
 def report_sales_month():
-    sales = Publisher.report_sales_last_month()
-    return render_template('admin/reports.html', monthly_sales=sales)
+    sales = _run_report('sales-month')
+    return _render_reports(monthly_sales=sales)
 
 @admin_bp.route('/reports/sales-day', methods=['POST'])
 @admin_required
 def report_sales_day():
     date_str = request.form.get('date')
-    sales = Publisher.report_sales_day(date_str)
-    return render_template('admin/reports.html', daily_sales=sales, selected_date=date_str)
+    sales = _run_report('sales-day', {'date': date_str})
+    return _render_reports(daily_sales=sales, selected_date=date_str)
 
 @admin_bp.route('/reports/top-customers', methods=['POST'])
 @admin_required
 def report_top_customers():
-    customers = User.get_top_customers()
-    return render_template('admin/reports.html', top_customers=customers)
+    customers = _run_report('top-customers')
+    return _render_reports(top_customers=customers)
 
 @admin_bp.route('/reports/top-books', methods=['POST'])
 @admin_required
 def report_top_books():
-    books = Book.get_top_selling_books()
-    return render_template('admin/reports.html', top_books=books)
+    books = _run_report('top-books')
+    return _render_reports(top_books=books)
 
 @admin_bp.route('/reports/replenishment', methods=['POST'])
 @admin_required
 def report_replenishment():
     isbn = request.form.get('isbn')
-    count = Publisher.get_replenishment_history(isbn)
-    return render_template('admin/reports.html', replenishment_count=count, replenishment_isbn=isbn)
+    count = _run_report('replenishment', {'isbn': isbn})
+    return _render_reports(replenishment_count=count, replenishment_isbn=isbn)
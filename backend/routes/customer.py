@@ -5,7 +5,8 @@ from models.user import User
 from models.book import Book
 from utils.auth_decorators import login_required
 from utils.validators import validate_credit_card, validate_expiry_date
-from database.connection import get_db_connection
+from utils.pagination import get_page_args, paginate, next_page_url
+from database.connection import db_connection
 
 
 customer_bp = Blueprint('customer', __name__, url_prefix='/customer')
@@ -13,18 +14,17 @@ customer_bp = Blueprint('customer', __name__, url_prefix='/customer')
 @customer_bp.route('/dashboard')
 @login_required
 def dashboard():
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    # 1. Fetch one page of books (keyset pagination on ISBN)
+    after, page_size = get_page_args()
+    books = Book.list_books(after_isbn=after[0] if after else None, limit=page_size + 1)
+    books, next_cursor = paginate(books, page_size, lambda book: [book['isbn']])
 
-    # 1. Fetch All Books to display on the dashboard
-    cursor.execute("SELECT * FROM Books")
-    books = cursor.fetchall()
+    # 2. "Trending now" (in-memory leaderboard, no query)
+    trending = Book.get_trending_books()
 
-    cursor.close()
-    conn.close()
-
-    # 2. Pass the books to the dashboard template
-    return render_template('customer/dashboard.html', books=books)
+    # 3. Pass the books to the dashboard template
+    return render_template('customer/dashboard.html', books=books, trending=trending,
+                           next_page=next_page_url(next_cursor))
 
 @customer_bp.route('/search', methods=['GET'])
 @login_required
@@ -36,12 +36,16 @@ def search():
     author = request.args.get('author')
     publisher = request.args.get('publisher')
     
-    # Use Book.search_books with specific fields
-    books = Book.search_books(query_str=query, isbn=isbn, title=title, author=author, publisher=publisher, category=category)
+    # Use Book.search_books with specific fields, one page at a time
+    after, page_size = get_page_args()
+    books = Book.search_books(query_str=query, isbn=isbn, title=title, author=author, publisher=publisher,
+                              category=category, after=after, limit=page_size + 1)
+    books, next_cursor = paginate(books, page_size, Book.search_cursor_key)
     
     # Categories for dropdown (hardcoded or from DB)
     categories = ['Science', 'Art', 'Religion', 'History', 'Geography']
-    return render_template('customer/search.html', books=books, categories=categories)
+    return render_template('customer/search.html', books=books, categories=categories,
+                           next_page=next_page_url(next_cursor))
 
 @customer_bp.route('/cart', methods=['GET'])
 @login_required
@@ -110,32 +114,12 @@ def remove_from_cart():
 def update_cart():
     user_id = session.get('user_id')
     isbn = request.form.get('isbn')
-    quantity = int(request.form.get('quantity', 1)) 
-    # Use Cart.add_to_cart which handles update if exists? Or need proper update?
-    # Cart.add_to_cart adds to existing. We want to SET quantity.
-    # Cart model doesn't have set_quantity? 
-    # Let's check Cart model. If not, we remove and add? OR implement update.
-    # For now, let's try remove then add or just add if logic supports it.
-    # Actually, usually add_to_cart increments.
-    # We need a new method in Cart or logic here. 
-    # Let's assume for now we implement a simple update logic using SQL directly or helper.
-    # Since I cannot see Cart model right now (I saw it earlier but forgot if it has update), 
-    # I will stick to remove then add which is safe but inefficient, or add a method.
-    # But wait, looking at my diffs, I implemented `add_to_cart` which does `INSERT ... ON DUPLICATE KEY UPDATE quantity = quantity + %s`.
-    # That increments.
-    # To set exact quantity, we might need to remove then add.
-    
-    # Better: Update Cart.py or use SQL here.
-    # Let's used direct SQL for speed as I am verifying.
-    from database.connection import get_db_connection
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE Shopping_Cart SET quantity = %s WHERE user_id = %s AND isbn = %s", (quantity, user_id, isbn))
-    conn.commit()
-    cursor.close()
-    conn.close()
-    
-    flash('Cart updated', 'success')
+    quantity = int(request.form.get('quantity', 1))
+    # Sets the quantity (0 removes the line)
+    success, message = Cart.update_quantity(user_id, isbn, quantity)
+
+    if success: flash(message, 'success')
+    else: flash(message, 'danger')
     return redirect(url_for('customer.get_cart'))
 
 @customer_bp.route('/cart/clear', methods=['POST'])
@@ -154,16 +138,16 @@ def clear_cart():
 @login_required
 def get_cart_count():
     user_id = session.get('user_id')
-    items = Cart.get_cart_items(user_id)
-    count = sum(item['quantity'] for item in items)
-    return jsonify({'count': count}), 200
+    # Kept up to date by the Shopping_Cart triggers: a primary-key read, no join
+    summary = Cart.get_cart_summary(user_id)
+    if summary is None:
+        return jsonify({'count': 0}), 503
+    return jsonify({'count': summary['count'], 'subtotal': float(summary['subtotal'])}), 200
 
 @customer_bp.route('/checkout', methods=['GET', 'POST'])
 @login_required
 def checkout():
     user_id = session.get('user_id')
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
 
     # Handle POST (form submission)
     if request.method == 'POST':
@@ -178,9 +162,6 @@ def checkout():
         else:
             expiry_date = None
         
-        cursor.close()
-        conn.close()
-        
         if not credit_card_no or not expiry_date:
             flash('Payment details required', 'danger')
             return redirect(url_for('customer.checkout'))
@@ -203,27 +184,29 @@ def checkout():
             return redirect(url_for('customer.checkout'))
 
     # Handle GET (display checkout page)
-    # 1. Fetch User Info
-    cursor.execute("SELECT * FROM Users WHERE user_id = %s", (user_id,))
-    user_info = cursor.fetchone()
+    with db_connection() as conn:
+        if conn is None:
+            return "Database connection failed! Check the terminal logs for the error message."
+        cursor = conn.cursor(dictionary=True)
+
+        # 1. Fetch User Info
+        cursor.execute("SELECT * FROM Users WHERE user_id = %s", (user_id,))
+        user_info = cursor.fetchone()
 
-    # 2. Fetch Cart Items
-    query = """
-        SELECT B.title, B.selling_price, SC.quantity, (B.selling_price * SC.quantity) as total_price
-        FROM Shopping_Cart SC
-        JOIN Books B ON SC.isbn = B.isbn
-        WHERE SC.user_id = %s
-    """
-    cursor.execute(query, (user_id,))
-    items = cursor.fetchall()
+        # 2. Fetch Cart Items
+        query = """
+            SELECT B.title, B.selling_price, SC.quantity, (B.selling_price * SC.quantity) as total_price
+            FROM Shopping_Cart SC
+            JOIN Books B ON SC.isbn = B.isbn
+            WHERE SC.user_id = %s
+        """
+        cursor.execute(query, (user_id,))
+        items = cursor.fetchall()
 
     # 3. Calculate Totals
     subtotal = sum(item['total_price'] for item in items)
     total = subtotal
 
-    cursor.close()
-    conn.close()
-
     # 4. Render checkout page
     return render_template('customer/checkout.html', 
                         cart_items=items, 
@@ -235,43 +218,17 @@ def checkout():
 @login_required
 def get_orders():
     user_id = session.get('user_id')
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    # 1. Get the Order IDs
-    cursor.execute("SELECT * FROM Customer_Orders WHERE user_id = %s ORDER BY order_date DESC", (user_id,))
-    orders = cursor.fetchall()
-
-    # 2. Get the Books for each order
-    for order in orders:
-        # NOTE: Make sure your table is named 'Order_Items' or 'Sales'
-        # If this query crashes, your table name is likely different.
-        query = """
-            SELECT B.title, B.selling_price as unit_price, OI.quantity 
-            FROM Order_Items OI
-            JOIN Books B ON OI.isbn = B.isbn
-            WHERE OI.order_id = %s
-        """
-        try:
-            cursor.execute(query, (order['order_id'],))
-            books = cursor.fetchall()
-        except Exception:
-            books = [] # If table is missing, show empty list
-            
-        # *** THE FIX: Use a unique name 'book_list' ***
-        order['book_list'] = books
-
-    cursor.close()
-    conn.close()
+    # One page of orders with their books (constant number of queries)
+    after, page_size = get_page_args()
+    orders = Order.get_order_history(user_id, after=after, limit=page_size + 1)
+    orders, next_cursor = paginate(orders, page_size, Order.history_cursor_key)
 
-    return render_template('customer/orders.html', orders=orders)
+    return render_template('customer/orders.html', orders=orders, next_page=next_page_url(next_cursor))
 
 @customer_bp.route('/profile', methods=['GET', 'POST'])
 @login_required
 def profile():
     user_id = session.get('user_id')
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
 
     # Handle POST (Update Profile)
     if request.method == 'POST':
@@ -282,9 +239,6 @@ def profile():
         shipping_address = request.form.get('shipping_address')
         password = request.form.get('new_password') # Optional new password
         
-        cursor.close()
-        conn.close()
-        
         success, message = User.update_profile(user_id, first_name, last_name, email, phone_number, shipping_address, password)
         
         if success:
@@ -295,21 +249,23 @@ def profile():
         return redirect(url_for('customer.profile'))
 
     # Handle GET (Display Profile)
-    # 1. Fetch User Details
-    cursor.execute("SELECT * FROM Users WHERE user_id = %s", (user_id,))
-    user = cursor.fetchone()
+    with db_connection() as conn:
+        if conn is None:
+            return "Database connection failed! Check the terminal logs for the error message."
+        cursor = conn.cursor(dictionary=True)
 
-    # 2. Fetch Orders
-    cursor.execute("SELECT * FROM Customer_Orders WHERE user_id = %s ORDER BY order_date DESC", (user_id,))
-    orders = cursor.fetchall()
+        # 1. Fetch User Details
+        cursor.execute("SELECT * FROM Users WHERE user_id = %s", (user_id,))
+        user = cursor.fetchone()
+
+        # 2. Fetch Orders
+        cursor.execute("SELECT * FROM Customer_Orders WHERE user_id = %s ORDER BY order_date DESC", (user_id,))
+        orders = cursor.fetchall()
 
     # 3. Calculate stats
     stats_data = {
         'total_orders': len(orders)
     }
 
-    cursor.close()
-    conn.close()
-
     # 4. Render profile page
     return render_template('customer/profile.html', user=user, orders=orders, stats=stats_data)
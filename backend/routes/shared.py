@@ -1,20 +1,39 @@
 from flask import Blueprint, request, jsonify
 from models.book import Book
+from utils.pagination import get_page_args, paginate
+from utils import http_cache
 
 shared_bp = Blueprint('shared', __name__)
 
+# Both endpoints serve cached, ETagged JSON (see utils/http_cache.py)
+
 @shared_bp.route('/api/books/search', methods=['GET']) # Renamed to /api to distinguish
 def search_books():
-    query = request.args.get('query')
-    category = request.args.get('category')
-    
-    books = Book.search_books(query_str=query, category=category)
-    return jsonify(books), 200
+    key = tuple(sorted(request.args.items(multi=True)))
+    entry = http_cache.lookup(http_cache.search_responses, key)
+    if entry is None:
+        read_at = http_cache.read_started()
+        query = request.args.get('query')
+        category = request.args.get('category')
+
+        after, page_size = get_page_args()
+        books = Book.search_books(query_str=query, category=category, after=after, limit=page_size + 1)
+        books, next_cursor = paginate(books, page_size, Book.search_cursor_key)
+        # Pass next_cursor back as ?cursor= to get the following page (null on the last page)
+        entry = http_cache.build_entry({'books': books, 'next_cursor': next_cursor})
+        if books:  # an empty page may just mean the database is down
+            http_cache.store(http_cache.search_responses, key, entry, read_at,
+                             [book['isbn'] for book in books], catalog=True)
+    return http_cache.json_response(entry)
 
 @shared_bp.route('/api/books/<isbn>', methods=['GET'])
 def get_book(isbn):
-    book = Book.get_book_details(isbn)
-    if book:
-        return jsonify(book), 200
-    else:
-        return jsonify({'message': 'Book not found'}), 404
+    entry = http_cache.lookup(http_cache.book_responses, isbn)
+    if entry is None:
+        read_at = http_cache.read_started()
+        book = Book.get_book_details(isbn)
+        if not book:
+            return jsonify({'message': 'Book not found'}), 404
+        entry = http_cache.build_entry(book)
+        http_cache.store(http_cache.book_responses, isbn, entry, read_at, [isbn])
+    return http_cache.json_response(entry)
@@ -0,0 +1,91 @@
+import argparse
+from gunicorn.app.base import BaseApplication
+from app import create_app
+from config import Config
+from database.connection import Database
+from database.replicas import replicas
+from models.report_jobs import report_jobs
+from utils.passwords import hasher
+
+# Production server: gunicorn with several worker processes, each serving requests on a
+# pool of threads. `python -m app` is the single-process debug server.
+#     cd backend
+#     python serve.py [--bind 0.0.0.0:5000] [--workers N] [--threads N]
+#
+# The app is created once in the master process and the workers are forked from it
+# (preload), so they share its code and memory pages copy-on-write. Per-process state
+# (DB pool, caches, thread pools) is rebuilt in each worker, see utils/forking.py.
+#
+# What has to agree across workers is not kept per process:
+# - report jobs and their results are rows of Report_Jobs (models/report_jobs.py): any
+#   worker answers a poll, identical requests share one job whichever worker gets them;
+# - the change stamps (utils/change_stamps.py) are a shared memory mapping made in the
+#   master before the fork (this is why preload stays on). The cached book details, API
+#   responses and admin dashboard counters are per worker, but checked against those
+#   stamps, so a write through one worker makes every worker's affected entries stale;
+# - the bestseller / top-customer boards are per worker and resync from the sales rollups
+#   every LEADERBOARD_RESYNC_INTERVAL; the admin reports sum the rollups instead, so only
+#   the storefront's "trending now" can lag behind other workers' orders.
+# Other per-worker caches (author ids, leaderboard labels) hold values that don't change
+# or only expire by TTL.
+# SIGTERM/SIGINT stop gracefully: workers finish their in-flight requests (up to
+# Config.SERVE_GRACEFUL_TIMEOUT seconds), then close their DB connections. SIGHUP
+# replaces the workers with fresh ones without dropping connections.
+
+def when_ready(server):
+    cfg = server.cfg
+    print(f"🚀 Serving on {', '.join(cfg.bind)}: {cfg.workers} workers x {cfg.threads} threads "
+          f"({cfg.worker_class_str}, app preloaded)")
+    print(f"🗄️  DB pool: {Config.DB_POOL_SIZE} connections per worker, "
+          f"up to {cfg.workers * Config.DB_POOL_SIZE} in total")
+    if replicas.enabled():
+        print(f"📚 Read replicas: {', '.join(replica.name for replica in replicas.replicas)}, "
+              f"{Config.DB_REPLICA_POOL_SIZE} connections each per worker")
+    if cfg.threads > Config.DB_POOL_SIZE:
+        print(f"⚠️  {cfg.threads} request threads share {Config.DB_POOL_SIZE} pooled connections: "
+              f"raise DB_POOL_SIZE or lower SERVE_THREADS")
+
+def worker_exit(server, worker):
+    # In-flight requests are done by now; queued reports would only delay the exit
+    report_jobs.shutdown(cancel_pending=True)
+    hasher.shutdown()
+    Database.close_pool()
+
+class BookstoreServer(BaseApplication):
+    def __init__(self, app, options):
+        self.application = app
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+def options(bind=None, workers=None, threads=None):
+    workers = workers or Config.SERVE_WORKERS
+    threads = threads or Config.SERVE_THREADS
+    return {
+        'bind': bind or Config.SERVE_BIND,
+        'workers': workers,
+        'threads': threads,
+        'worker_class': 'gthread' if threads > 1 else 'sync',
+        'preload_app': True,
+        'timeout': Config.SERVE_TIMEOUT,
+        'graceful_timeout': Config.SERVE_GRACEFUL_TIMEOUT,
+        'max_requests': Config.SERVE_MAX_REQUESTS,
+        'max_requests_jitter': Config.SERVE_MAX_REQUESTS // 10,
+        'when_ready': when_ready,
+        'worker_exit': worker_exit,
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the bookstore with gunicorn.")
+    parser.add_argument('--bind', help=f"host:port (default {Config.SERVE_BIND})")
+    parser.add_argument('--workers', type=int, help=f"worker processes (default {Config.SERVE_WORKERS})")
+    parser.add_argument('--threads', type=int, help=f"threads per worker (default {Config.SERVE_THREADS})")
+    args = parser.parse_args()
+
+    BookstoreServer(create_app(), options(args.bind, args.workers, args.threads)).run()
@@ -0,0 +1,75 @@
+import io
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from models.book_import import BookImport
+
+PUBLISHERS = {'penguin': 1, '1': 1}
+PRICE_RANGE = "selling_price must be between 0 and 99999999.99"
+COUNT_RANGE = "stock and threshold must be between 0 and 2147483647"
+
+def row(**overrides):
+    values = {
+        'isbn': '978-0-14-044913-6', 'title': 'War and Peace', 'publisher': 'Penguin',
+        'pub_year': '2006', 'selling_price': '19.99', 'category': 'history',
+        'authors': 'Leo Tolstoy', 'stock': '', 'threshold': '',
+    }
+    values.update(overrides)
+    return values
+
+def test_valid_row_is_normalized():
+    book, error = BookImport.validate(row(), PUBLISHERS)
+    assert error is None
+    assert book == {
+        'isbn': '978-0-14-044913-6', 'title': 'War and Peace', 'publisher_id': 1, 'pub_year': 2006,
+        'selling_price': Decimal('19.99'), 'category': 'History', 'stock': 0, 'threshold': 10,
+        'authors': ['Leo Tolstoy'],
+    }
+
+def test_headers_are_case_and_space_insensitive():
+    book, error = BookImport.validate({f' {k.upper()} ': v for k, v in row().items()}, PUBLISHERS)
+    assert error is None and book['isbn'] == '978-0-14-044913-6'
+
+def test_publisher_by_id():
+    book, _ = BookImport.validate(row(publisher=1), PUBLISHERS)
+    assert book['publisher_id'] == 1
+
+def test_authors_deduplicated_by_name_key():
+    book, _ = BookImport.validate(row(authors=['Leo  Tolstoy', 'leo tolstoy ', '', 'Aylmer Maude']), PUBLISHERS)
+    assert book['authors'] == ['Leo Tolstoy', 'Aylmer Maude']
+
+@pytest.mark.parametrize('overrides, error', [
+    ({'title': ''}, "Missing title"),
+    ({'authors': []}, "Missing authors"),
+    ({'authors': ' , '}, "Missing authors"),
+    ({'isbn': '12345'}, "Invalid ISBN format"),
+    ({'title': 'x' * 256}, "Title longer than 255 characters"),
+    ({'publisher': 'Nobody'}, "Unknown publisher 'Nobody'"),
+    ({'category': 'Cooking'}, "Invalid category 'Cooking'"),
+    ({'pub_year': 'soon'}, "pub_year, selling_price, stock and threshold must be numbers"),
+    ({'pub_year': '0'}, "pub_year 0 is out of range"),
+    ({'pub_year': str(date.today().year + 2)}, f"pub_year {date.today().year + 2} is out of range"),
+    ({'selling_price': '-1'}, PRICE_RANGE),
+    ({'selling_price': '100000000'}, PRICE_RANGE),
+    ({'selling_price': '1e999999999'}, PRICE_RANGE),
+    ({'selling_price': 'NaN'}, PRICE_RANGE),
+    ({'selling_price': 'Infinity'}, PRICE_RANGE),
+    ({'stock': '2147483648'}, COUNT_RANGE),
+    ({'threshold': '-1'}, COUNT_RANGE),
+    ({'authors': 'x' * 101}, "Author name longer than 100 characters"),
+])
+def test_bad_rows_are_rejected_with_a_reason(overrides, error):
+    assert BookImport.validate(row(**overrides), PUBLISHERS) == (None, error)
+
+def test_read_rows_reports_bad_json_lines_and_keeps_going():
+    stream = io.StringIO('{"isbn": "1"}\n\nnot json\n[1, 2]\n{"isbn": "2"}\n')
+    rows = list(BookImport.read_rows(stream, 'jsonl'))
+    assert [(line, row, error is not None) for line, row, error in rows] == [
+        (1, {'isbn': '1'}, False), (3, None, True), (4, None, True), (5, {'isbn': '2'}, False),
+    ]
+
+def test_csv_line_numbers_count_the_header():
+    rows = list(BookImport.read_rows(io.StringIO("isbn,title\n1,A\n2,B\n"), 'csv'))
+    assert [line for line, _, _ in rows] == [2, 3]
@@ -0,0 +1,52 @@
+import base64
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from models.order import Order
+from models.search import BookSearch
+from utils.pagination import decode_cursor, encode_cursor, paginate
+
+def test_round_trip_keeps_every_value_as_text():
+    key = [Decimal('12.500000'), '978-0-00-000000-0']
+    assert decode_cursor(encode_cursor(key)) == ['12.500000', '978-0-00-000000-0']
+
+def test_order_history_key_round_trips():
+    # Order history pages on (order_date DESC, order_id DESC)
+    key = Order.history_cursor_key({'order_date': datetime(2025, 1, 31, 23, 59, 59), 'order_id': 1042})
+    assert decode_cursor(encode_cursor(key)) == ['2025-01-31 23:59:59', '1042']
+
+def test_search_key_round_trips_exactly():
+    row = {'relevance': Decimal('3.141593'), 'isbn': '1'}
+    after = decode_cursor(encode_cursor(BookSearch.cursor_key(row)))
+    assert BookSearch._parse_key(after) == [Decimal('3.141593'), '1']
+
+def test_token_is_url_safe():
+    token = encode_cursor(['??>>', '/+/'])
+    assert '=' not in token and '+' not in token and '/' not in token
+
+@pytest.mark.parametrize('token', [
+    None,
+    '',
+    'not base64 at all!',
+    base64.urlsafe_b64encode(b'{"a": 1}').decode(),     # not a list
+    base64.urlsafe_b64encode(b'[1, 2]').decode(),       # not strings
+    base64.urlsafe_b64encode(b'[').decode(),            # not JSON
+])
+def test_bad_tokens_mean_first_page(token):
+    assert decode_cursor(token) is None
+
+def test_paginate_uses_the_extra_row_only_to_detect_a_next_page():
+    rows = [{'isbn': str(i)} for i in range(4)]
+    page, next_cursor = paginate(rows, 3, lambda row: [row['isbn']])
+    assert page == rows[:3]
+    assert decode_cursor(next_cursor) == ['2']
+    assert paginate(rows[:3], 3, lambda row: [row['isbn']]) == (rows[:3], None)
+
+def test_history_query_continues_after_the_cursor():
+    after = ['2025-01-31 23:59:59', '1042']
+    sql, params = Order.history_query(7, after, 11)
+    assert params == [7, after[0], after[0], '1042', 11]
+    assert sql.count('%s') == len(params)
+    assert Order.history_query(7, None, 11)[1] == [7, 11]
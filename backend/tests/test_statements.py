@@ -0,0 +1,132 @@
+import pytest
+
+from config import Config
+from database import statements
+from database.connection import Database
+from models.book import Book, book_cache
+from models.cart import Cart
+from models.search import BookSearch
+from models.user import User
+
+class FakeCursor:
+    column_names = ()
+    rowcount = 1
+    lastrowid = 1
+
+    def __init__(self, session, prepared):
+        self.session = session
+        self.prepared = prepared
+        self.with_rows = False
+
+    def execute(self, sql, params=()):
+        self.session.executed.append((self.prepared, ' '.join(sql.split())))
+        self.with_rows = sql.lstrip().upper().startswith('SELECT')
+
+    def fetchall(self):
+        self.with_rows = False
+        return []
+
+    def close(self):
+        self.session.closed += 1
+
+class FakeSession:
+    """
+    Stands in for a pooled CMySQLConnection: records what runs on it.
+    """
+    unread_result = False
+    in_transaction = False
+
+    def __init__(self):
+        self.connection_id = 1
+        self.executed = []
+        self.closed = 0
+        self.checkouts = 0
+
+    def cursor(self, prepared=False, dictionary=False, **kwargs):
+        return FakeCursor(self, prepared)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def close(self):
+        pass  # back to the (one connection) pool
+
+@pytest.fixture
+def session(monkeypatch):
+    session = FakeSession()
+
+    def get_connection():
+        session.checkouts += 1
+        return session
+
+    monkeypatch.setattr(statements, 'CMySQLConnection', FakeSession)
+    monkeypatch.setattr(Config, 'DB_STATEMENT_CACHE_SIZE', 64)
+    monkeypatch.setattr(Database, 'get_connection', staticmethod(get_connection))
+    book_cache.clear()
+    return session
+
+def counts():
+    stats = statements.stats()
+    return stats['prepares'], stats['hits']
+
+def hot_paths(n):
+    # One request each, as the routes run them: one checkout per call
+    Book.get_book_details(f'978-0-00-00000{n}-0')
+    User.login(f'reader{n}', 'secret')
+    Cart.add_to_cart(n, f'978-0-00-00000{n}-0')
+    BookSearch.search(query_str='tolstoy', limit=21)
+
+def test_hot_paths_prepare_once_and_hit_on_later_requests(session):
+    prepares, hits = counts()
+    hot_paths(1)
+    assert counts() == (prepares + 4, hits)
+    hot_paths(2)
+    hot_paths(3)
+    assert counts() == (prepares + 4, hits + 8)
+    assert session.checkouts == 12
+    assert session.closed == 0
+    assert all(prepared for prepared, _ in session.executed)
+
+def test_text_protocol_without_c_extension(session, monkeypatch):
+    monkeypatch.setattr(statements, 'CMySQLConnection', None)
+    prepares, hits = counts()
+    hot_paths(1)
+    hot_paths(2)
+    assert counts() == (prepares, hits)
+    assert not any(prepared for prepared, _ in session.executed)
+
+def test_reconnected_session_prepares_again(session):
+    hot_paths(1)
+    prepares, hits = counts()
+    session.connection_id = 2
+    hot_paths(2)
+    assert counts() == (prepares + 4, hits)
+
+def test_set_session_is_undone_on_release(session):
+    conn = Database.get_connection()
+    Database.set_session(conn, net_write_timeout=600)
+    Database.release(conn)
+    assert session.executed[-2:] == [
+        (False, 'SET SESSION net_write_timeout = %s'),
+        (False, 'SET SESSION net_write_timeout = DEFAULT'),
+    ]
+    Database.release(Database.get_connection())
+    assert len(session.executed) == 2
+
+def test_cache_evicts_least_recently_used():
+    session = FakeSession()
+    cache = statements.StatementCache(1, maxsize=2)
+    cursors = [FakeCursor(session, True) for _ in range(3)]
+    cache.put('a', ('a', cursors[0]))
+    cache.put('b', ('b', cursors[1]))
+    cache.get('a')
+    cache.put('c', ('c', cursors[2]))
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert len(cache) == 2 and session.closed == 1
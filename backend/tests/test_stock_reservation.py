@@ -0,0 +1,160 @@
+import copy
+from contextlib import contextmanager
+
+import pytest
+
+from config import Config
+from models import stock_reservation
+from models.stock_reservation import StockReservation
+
+class FakeDatabase:
+    """
+    Books (stock, reserved, threshold) and Stock_Reservations in memory, answering the
+    statements models/stock_reservation.py runs. Transactions roll back to a copy.
+    """
+    def __init__(self, books):
+        self.books = {isbn: dict(stock=stock, reserved=0, threshold=threshold)
+                      for isbn, (stock, threshold) in books.items()}
+        self.reservations = {}  # (reservation_id, isbn) -> {'quantity', 'expired'}
+        self.log = []
+        self._saved = None
+
+    def lines(self, reservation_id):
+        return sorted((isbn, line['quantity']) for (rid, isbn), line in self.reservations.items()
+                      if rid == reservation_id)
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+        self.rowcount = 0
+        self.with_rows = False
+
+    def execute(self, sql, params=()):
+        db, params = self.db, list(params)
+        db.log.append((sql, params))
+        self.rows, self.rowcount = [], 0
+        if sql == stock_reservation.RESERVE_QUERY:
+            quantity, isbn, _ = params
+            book = db.books[isbn]
+            if book['stock'] - book['reserved'] >= quantity:
+                book['reserved'] += quantity
+                self.rowcount = 1
+        elif sql.startswith("INSERT INTO Stock_Reservations"):
+            for i in range(0, len(params), 4):
+                reservation_id, isbn, quantity, _ = params[i:i + 4]
+                db.reservations[(reservation_id, isbn)] = {'quantity': quantity, 'expired': False}
+        elif sql == stock_reservation.CONSUME_LINES_QUERY:
+            self.rows = [(isbn, quantity, db.books[isbn]['stock'], db.books[isbn]['threshold'])
+                         for isbn, quantity in db.lines(params[0])]
+        elif sql == stock_reservation.CONSUME_QUERY:
+            for isbn, quantity in db.lines(params[0]):
+                db.books[isbn]['stock'] -= quantity
+                db.books[isbn]['reserved'] -= quantity
+        elif sql == stock_reservation.LINES_QUERY:
+            self.rows = db.lines(params[0])
+        elif sql == stock_reservation.EXPIRED_QUERY:
+            expired = sorted((isbn, rid, line['quantity']) for (rid, isbn), line in db.reservations.items()
+                             if line['expired'])
+            self.rows = [(rid, isbn, quantity) for isbn, rid, quantity in expired][:params[0]]
+        elif sql.startswith("DELETE FROM Stock_Reservations WHERE reservation_id"):
+            for key in [key for key in db.reservations if key[0] == params[0]]:
+                del db.reservations[key]
+        elif 'SET b.reserved = b.reserved - r.quantity' in sql:
+            for i in range(0, len(params), 2):
+                reservation_id, isbn = params[i:i + 2]
+                db.books[isbn]['reserved'] -= db.reservations[(reservation_id, isbn)]['quantity']
+        elif sql.startswith("DELETE FROM Stock_Reservations WHERE (reservation_id, isbn) IN"):
+            for i in range(0, len(params), 2):
+                db.reservations.pop(tuple(params[i:i + 2]))
+        else:
+            raise AssertionError(f"unexpected statement: {sql}")
+
+    def fetchall(self):
+        return self.rows
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self.db)
+
+    def start_transaction(self):
+        self.db._saved = copy.deepcopy((self.db.books, self.db.reservations))
+
+    def commit(self):
+        self.db._saved = None
+
+    def rollback(self):
+        if self.db._saved is not None:
+            self.db.books, self.db.reservations = self.db._saved
+            self.db._saved = None
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDatabase({'A': (5, 2), 'B': (3, 2)})
+
+    @contextmanager
+    def fake_connection(readonly=False):
+        yield FakeConnection(db)
+
+    monkeypatch.setattr(stock_reservation, 'db_connection', fake_connection)
+    return db
+
+def stock(db, isbn):
+    return db.books[isbn]['stock'], db.books[isbn]['reserved']
+
+def test_reserve_holds_units_without_touching_stock(db):
+    reservation_id, error = StockReservation.reserve([('B', 1), ('A', 2)])
+    assert error is None
+    assert stock(db, 'A') == (5, 2) and stock(db, 'B') == (3, 1)
+    assert db.lines(reservation_id) == [('A', 2), ('B', 1)]
+    # Same lock order for every checkout
+    assert [params[1] for sql, params in db.log if sql == stock_reservation.RESERVE_QUERY] == ['A', 'B']
+
+def test_reserve_is_all_or_nothing(db):
+    StockReservation.reserve([('B', 2)])
+    reservation_id, error = StockReservation.reserve([('A', 1), ('B', 2)])
+    assert reservation_id is None and error == "Not enough stock for book B"
+    assert stock(db, 'A') == (5, 0) and stock(db, 'B') == (3, 2)
+
+def test_consume_sells_the_reserved_units(db):
+    reservation_id, _ = StockReservation.reserve([('A', 2), ('B', 2)])
+    ran_low = StockReservation.consume(FakeCursor(db), reservation_id, 2)
+    assert stock(db, 'A') == (3, 0) and stock(db, 'B') == (1, 0)
+    assert db.reservations == {}
+    assert ran_low == ['B']  # 3 -> 1, below its threshold of 2; A stays at 3
+
+def test_consume_of_a_swept_reservation_fails(db):
+    reservation_id, _ = StockReservation.reserve([('A', 1), ('B', 1)])
+    db.reservations[(reservation_id, 'B')]['expired'] = True
+    assert StockReservation.release_expired() == 1
+    assert StockReservation.consume(FakeCursor(db), reservation_id, 2) is None
+
+def test_release_gives_the_units_back_once(db):
+    reservation_id, _ = StockReservation.reserve([('A', 2)])
+    assert StockReservation.release(reservation_id)
+    assert StockReservation.release(reservation_id)
+    assert stock(db, 'A') == (5, 0)
+
+def test_release_expired_sums_reservations_of_the_same_book(db):
+    first, _ = StockReservation.reserve([('A', 1)])
+    second, _ = StockReservation.reserve([('A', 2), ('B', 1)])
+    third, _ = StockReservation.reserve([('B', 1)])
+    for key in [(first, 'A'), (second, 'A'), (second, 'B')]:
+        db.reservations[key]['expired'] = True
+    assert StockReservation.release_expired(limit=2) == 3  # two batches
+    assert stock(db, 'A') == (5, 0) and stock(db, 'B') == (3, 1)
+    assert list(db.reservations) == [(third, 'B')]
+
+def test_sweep_runs_once_per_interval(db, monkeypatch):
+    monkeypatch.setattr(stock_reservation, '_last_sweep', 0.0)
+    monkeypatch.setattr(Config, 'RESERVATION_SWEEP_INTERVAL', 3600)
+    reservation_id, _ = StockReservation.reserve([('A', 1)])
+    db.reservations[(reservation_id, 'A')]['expired'] = True
+    assert StockReservation.sweep_if_due() == 1
+    reservation_id, _ = StockReservation.reserve([('A', 1)])
+    db.reservations[(reservation_id, 'A')]['expired'] = True
+    assert StockReservation.sweep_if_due() == 0
+    assert stock(db, 'A') == (5, 1)
@@ -0,0 +1,35 @@
+from database.trace import normalize
+
+def test_literals_are_replaced():
+    assert normalize("SELECT * FROM Books WHERE isbn = '978-0' AND stock > 5") == \
+        "SELECT * FROM Books WHERE isbn = ? AND stock > ?"
+    assert normalize("SELECT 'it\\'s', 1.25") == "SELECT ?, ?"
+
+def test_placeholders_and_names_are_kept():
+    assert normalize("SELECT * FROM Book_Sales_Daily WHERE sale_date >= %s") == \
+        "SELECT * FROM Book_Sales_Daily WHERE sale_date >= %s"
+
+def test_in_lists_of_any_length_share_a_key():
+    two = normalize("SELECT * FROM Books WHERE isbn IN (%s, %s)")
+    five = normalize("SELECT * FROM Books WHERE isbn IN (%s,%s,%s,%s,%s)")
+    assert two == five == "SELECT * FROM Books WHERE isbn IN (...)"
+    # A single value is a different statement
+    assert normalize("SELECT * FROM Books WHERE isbn IN (%s)") == "SELECT * FROM Books WHERE isbn IN (%s)"
+
+def test_values_rows_are_folded():
+    one = normalize("INSERT INTO Cart (user_id, isbn, quantity) VALUES (%s, %s, %s)")
+    three = normalize("INSERT INTO Cart (user_id, isbn, quantity) VALUES (%s, %s, %s), (%s, %s, %s), (%s, %s, %s)")
+    assert three == "INSERT INTO Cart (user_id, isbn, quantity) VALUES (...), ..."
+    assert one == "INSERT INTO Cart (user_id, isbn, quantity) VALUES (...)"
+
+def test_literal_rows_are_folded():
+    assert normalize("INSERT INTO T VALUES (1, 'a'), (2, 'b')") == "INSERT INTO T VALUES (...), ..."
+
+def test_whitespace_is_collapsed():
+    assert normalize("""
+        SELECT isbn
+        FROM   Books
+    """) == "SELECT isbn FROM Books"
+
+def test_bytes_are_decoded():
+    assert normalize(b"SELECT * FROM Users WHERE user_id = 7") == "SELECT * FROM Users WHERE user_id = ?"
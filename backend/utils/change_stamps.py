@@ -0,0 +1,65 @@
+import mmap
+import time
+import zlib
+from array import array
+
+# When each book last changed, so a cache can tell whether an entry it holds (or is
+# about to store) was read before that change. Per ISBN: a sale only makes the cached
+# responses that include the sold books stale, not every cached search page.
+#
+# STAMP_SLOTS slots hold a time.monotonic() each, indexed by a hash of the ISBN (two
+# books sharing a slot only cost an extra cache miss). Slot CATALOG is bumped by changes
+# that can move any book in or out of a search result (a book added, renamed, re-authored);
+# ADMIN_STATS by any write the admin dashboard counters show.
+# An entry read at read_at stays fresh while none of its slots changed at or after read_at.
+#     read_at = change_stamps.now()       # before the query
+#     slots = change_stamps.slots(isbns)  # the books in the result
+#     change_stamps.fresh(slots, read_at)
+#
+# The stamps live in an anonymous shared mapping created at import, i.e. in the serve.py
+# master before it forks the workers (the app is preloaded): every worker reads and writes
+# the same memory, so a change committed through one worker makes the others' cached
+# entries stale at once. time.monotonic() is the system-wide CLOCK_MONOTONIC, so stamps
+# from different processes compare. Each slot is one aligned 8-byte store: a reader sees
+# the old or the new stamp, never a mix.
+
+STAMP_SLOTS = 4096
+CATALOG = 0
+ADMIN_STATS = 1
+FIRST_BOOK_SLOT = 2
+
+_stamps = memoryview(mmap.mmap(-1, 8 * (FIRST_BOOK_SLOT + STAMP_SLOTS))).cast('d')
+_stamps[:] = array('d', [float('-inf')]) * len(_stamps)
+
+def now():
+    return time.monotonic()
+
+def slot(isbn):
+    return zlib.crc32(str(isbn).lower().encode('utf-8')) % STAMP_SLOTS + FIRST_BOOK_SLOT
+
+def slots(isbns, catalog=False):
+    """
+    The slots an entry listing these books depends on (plus CATALOG for search results).
+    """
+    return ((CATALOG,) if catalog else ()) + tuple({slot(isbn) for isbn in isbns})
+
+def changed(*slot_ids):
+    stamp = time.monotonic()
+    for s in slot_ids:
+        _stamps[s] = stamp
+
+def books_changed(*isbns):
+    changed(*(slot(isbn) for isbn in isbns))
+
+def catalog_changed(*isbns):
+    books_changed(*isbns)
+    changed(CATALOG)
+
+def fresh(entry_slots, read_at):
+    return all(_stamps[s] < read_at for s in entry_slots)
+
+def changed_within(seconds, isbn=None):
+    """
+    True if the book (or, without isbn, the catalog) changed in the last `seconds`.
+    """
+    return time.monotonic() - _stamps[slot(isbn) if isbn is not None else CATALOG] < seconds
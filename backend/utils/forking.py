@@ -0,0 +1,12 @@
+import os
+
+# serve.py preloads the app in the master process and forks the workers from it. A child
+# inherits the master's memory as is: pooled connections (sockets it must not share),
+# caches, locks (possibly held by a thread that does not exist in the child) and thread
+# pools (whose threads were not copied). Modules holding such state decorate a function
+# with @after_fork that puts a fresh copy in place; it runs in every forked child.
+
+def after_fork(fn):
+    if hasattr(os, 'register_at_fork'):  # POSIX only; nothing forks on Windows
+        os.register_at_fork(after_in_child=fn)
+    return fn
@@ -0,0 +1,94 @@
+import gzip
+import hashlib
+from flask import Response, current_app, request
+from config import Config
+from database.replicas import replicas, primary_required
+from utils import change_stamps
+from utils.cache import LRUCache
+
+# Serialized responses of the public catalog API (/api/books/...), so a repeat request
+# is answered without a query or a re-serialization, and an If-None-Match that still
+# matches gets a 304 without touching the database at all.
+#
+# Each entry is the JSON body, its gzip copy (large bodies only) and a strong ETag
+# (hash of the body), plus when it was read and which books it shows. Freshness is
+# checked per book (utils/change_stamps.py) on every hit:
+# - stock_changed() (a sale, a delivery; Book.stock_changed) only makes the responses
+#   that include those books stale: other search pages and their ETags stay valid;
+# - invalidate_books() (a book added or edited; Book.invalidate_cache) can change any
+#   search result, so it also empties the search cache.
+# The entries are per worker process, but the change stamps are shared by all of them: a
+# change committed through one worker makes the other workers' affected entries stale too.
+
+book_responses = LRUCache('api_book_responses', Config.API_CACHE_SIZE, Config.API_CACHE_TTL)
+search_responses = LRUCache('api_search_responses', Config.API_CACHE_SIZE, Config.API_CACHE_TTL)
+
+def invalidate_books(*isbns):
+    change_stamps.catalog_changed(*isbns)
+    book_responses.invalidate(*isbns)
+    search_responses.clear()  # any book can now be in any result page
+
+def stock_changed(*isbns):
+    change_stamps.books_changed(*isbns)
+    book_responses.invalidate(*isbns)
+    # The search pages showing these books fail their freshness check on their next hit
+
+def read_started():
+    """
+    The read_at to pass to store(), taken before the query. A catalog read may run on a
+    replica, which may not have the changes of the last Config.DB_STICKY_SECONDS yet: it
+    then counts as that much older, so a response showing a book changed in that window
+    is not cached (nor kept once cached).
+    """
+    read_at = change_stamps.now()
+    if replicas.enabled() and not primary_required():
+        read_at -= Config.DB_STICKY_SECONDS
+    return read_at
+
+def lookup(cache, key):
+    """
+    Cached entry, or None on a miss (or if one of its books changed since it was read).
+    """
+    entry = cache.get(key)
+    if entry is not None and not change_stamps.fresh(entry['slots'], entry['read_at']):
+        cache.invalidate(key)
+        return None
+    return entry
+
+def build_entry(payload):
+    body = current_app.json.dumps(payload).encode('utf-8')
+    return {
+        'body': body,
+        'gzip': gzip.compress(body, 6) if len(body) >= Config.API_COMPRESS_MIN_BYTES else None,
+        'etag': hashlib.blake2b(body, digest_size=16).hexdigest(),
+    }
+
+def store(cache, key, entry, read_at, isbns, catalog=False):
+    """
+    Cache entry, read from the database starting at read_at (read_started()) and
+    showing isbns, unless one of them changed meanwhile (the entry may be stale).
+    catalog: a search result, which any added or edited book can change.
+    """
+    entry['read_at'] = read_at
+    entry['slots'] = change_stamps.slots(isbns, catalog)
+    if change_stamps.fresh(entry['slots'], read_at):
+        cache.set(key, entry)
+
+def json_response(entry):
+    """
+    200 with the (possibly gzipped) body, or 304 if the client already has it.
+    """
+    gzipped = entry['gzip'] is not None and 'gzip' in request.accept_encodings
+    # Each content-coding is its own representation, so it gets its own strong ETag
+    etag = entry['etag'] + ('-gz' if gzipped else '')
+
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(entry['gzip'] if gzipped else entry['body'], mimetype='application/json')
+        if gzipped:
+            response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f"public, max-age={Config.API_MAX_AGE}"
+    response.vary.add('Accept-Encoding')
+    return response
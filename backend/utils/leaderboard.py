@@ -0,0 +1,100 @@
+import threading
+from datetime import timedelta
+
+class SlidingLeaderboard:
+    """
+    Top-N keys by total amount over the last window_days days, updated incrementally.
+
+    Amounts are kept in one bucket per day; when the window moves past a day, its
+    bucket is subtracted from the totals. The best `capacity` keys are kept sorted,
+    so top(n) is a slice: between expiries totals only grow, so a key can only enter
+    the top list through add(), where it is checked. Only an expiry (once a day) or a
+    load() re-ranks all keys.
+    """
+
+    def __init__(self, name, window_days, capacity):
+        self.name = name
+        self.window_days = window_days
+        self.capacity = capacity
+        self._days = {}      # date -> {key: amount}
+        self._totals = {}    # key -> amount over the window
+        self._top = []       # best `capacity` keys, best first
+        self._start = None   # first day inside the window
+        self._lock = threading.Lock()
+
+    def add(self, key, amount, day):
+        with self._lock:
+            self._advance(day)
+            if day < self._start:
+                return
+            bucket = self._days.setdefault(day, {})
+            bucket[key] = bucket.get(key, 0) + amount
+            self._totals[key] = self._totals.get(key, 0) + amount
+            self._promote(key)
+
+    def top(self, n, today):
+        """
+        [(key, total)] of the n best keys (n is capped at capacity), best first.
+        """
+        with self._lock:
+            self._advance(today)
+            return [(key, self._totals[key]) for key in self._top[:n]]
+
+    def load(self, rows, today):
+        """
+        Replace everything with rows of (day, key, amount), e.g. read back from history.
+        """
+        start = today - timedelta(days=self.window_days - 1)
+        days, totals = {}, {}
+        for day, key, amount in rows:
+            if day < start or day > today:
+                continue
+            bucket = days.setdefault(day, {})
+            bucket[key] = bucket.get(key, 0) + amount
+            totals[key] = totals.get(key, 0) + amount
+        with self._lock:
+            self._days, self._totals, self._start = days, totals, start
+            self._rank()
+
+    def reset(self):
+        """
+        Forget everything, lock included (a freshly forked worker starts from its own load()).
+        """
+        self._days, self._totals, self._top, self._start = {}, {}, [], None
+        self._lock = threading.Lock()
+
+    def stats(self):
+        with self._lock:
+            return {'window_days': self.window_days, 'days': len(self._days), 'keys': len(self._totals)}
+
+    def _rank_key(self, key):
+        return (-self._totals[key], key)
+
+    def _rank(self):
+        self._top = sorted(self._totals, key=self._rank_key)[:self.capacity]
+
+    def _promote(self, key):
+        top = self._top
+        if key not in top:
+            if len(top) >= self.capacity:
+                if self._rank_key(key) >= self._rank_key(top[-1]):
+                    return
+                top.pop()
+            top.append(key)
+        top.sort(key=self._rank_key)
+
+    def _advance(self, today):
+        start = today - timedelta(days=self.window_days - 1)
+        if self._start is not None and start <= self._start:
+            return
+        expired = [day for day in self._days if day < start]
+        for day in expired:
+            for key, amount in self._days.pop(day).items():
+                total = self._totals[key] - amount
+                if total:
+                    self._totals[key] = total
+                else:
+                    del self._totals[key]
+        self._start = start
+        if expired:
+            self._rank()
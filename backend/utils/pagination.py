@@ -0,0 +1,77 @@
+import json
+import base64
+from flask import request, url_for
+from config import Config
+
+# Keyset (cursor) pagination helpers.
+# A page is fetched with "WHERE key > last key seen ORDER BY key LIMIT page_size + 1";
+# the extra row only tells us whether there is a next page. Unlike OFFSET, the database
+# never reads the rows of earlier pages, so page 500 costs the same as page 1.
+
+def encode_cursor(values):
+    """
+    Opaque next-page token for the sort key of the last row on a page.
+    """
+    raw = json.dumps([str(v) for v in values], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    """
+    Sort key list from a token, or None (first page) if the token is missing or malformed.
+    """
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+        return None
+    return values
+
+def get_page_args():
+    """
+    (after, page_size) from ?cursor=...&page_size=... on the current request.
+    """
+    after = decode_cursor(request.args.get('cursor'))
+    try:
+        page_size = int(request.args.get('page_size', Config.PAGE_SIZE))
+    except ValueError:
+        page_size = Config.PAGE_SIZE
+    page_size = max(1, min(page_size, Config.MAX_PAGE_SIZE))
+    return after, page_size
+
+def paginate(rows, page_size, key):
+    """
+    Trim rows fetched with LIMIT page_size + 1 to one page.
+    key(row) returns the sort key values of a row.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, encode_cursor(key(rows[-1]))
+
+def next_page_url(next_cursor):
+    """
+    URL of the current page with ?cursor= replaced, or None on the last page.
+    """
+    if not next_cursor:
+        return None
+    args = request.args.to_dict()
+    args.update(request.view_args or {})
+    args['cursor'] = next_cursor
+    return url_for(request.endpoint, **args)
+
+def first_page_url():
+    """
+    URL of the current listing without ?cursor=, or None if already on the first page.
+    Available in templates as first_page_url().
+    """
+    if not request.args.get('cursor'):
+        return None
+    args = request.args.to_dict()
+    args.update(request.view_args or {})
+    args.pop('cursor')
+    return url_for(request.endpoint, **args)
@@ -0,0 +1,99 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+import bcrypt
+from config import Config
+from utils.forking import after_fork
+
+class PasswordHasherBusy(Exception):
+    """
+    Raised when the hashing queue is full; the caller should answer "try again later".
+    """
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a fixed-size worker pool instead of the request thread.
+
+    bcrypt releases the GIL, so up to `workers` hashes run in parallel. At most
+    workers + queue_size jobs are accepted at once; past that, submit() fails
+    immediately with PasswordHasherBusy instead of letting a login storm pile up
+    behind the CPU.
+    """
+
+    def __init__(self, workers, queue_size, timeout):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.rejected = 0
+        self.reset()
+
+    def reset(self):
+        """
+        Start over with a new, empty pool (a forked child has the parent's pool but none of its threads).
+        """
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+
+    def submit(self, fn, *args):
+        """
+        Run fn(*args) on the pool; returns a Future.
+        """
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordHasherBusy("Password hashing queue is full")
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn, *args):
+        """
+        Run fn(*args) on the pool and wait for the result.
+        """
+        future = self.submit(fn, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except FuturesTimeout:
+            future.cancel()
+            raise PasswordHasherBusy("Password hashing timed out")
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+hasher = PasswordHasher(Config.BCRYPT_WORKERS, Config.BCRYPT_QUEUE_SIZE, Config.BCRYPT_TIMEOUT)
+after_fork(hasher.reset)
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+def _check(password, hashed):
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+def hash_password(password, rounds=None):
+    """
+    bcrypt hash of password at Config.BCRYPT_ROUNDS (or the given cost).
+    """
+    return hasher.run(_hash, password, rounds or Config.BCRYPT_ROUNDS)
+
+def hash_password_async(password):
+    """
+    Like hash_password, but returns a Future instead of waiting.
+    """
+    return hasher.submit(_hash, password, Config.BCRYPT_ROUNDS)
+
+def check_password(password, hashed):
+    return hasher.run(_check, password, hashed)
+
+def hash_rounds(hashed):
+    """
+    Cost factor stored in a bcrypt hash ("$2b$12$..." -> 12), or None if unreadable.
+    """
+    try:
+        return int(hashed.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+def needs_rehash(hashed):
+    return hash_rounds(hashed) != Config.BCRYPT_ROUNDS